@@ -0,0 +1,524 @@
+"""Inti analisis sidik jari, dapat dipakai tanpa Streamlit
+
+Citra biner dan skeleton disimpan bit-packed (packed_skeleton): hasil analisis
+berisi 'binary_bits' dan 'skeleton_bits' (np.packbits per baris) beserta
+'mask_width', dan penipisan serta deteksi minutiae bekerja langsung di atasnya.
+Citra grayscale tidak disimpan; tampilan yang membutuhkannya memanggil equalize.
+'minutiae' berisi structured array yang sama dengan 'minutiae_array' (bukan
+list dict); minutiae_to_dicts dipakai hanya saat keluaran JSON membutuhkannya.
+"""
+import copy
+
+import cv2
+import numpy as np
+
+from minutiae_engine import extract_minutiae_array, extract_minutiae_packed, minutiae_to_dicts
+from minutiae_pruning import prune_minutiae
+from minutiae_descriptors import compute_descriptors, match_descriptors
+from minutiae_matcher import (MATCH_RADIUS, apply_alignment, as_minutiae_array, estimate_alignment,
+                              match_minutiae)
+from fingerprint_quality import LowQualityError, assess_quality, inner_mask, pixel_mask
+from gabor_enhancement import context_radius, gabor_enhance
+from packed_skeleton import pack_mask, thin, unpack_image, unpack_mask
+from pattern_classifier import classify_pattern
+from pipeline_profiler import stage
+
+def equalize_hist_lut(hist):
+    """Lookup table equalizeHist dari histogram global, sama seperti cv2.equalizeHist"""
+    total = int(hist.sum())
+    nonzero = np.flatnonzero(hist)
+    if len(nonzero) == 0:
+        return np.arange(256, dtype=np.uint8)
+    
+    first = nonzero[0]
+    if hist[first] == total:
+        return np.full(256, first, dtype=np.uint8)
+    
+    # Aritmetika float32 seperti implementasi OpenCV
+    scale = np.float32(255.0) / np.float32(total - hist[first])
+    cumulative = (np.cumsum(hist) - hist[first]).astype(np.float32)
+    lut = np.clip(np.rint(cumulative * scale), 0, 255).astype(np.uint8)
+    lut[:first + 1] = 0
+    return lut
+
+# Kelas untuk analisis sidik jari
+class FingerprintAnalyzer:
+    def __init__(self):
+        self.minutiae_types = {
+            'ridge_ending': 1,
+            'bifurcation': 2,
+            'ridge_start': 3
+        }
+        
+        # Parameter pipeline (juga menjadi bagian kunci cache hasil analisis)
+        self.params = {
+            # 'sharpen' (kernel 3x3) atau 'gabor' (filter Gabor kontekstual per blok, domain frekuensi)
+            'enhancement': 'sharpen',
+            'gabor_block_size': 16,
+            'threshold_block_size': 11,
+            'threshold_c': 2,
+            'close_kernel_size': 3,
+            # Gambar di atas batas ini diproses per tile agar memori tetap terbatas
+            'tile_min_pixels': 4000000,
+            'tile_size': 1024,
+            'pyramid_levels': 2,
+            # Ukuran blok medan orientasi (piksel resolusi penuh, sekitar dua periode ridge)
+            'orientation_block_size': 16,
+            # Peta kualitas: ukuran blok dan skor minimum (di bawahnya gambar ditolak, 0 = tidak pernah)
+            'quality_block_size': 16,
+            'min_quality': 0.4,
+            # Pembersihan minutiae palsu (minutiae_pruning): panjang cabang maksimum spur/bridge/hole/island
+            # dan jarak minimum antar minutiae, dalam piksel (sekitar satu periode ridge pada 500 dpi; 0 = mati)
+            'prune_branch_length': 10,
+            'prune_min_distance': 6
+        }
+        
+        # Parameter pencocokan; terpisah dari params agar mengubahnya tidak membatalkan cache analisis
+        self.match_params = {
+            'match_radius': MATCH_RADIUS,
+            # Batas bawah skor (%) untuk tingkat kecocokan TINGGI dan SEDANG
+            'score_high': 70,
+            'score_medium': 40,
+            # Selaraskan rotasi dan pergeseran minutiae kedua sebelum pencocokan
+            'align': True,
+            # 'spatial': penyelarasan + pencocokan posisi; 'descriptor': bit-vector lingkungan
+            # minutiae (minutiae_descriptors), lebih cepat tetapi lebih kasar, tanpa penyelarasan
+            'matcher': 'spatial'
+        }
+        
+        # Pola sidik jari dasar
+        self.finger_patterns = {
+            'Loop': {
+                'description': 'Pola melengkung seperti lingkaran',
+                'common_fingers': ['Jari Telunjuk', 'Jari Tengah', 'Jari Manis'],
+                'hand_ratio': {'kanan': 0.65, 'kiri': 0.35}
+            },
+            'Whorl': {
+                'description': 'Pola spiral atau konsentris',
+                'common_fingers': ['Ibu Jari', 'Jari Tengah'],
+                'hand_ratio': {'kanan': 0.5, 'kiri': 0.5}
+            },
+            'Arch': {
+                'description': 'Pola berbentuk lengkungan',
+                'common_fingers': ['Ibu Jari', 'Jari Kelingking'],
+                'hand_ratio': {'kanan': 0.45, 'kiri': 0.55}
+            },
+            'Tented Arch': {
+                'description': 'Pola lengkungan dengan sudut tajam',
+                'common_fingers': ['Jari Telunjuk'],
+                'hand_ratio': {'kanan': 0.4, 'kiri': 0.6}
+            }
+        }
+    
+    def configured(self, params=None, match_params=None):
+        """Salinan dangkal dengan dict parameter sendiri, untuk analyzer bersama yang disetel per sesi"""
+        clone = copy.copy(self)
+        clone.params = dict(self.params, **(params or {}))
+        clone.match_params = dict(self.match_params, **(match_params or {}))
+        return clone
+    
+    def preprocess_image(self, image):
+        """Preprocessing gambar sidik jari"""
+        gray = self.equalize(image)
+        enhanced, binary = self._enhance_and_binarize(gray)
+        return gray, enhanced, binary
+    
+    def equalize(self, image):
+        """Grayscale dengan kontras dinormalisasi (equalizeHist)"""
+        with stage('preprocess.equalize'):
+            return cv2.equalizeHist(self._to_gray(image))
+    
+    def preprocess_image_tiled(self, image, tile_size=None, pyramid_levels=None):
+        """Preprocessing per tile dengan halo; citra biner identik dengan preprocess_image"""
+        if tile_size is None:
+            tile_size = self.params['tile_size']
+        if pyramid_levels is None:
+            pyramid_levels = self.params['pyramid_levels']
+        
+        # Ukuran tile kelipatan faktor piramida agar downsampling per tile selaras
+        factor = 2 ** pyramid_levels
+        tile_size = max(factor, tile_size // factor * factor)
+        rows, cols = image.shape[:2]
+        
+        # Halo mencakup jangkauan enhancement, blok threshold adaptif, dan closing
+        halo = (self._enhance_radius() + self.params['threshold_block_size'] // 2
+                + 2 * (self.params['close_kernel_size'] // 2) + 1)
+        # Grid blok Gabor setiap tile harus selaras dengan grid blok citra utuh
+        align = self.params['gabor_block_size'] if self.params['enhancement'] == 'gabor' else 1
+        
+        # Pass 1: histogram global untuk equalizeHist, dibaca per tile
+        with stage('preprocess.equalize'):
+            hist = np.zeros(256, dtype=np.int64)
+            for y0 in range(0, rows, tile_size):
+                for x0 in range(0, cols, tile_size):
+                    tile = self._to_gray(image[y0:y0 + tile_size, x0:x0 + tile_size])
+                    hist += np.bincount(tile.ravel(), minlength=256)
+            lut = equalize_hist_lut(hist)
+        
+        # Pass 2: enhancement dan binarisasi per tile, hanya bagian tengah yang dijahit
+        binary = np.empty((rows, cols), dtype=np.uint8)
+        pyramid = [np.empty((-(-rows // 2**level), -(-cols // 2**level)), dtype=np.uint8)
+                   for level in range(1, pyramid_levels + 1)]
+        coarse_shape = (-(-rows // factor), -(-cols // factor))
+        gray_preview = np.empty(coarse_shape, dtype=np.uint8)
+        enhanced_preview = np.empty(coarse_shape, dtype=np.uint8)
+        
+        for y0 in range(0, rows, tile_size):
+            for x0 in range(0, cols, tile_size):
+                y1 = min(y0 + tile_size, rows)
+                x1 = min(x0 + tile_size, cols)
+                ya, yb = max(y0 - halo, 0) // align * align, min(y1 + halo, rows)
+                xa, xb = max(x0 - halo, 0) // align * align, min(x1 + halo, cols)
+                
+                gray_tile = cv2.LUT(self._to_gray(image[ya:yb, xa:xb]), lut)
+                enhanced_tile, binary_tile = self._enhance_and_binarize(gray_tile)
+                
+                inner = (slice(y0 - ya, y1 - ya), slice(x0 - xa, x1 - xa))
+                binary[y0:y1, x0:x1] = binary_tile[inner]
+                
+                for level, target in enumerate(pyramid, start=1):
+                    self._place_downsampled(target, binary_tile[inner], y0, x0, 2**level)
+                self._place_downsampled(gray_preview, gray_tile[inner], y0, x0, factor)
+                self._place_downsampled(enhanced_preview, enhanced_tile[inner], y0, x0, factor)
+        
+        return gray_preview, enhanced_preview, binary, pyramid
+    
+    def _to_gray(self, image):
+        if len(image.shape) == 3:
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image.copy()
+    
+    def _enhance_and_binarize(self, gray):
+        enhanced = self.enhance(gray)
+        return enhanced, self.binarize(enhanced)
+    
+    def enhance(self, gray):
+        """Filter untuk meningkatkan ridge pattern"""
+        with stage('preprocess.enhance'):
+            if self.params['enhancement'] == 'gabor':
+                return gabor_enhance(gray, self.params['gabor_block_size'])
+            kernel = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+            return cv2.filter2D(gray, -1, kernel)
+    
+    def _enhance_radius(self):
+        if self.params['enhancement'] == 'gabor':
+            return context_radius(self.params['gabor_block_size'])
+        return 1
+    
+    def binarize(self, enhanced):
+        """Threshold adaptif diikuti closing morfologi"""
+        # Threshold adaptif
+        with stage('preprocess.threshold'):
+            binary = cv2.adaptiveThreshold(enhanced, 255, 
+                                          cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                          cv2.THRESH_BINARY,
+                                          self.params['threshold_block_size'],
+                                          self.params['threshold_c'])
+        
+        # Morfologi operasi
+        with stage('preprocess.morphology'):
+            close_size = self.params['close_kernel_size']
+            kernel = np.ones((close_size, close_size), np.uint8)
+            return cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    
+    def _place_downsampled(self, target, tile, y0, x0, factor):
+        if factor == 1:
+            target[y0:y0 + tile.shape[0], x0:x0 + tile.shape[1]] = tile
+            return
+        height = -(-tile.shape[0] // factor)
+        width = -(-tile.shape[1] // factor)
+        target[y0 // factor:y0 // factor + height, x0 // factor:x0 // factor + width] = \
+            cv2.resize(tile, (width, height), interpolation=cv2.INTER_AREA)
+    
+    def extract_minutiae(self, binary_image):
+        """Ekstraksi minutiae dari sidik jari"""
+        minutiae, skeleton = self.extract_minutiae_array(binary_image)
+        return minutiae_to_dicts(minutiae, self.minutiae_types), skeleton
+    
+    def extract_minutiae_array(self, binary_image):
+        """Ekstraksi minutiae sebagai structured array (x, y, type, angle) beserta skeleton bool"""
+        width = binary_image.shape[1]
+        skeleton_bits = self.skeletonize_bits(pack_mask(binary_image))
+        with stage('minutiae'):
+            minutiae = extract_minutiae_packed(skeleton_bits, width, self.minutiae_types)
+        return minutiae, unpack_mask(skeleton_bits, width)
+    
+    def skeletonize(self, binary_image):
+        """Skeleton bool seukuran binary_image (sama dengan skimage.morphology.skeletonize)"""
+        return unpack_mask(self.skeletonize_bits(pack_mask(binary_image)), binary_image.shape[1])
+    
+    def skeletonize_bits(self, binary_bits):
+        """Penipisan langsung pada mask bit-packed"""
+        with stage('skeletonize'):
+            return thin(binary_bits)
+    
+    def minutiae_from_skeleton(self, skeleton):
+        """Deteksi minutiae berdasarkan jumlah tetangga ridge, seluruh citra sekaligus"""
+        with stage('minutiae'):
+            return extract_minutiae_array(skeleton, self.minutiae_types)
+    
+    def assess_quality(self, image):
+        """Peta kualitas, mask latar depan, dan ROI dalam koordinat piksel resolusi penuh"""
+        with stage('quality'):
+            rows, cols = image.shape[:2]
+            factor = 1
+            # Scan besar dinilai pada resolusi lebih rendah, seperti analisis pola pada piramida
+            while (rows * cols > self.params['tile_min_pixels'] * factor ** 2
+                   and factor < 2 ** self.params['pyramid_levels']):
+                factor *= 2
+            if factor > 1:
+                image = cv2.resize(image, (-(-cols // factor), -(-rows // factor)),
+                                   interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            
+            block = max(4, self.params['quality_block_size'] // factor)
+            quality = assess_quality(gray, block)
+            if factor > 1:
+                x0, y0, x1, y1 = quality['roi']
+                quality['roi'] = (x0 * factor, y0 * factor, min(x1 * factor, cols), min(y1 * factor, rows))
+                quality['block_size'] = block * factor
+            return quality
+    
+    def check_quality(self, quality):
+        """LowQualityError jika skor kualitas di bawah params['min_quality']"""
+        if quality['score'] < self.params['min_quality']:
+            raise LowQualityError(quality['score'], self.params['min_quality'])
+    
+    def skeletonize_roi(self, binary_bits, quality):
+        """Skeleton bit-packed hanya di dalam ROI; piksel di luar latar depan dihitamkan terlebih dahulu"""
+        if not quality['mask'].any():
+            return self.skeletonize_bits(binary_bits)
+        x0, y0, x1, y1 = quality['roi']
+        foreground = np.zeros((y1 - y0, binary_bits.shape[1] * 8), dtype=bool)
+        foreground[:, x0:x1] = pixel_mask(quality['mask'], quality['block_size'], quality['roi'])
+        skeleton_bits = np.zeros_like(binary_bits)
+        skeleton_bits[y0:y1] = self.skeletonize_bits(binary_bits[y0:y1] & np.packbits(foreground, axis=1))
+        return skeleton_bits
+    
+    def minutiae_in_roi(self, skeleton_bits, width, quality):
+        """Semua kandidat minutiae di dalam ROI, dalam koordinat citra penuh (sebelum pembersihan)"""
+        roi = quality['roi'] if quality['mask'].any() else None
+        with stage('minutiae'):
+            return extract_minutiae_packed(skeleton_bits, width, self.minutiae_types, roi)
+    
+    def prune_minutiae(self, minutiae, skeleton_bits, width, quality):
+        """Minutiae tanpa titik di tepi segmentasi dan artefak skeleton, beserta laporan per aturan"""
+        with stage('minutiae.prune'):
+            x0, y0, x1, y1 = 0, 0, width, skeleton_bits.shape[0]
+            border = None
+            if quality['mask'].any():
+                x0, y0, x1, y1 = quality['roi']
+                # Ridge yang terpotong tepi segmentasi menghasilkan ridge ending palsu
+                inner = inner_mask(quality['mask'])
+                by = minutiae['y'] // quality['block_size']
+                bx = minutiae['x'] // quality['block_size']
+                inside = (by < inner.shape[0]) & (bx < inner.shape[1])
+                border = np.ones(len(minutiae), dtype=bool)
+                border[inside] = ~inner[by[inside], bx[inside]]
+            
+            skeleton = unpack_mask(skeleton_bits[y0:y1], width)[:, x0:x1]
+            return prune_minutiae(minutiae, skeleton, self.minutiae_types,
+                                  self.params['prune_branch_length'], self.params['prune_min_distance'],
+                                  (x0, y0), border)
+    
+    def calculate_orientation(self, skeleton, i, j):
+        """Menghitung orientasi ridge pada titik tertentu"""
+        if i > 1 and i < skeleton.shape[0]-2 and j > 1 and j < skeleton.shape[1]-2:
+            region = skeleton[i-2:i+3, j-2:j+3]
+            y, x = np.where(region)
+            if len(x) > 1:
+                return np.arctan2(np.mean(y)-2, np.mean(x)-2)
+        return 0
+    
+    def analyze_pattern(self, binary_image, block_size=None):
+        """Analisis pola dasar sidik jari dari medan orientasi dan titik singular"""
+        if block_size is None:
+            block_size = self.params['orientation_block_size']
+        pattern, confidence, predicted_hand, hand_confidence, _ = classify_pattern(
+            binary_image, block_size
+        )
+        return pattern, confidence, predicted_hand, hand_confidence
+    
+    def pattern_input(self, binary_bits, width, pyramid, quality=None):
+        """Citra biner uint8 dan ukuran blok orientasi untuk analyze_pattern
+        
+        Untuk scan besar dipakai level piramida terhalus yang masih di bawah
+        batas piksel, agar ridge tetap terurai. Jika quality diberikan, citra
+        dipotong ke ROI; hanya potongan itu yang dibongkar dari binary_bits.
+        """
+        if pyramid:
+            level = next((level for level, layer in enumerate(pyramid, start=1)
+                          if layer.size <= self.params['tile_min_pixels']), len(pyramid))
+            block = max(4, self.params['orientation_block_size'] // 2 ** level)
+        else:
+            level = 0
+            block = self.params['orientation_block_size']
+        
+        if quality is not None and quality['mask'].any():
+            x0, y0, x1, y1 = (value >> level for value in quality['roi'])
+        else:
+            x0, y0, x1, y1 = 0, 0, None, None
+        if pyramid:
+            return pyramid[level - 1][y0:y1, x0:x1], block
+        return unpack_image(binary_bits[y0:y1], width)[:, x0:x1], block
+    
+    def predict_finger(self, pattern, hand, minutiae_count):
+        """Memprediksi jari berdasarkan pola dan karakteristik"""
+        finger_probabilities = {
+            'Ibu Jari': 0.15,
+            'Jari Telunjuk': 0.20,
+            'Jari Tengah': 0.20,
+            'Jari Manis': 0.20,
+            'Jari Kelingking': 0.15,
+            'Tidak Diketahui': 0.10
+        }
+        
+        # Sesuaikan probabilitas berdasarkan pola
+        if pattern in self.finger_patterns:
+            common_fingers = self.finger_patterns[pattern]['common_fingers']
+            for finger in common_fingers:
+                finger_probabilities[finger] += 0.1
+        
+        # Sesuaikan berdasarkan jumlah minutiae
+        if minutiae_count > 50:
+            finger_probabilities['Ibu Jari'] += 0.1
+            finger_probabilities['Jari Tengah'] += 0.05
+        elif minutiae_count < 30:
+            finger_probabilities['Jari Kelingking'] += 0.1
+        
+        # Normalisasi probabilitas
+        total = sum(finger_probabilities.values())
+        for finger in finger_probabilities:
+            finger_probabilities[finger] /= total
+        
+        # Prediksi jari dengan probabilitas tertinggi
+        predicted_finger = max(finger_probabilities, key=finger_probabilities.get)
+        confidence = finger_probabilities[predicted_finger]
+        
+        return predicted_finger, confidence, finger_probabilities
+    
+    def analyze_image(self, image):
+        """Menjalankan seluruh pipeline analisis untuk satu gambar
+        
+        Gambar dengan skor kualitas di bawah params['min_quality'] ditolak
+        dengan LowQualityError sebelum preprocessing dan skeletonisasi.
+        """
+        quality = self.assess_quality(image)
+        self.check_quality(quality)
+        
+        rows, cols = image.shape[:2]
+        if rows * cols > self.params['tile_min_pixels']:
+            # Scan besar: enhanced hanya disimpan sebagai pratinjau resolusi rendah
+            _, enhanced, binary, pyramid = self.preprocess_image_tiled(image)
+            preview_scale = 2 ** len(pyramid)
+        else:
+            _, enhanced, binary = self.preprocess_image(image)
+            preview_scale = 1
+            pyramid = []
+        binary_bits = pack_mask(binary)
+        del binary
+        pattern_input, pattern_block = self.pattern_input(binary_bits, cols, pyramid, quality)
+        
+        skeleton_bits = self.skeletonize_roi(binary_bits, quality)
+        minutiae_array, pruning = self.prune_minutiae(
+            self.minutiae_in_roi(skeleton_bits, cols, quality), skeleton_bits, cols, quality
+        )
+        with stage('pattern'):
+            pattern, pattern_confidence, hand, hand_confidence = self.analyze_pattern(pattern_input, pattern_block)
+        with stage('finger'):
+            predicted_finger, finger_confidence, finger_probs = self.predict_finger(
+                pattern, hand, len(minutiae_array)
+            )
+        
+        return {
+            'enhanced': enhanced,
+            'binary_bits': binary_bits,
+            'skeleton_bits': skeleton_bits,
+            'mask_width': cols,
+            'preview_scale': preview_scale,
+            'minutiae': minutiae_array,
+            'minutiae_array': minutiae_array,
+            'pattern': pattern,
+            'pattern_confidence': pattern_confidence,
+            'hand': hand,
+            'hand_confidence': hand_confidence,
+            'minutiae_count': len(minutiae_array),
+            'pruning': pruning,
+            'predicted_finger': predicted_finger,
+            'finger_confidence': finger_confidence,
+            'finger_probabilities': finger_probs,
+            'quality_score': quality['score'],
+            'quality_map': quality['quality_map'],
+            'roi': quality['roi']
+        }
+    
+    @staticmethod
+    def _descriptors(fp_data, minutiae):
+        """Deskriptor minutiae dari fp_data['descriptors'] bila cocok, selain itu dihitung"""
+        descriptors = fp_data.get('descriptors')
+        if descriptors is None or len(descriptors) != len(minutiae):
+            descriptors = compute_descriptors(minutiae)
+        return descriptors
+    
+    def compare_fingerprints(self, fp1_data, fp2_data, match_radius=None, one_to_one=True):
+        """Membandingkan dua sidik jari"""
+        if match_radius is None:
+            match_radius = self.match_params['match_radius']
+        
+        # Ekstrak fitur untuk perbandingan
+        minutiae1 = as_minutiae_array(fp1_data.get('minutiae', []), self.minutiae_types)
+        minutiae2 = as_minutiae_array(fp2_data.get('minutiae', []), self.minutiae_types)
+        
+        pattern1 = fp1_data.get('pattern', 'Tidak Diketahui')
+        pattern2 = fp2_data.get('pattern', 'Tidak Diketahui')
+        
+        # Hitung kesamaan pola
+        pattern_similarity = 1.0 if pattern1 == pattern2 else 0.3
+        
+        alignment = None
+        matched_minutiae = 0
+        minutiae_similarity = 0
+        if self.match_params['matcher'] == 'descriptor':
+            # Deskriptor invarian rotasi/translasi; dipakai dari fp_data jika sudah dihitung
+            with stage('describe'):
+                descriptors1 = self._descriptors(fp1_data, minutiae1)
+                descriptors2 = self._descriptors(fp2_data, minutiae2)
+            with stage('compare'):
+                minutiae_similarity, matched_minutiae = match_descriptors(descriptors1, descriptors2)
+        else:
+            # Minutiae kedua dipindahkan ke bingkai minutiae pertama (rotasi dan pergeseran)
+            if self.match_params['align'] and len(minutiae1) and len(minutiae2):
+                with stage('align'):
+                    alignment = estimate_alignment(minutiae1, minutiae2)
+                    minutiae2 = apply_alignment(minutiae2, alignment)
+            
+            # Hitung kesamaan berdasarkan seluruh minutiae dengan indeks spasial
+            if len(minutiae1) and len(minutiae2):
+                with stage('compare'):
+                    matched_idx, _ = match_minutiae(minutiae1, minutiae2, match_radius, one_to_one)
+                matched_minutiae = len(matched_idx)
+                minutiae_similarity = matched_minutiae / max(len(minutiae1), len(minutiae2))
+        
+        # Gabungkan skor
+        total_similarity = (pattern_similarity * 0.3 + minutiae_similarity * 0.7) * 100
+        
+        # Tentukan level kecocokan
+        if total_similarity > self.match_params['score_high']:
+            match_level = "TINGGI"
+            match_class = "match-high"
+        elif total_similarity > self.match_params['score_medium']:
+            match_level = "SEDANG"
+            match_class = "match-medium"
+        else:
+            match_level = "RENDAH"
+            match_class = "match-low"
+        
+        return {
+            'similarity_score': total_similarity,
+            'match_level': match_level,
+            'match_class': match_class,
+            'pattern_similarity': pattern_similarity * 100,
+            'minutiae_similarity': minutiae_similarity * 100,
+            'matched_minutiae_count': matched_minutiae,
+            'alignment': alignment
+        }
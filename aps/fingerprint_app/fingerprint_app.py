@@ -1,21 +1,45 @@
 import streamlit as st
-import cv2
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from PIL import Image
-import io
-import base64
 import hashlib
-import json
+import itertools
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# Untuk analisis sidik jari
-import skimage
-from skimage import feature, filters, morphology, measure
-from scipy import ndimage
+# Lokasi galeri sidik jari terdaftar untuk identifikasi 1:N
+GALLERY_DIR = os.environ.get(
+    'FINGERPRINT_GALLERY_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'galeri')
+)
+
+# Anggaran memori cache hasil analisis dan folder tier disk (opsional)
+CACHE_MAX_BYTES = int(os.environ.get('FINGERPRINT_CACHE_MB', '256')) * 1024 * 1024
+CACHE_DIR = os.environ.get('FINGERPRINT_CACHE_DIR') or None
+
+# Jika diisi, analisis dan perbandingan dikerjakan oleh fingerprint_service.py
+SERVICE_URL = os.environ.get('FINGERPRINT_SERVICE_URL') or None
+
+# Thread analisis bersama di mode perbandingan: referensi dan latent berjalan bersamaan
+COMPARE_ANALYSIS_WORKERS = int(os.environ.get('FINGERPRINT_COMPARE_WORKERS', '2'))
+
+# Perekaman langsung: jeda minimum antar pembaruan frame di layar (detik), dan berapa lama
+# folder pantauan boleh tanpa gambar baru sebelum perekaman berhenti
+CAPTURE_PAINT_INTERVAL = 0.2
+CAPTURE_IDLE_SECONDS = 30
+
+# Puncak alokasi per tahap (tracemalloc) hanya dicatat jika diaktifkan, karena menambah overhead
+PROFILE_MEMORY = os.environ.get('FINGERPRINT_PROFILE_MEMORY') == '1'
+
+# Log terstruktur per request (satu baris JSON) ke stderr
+pipeline_logger = logging.getLogger('fingerprint.pipeline')
+if not pipeline_logger.handlers:
+    pipeline_logger.addHandler(logging.StreamHandler())
+    pipeline_logger.setLevel(logging.INFO)
 
 # Set halaman Streamlit
 st.set_page_config(
@@ -87,6 +111,25 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Modul analisis (OpenCV, pandas, SciPy) baru diimpor setelah judul terkirim ke browser,
+# sehingga saat cold start halaman sudah tampil selama impor berlangsung
+import pandas as pd
+
+from fingerprint_analyzer import FingerprintAnalyzer
+from fingerprint_gallery import FingerprintGallery
+from fingerprint_cascade import CandidateSet, cascade_search
+from fingerprint_multicompare import compare_many, write_reference_collection
+from fingerprint_cache import AnalysisCache, cache_key
+from fingerprint_capture import MIN_FRAME_QUALITY, WINDOW, iter_capture, open_source
+from fingerprint_template import HEADER_DTYPE, RECORD_DTYPE, encode_template
+from fingerprint_service import FingerprintServiceClient
+from fingerprint_render import MINUTIAE_LEGEND, draw_minutiae, draw_quality, to_display
+from fingerprint_quality import LowQualityError
+from fingerprint_pipeline import decode_image, iter_concurrent, iter_pipelined
+from fingerprint_stages import StagedPipeline, downstream_stages, stage_key
+from packed_skeleton import unpack_image, unpack_mask
+from pipeline_profiler import REGISTRY, profile_request, stage
+
 # Sidebar
 with st.sidebar:
     st.image("https://img.icons8.com/color/96/000000/fingerprint.png", width=80)
@@ -94,7 +137,9 @@ with st.sidebar:
     
     analysis_mode = st.selectbox(
         "Pilih Mode Analisis",
-        ["Analisis Sidik Jari Tunggal", "Perbandingan Dua Sidik Jari"]
+        ["Analisis Sidik Jari Tunggal", "Analisis Banyak Sidik Jari (Kartu Sepuluh Jari)",
+         "Perbandingan Dua Sidik Jari", "Perbandingan Satu Latent dengan Banyak Referensi",
+         "Identifikasi 1:N (Galeri)", "Perekaman Langsung (Live Capture)"]
     )
     
     st.markdown("---")
@@ -106,320 +151,187 @@ with st.sidebar:
     - Minutiae: Titik karakteristik untuk identifikasi
     """)
 
-# Kelas untuk analisis sidik jari
-class FingerprintAnalyzer:
-    def __init__(self):
-        self.minutiae_types = {
-            'ridge_ending': 1,
-            'bifurcation': 2,
-            'ridge_start': 3
-        }
-        
-        # Pola sidik jari dasar
-        self.finger_patterns = {
-            'Loop': {
-                'description': 'Pola melengkung seperti lingkaran',
-                'common_fingers': ['Jari Telunjuk', 'Jari Tengah', 'Jari Manis'],
-                'hand_ratio': {'kanan': 0.65, 'kiri': 0.35}
-            },
-            'Whorl': {
-                'description': 'Pola spiral atau konsentris',
-                'common_fingers': ['Ibu Jari', 'Jari Tengah'],
-                'hand_ratio': {'kanan': 0.5, 'kiri': 0.5}
-            },
-            'Arch': {
-                'description': 'Pola berbentuk lengkungan',
-                'common_fingers': ['Ibu Jari', 'Jari Kelingking'],
-                'hand_ratio': {'kanan': 0.45, 'kiri': 0.55}
-            },
-            'Tented Arch': {
-                'description': 'Pola lengkungan dengan sudut tajam',
-                'common_fingers': ['Jari Telunjuk'],
-                'hand_ratio': {'kanan': 0.4, 'kiri': 0.6}
-            }
-        }
-    
-    def preprocess_image(self, image):
-        """Preprocessing gambar sidik jari"""
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-        
-        # Normalisasi kontras
-        gray = cv2.equalizeHist(gray)
-        
-        # Filter untuk meningkatkan ridge pattern
-        kernel = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
-        enhanced = cv2.filter2D(gray, -1, kernel)
-        
-        # Threshold adaptif
-        binary = cv2.adaptiveThreshold(enhanced, 255, 
-                                      cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                      cv2.THRESH_BINARY, 11, 2)
-        
-        # Morfologi operasi
-        kernel = np.ones((3,3), np.uint8)
-        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        
-        return gray, enhanced, binary
-    
-    def extract_minutiae(self, binary_image):
-        """Ekstraksi minutiae dari sidik jari"""
-        # Skeletonization
-        skeleton = morphology.skeletonize(binary_image > 0)
-        
-        # Deteksi minutiae berdasarkan pola ridge
-        minutiae_points = []
-        rows, cols = skeleton.shape
-        
-        for i in range(1, rows-1):
-            for j in range(1, cols-1):
-                if skeleton[i, j]:
-                    # 8-neighborhood
-                    neighborhood = skeleton[i-1:i+2, j-1:j+2]
-                    ridge_count = np.sum(neighborhood) - 1
-                    
-                    if ridge_count == 1:  # Ridge ending
-                        minutiae_points.append({
-                            'x': j,
-                            'y': i,
-                            'type': 'ridge_ending',
-                            'orientation': self.calculate_orientation(skeleton, i, j)
-                        })
-                    elif ridge_count == 3:  # Bifurcation
-                        minutiae_points.append({
-                            'x': j,
-                            'y': i,
-                            'type': 'bifurcation',
-                            'orientation': self.calculate_orientation(skeleton, i, j)
-                        })
-        
-        return minutiae_points, skeleton
-    
-    def calculate_orientation(self, skeleton, i, j):
-        """Menghitung orientasi ridge pada titik tertentu"""
-        if i > 1 and i < skeleton.shape[0]-2 and j > 1 and j < skeleton.shape[1]-2:
-            region = skeleton[i-2:i+3, j-2:j+3]
-            y, x = np.where(region)
-            if len(x) > 1:
-                return np.arctan2(np.mean(y)-2, np.mean(x)-2)
-        return 0
-    
-    def analyze_pattern(self, binary_image):
-        """Analisis pola dasar sidik jari"""
-        # Hitung jumlah ridge dan arah umum
-        contours = measure.find_contours(binary_image, 0.5)
-        
-        if len(contours) == 0:
-            return "Tidak Diketahui", 0.5, 0.5
-        
-        # Analisis bentuk kontur
-        areas = [measure.area_moments(c) for c in contours]
-        eccentricities = [measure.eccentricity(c) for c in contours]
-        
-        avg_eccentricity = np.mean(eccentricities) if eccentricities else 0
-        
-        # Klasifikasi berdasarkan karakteristik
-        if avg_eccentricity > 0.85:
-            pattern = "Loop"
-            confidence = min(0.8 + avg_eccentricity * 0.2, 0.95)
-        elif avg_eccentricity > 0.7:
-            pattern = "Arch"
-            confidence = min(0.7 + avg_eccentricity * 0.3, 0.9)
-        else:
-            pattern = "Whorl"
-            confidence = min(0.75 + (1 - avg_eccentricity) * 0.25, 0.92)
-        
-        # Prediksi tangan (kiri/kanan) berdasarkan asimetri
-        moments = measure.moments(binary_image)
-        if moments[0, 0] > 0:
-            cx = moments[1, 0] / moments[0, 0]
-            cy = moments[0, 1] / moments[0, 0]
-            
-            # Hitung asimetri
-            left_half = binary_image[:, :binary_image.shape[1]//2]
-            right_half = binary_image[:, binary_image.shape[1]//2:]
-            
-            left_density = np.sum(left_half) / (left_half.size + 1e-6)
-            right_density = np.sum(right_half) / (right_half.size + 1e-6)
-            
-            hand_confidence = abs(left_density - right_density) * 2
-            predicted_hand = "Kanan" if right_density > left_density else "Kiri"
-        else:
-            hand_confidence = 0.5
-            predicted_hand = "Tidak Diketahui"
-        
-        return pattern, confidence, predicted_hand, hand_confidence
-    
-    def predict_finger(self, pattern, hand, minutiae_count):
-        """Memprediksi jari berdasarkan pola dan karakteristik"""
-        finger_probabilities = {
-            'Ibu Jari': 0.15,
-            'Jari Telunjuk': 0.20,
-            'Jari Tengah': 0.20,
-            'Jari Manis': 0.20,
-            'Jari Kelingking': 0.15,
-            'Tidak Diketahui': 0.10
-        }
-        
-        # Sesuaikan probabilitas berdasarkan pola
-        if pattern in self.finger_patterns:
-            common_fingers = self.finger_patterns[pattern]['common_fingers']
-            for finger in common_fingers:
-                finger_probabilities[finger] += 0.1
-        
-        # Sesuaikan berdasarkan jumlah minutiae
-        if minutiae_count > 50:
-            finger_probabilities['Ibu Jari'] += 0.1
-            finger_probabilities['Jari Tengah'] += 0.05
-        elif minutiae_count < 30:
-            finger_probabilities['Jari Kelingking'] += 0.1
-        
-        # Normalisasi probabilitas
-        total = sum(finger_probabilities.values())
-        for finger in finger_probabilities:
-            finger_probabilities[finger] /= total
-        
-        # Prediksi jari dengan probabilitas tertinggi
-        predicted_finger = max(finger_probabilities, key=finger_probabilities.get)
-        confidence = finger_probabilities[predicted_finger]
-        
-        return predicted_finger, confidence, finger_probabilities
-    
-    def compare_fingerprints(self, fp1_data, fp2_data):
-        """Membandingkan dua sidik jari"""
-        # Ekstrak fitur untuk perbandingan
-        minutiae1 = fp1_data.get('minutiae', [])
-        minutiae2 = fp2_data.get('minutiae', [])
-        
-        pattern1 = fp1_data.get('pattern', 'Tidak Diketahui')
-        pattern2 = fp2_data.get('pattern', 'Tidak Diketahui')
-        
-        # Hitung kesamaan pola
-        pattern_similarity = 1.0 if pattern1 == pattern2 else 0.3
-        
-        # Hitung kesamaan berdasarkan minutiae
-        if minutiae1 and minutiae2:
-            # Hitung jarak minutiae yang cocok
-            matched_minutiae = 0
-            for m1 in minutiae1[:50]:  # Batasi untuk efisiensi
-                for m2 in minutiae2[:50]:
-                    distance = np.sqrt((m1['x'] - m2['x'])**2 + (m1['y'] - m2['y'])**2)
-                    if distance < 5 and m1['type'] == m2['type']:
-                        matched_minutiae += 1
-                        break
-            
-            minutiae_similarity = matched_minutiae / max(len(minutiae1), len(minutiae2))
-        else:
-            minutiae_similarity = 0
-        
-        # Gabungkan skor
-        total_similarity = (pattern_similarity * 0.3 + minutiae_similarity * 0.7) * 100
-        
-        # Tentukan level kecocokan
-        if total_similarity > 70:
-            match_level = "TINGGI"
-            match_class = "match-high"
-        elif total_similarity > 40:
-            match_level = "SEDANG"
-            match_class = "match-medium"
-        else:
-            match_level = "RENDAH"
-            match_class = "match-low"
-        
-        return {
-            'similarity_score': total_similarity,
-            'match_level': match_level,
-            'match_class': match_class,
-            'pattern_similarity': pattern_similarity * 100,
-            'minutiae_similarity': minutiae_similarity * 100,
-            'matched_minutiae_count': matched_minutiae if minutiae1 and minutiae2 else 0
-        }
-
-# Inisialisasi analyzer
-analyzer = FingerprintAnalyzer()
+# Analyzer dibuat sekali per proses; setiap rerun memakai salinan dengan parameter sesinya sendiri
+@st.cache_resource
+def load_analyzer():
+    return FingerprintAnalyzer()
+
+analyzer = load_analyzer().configured()
+
+# Galeri dimuat sekali dan dipakai bersama oleh semua sesi
+@st.cache_resource
+def load_gallery(path):
+    return FingerprintGallery(path)
+
+# Cache hasil analisis, bertahan di antara rerun Streamlit
+@st.cache_resource
+def load_analysis_cache():
+    return AnalysisCache(CACHE_MAX_BYTES, CACHE_DIR)
+
+# Keluaran per tahap (enhanced, binary, skeleton, ...) agar perubahan parameter hanya menghitung ulang hilirnya
+@st.cache_resource
+def load_stage_cache():
+    return AnalysisCache(CACHE_MAX_BYTES)
+
+# Executor bersama untuk analisis referensi dan latent secara bersamaan (mode perbandingan)
+@st.cache_resource
+def load_analysis_executor():
+    return ThreadPoolExecutor(COMPARE_ANALYSIS_WORKERS, thread_name_prefix='compare-analyze')
+
+@st.cache_resource
+def load_service_client(url):
+    return FingerprintServiceClient(url)
+
+staged_pipeline = StagedPipeline(analyzer, load_stage_cache())
+
+def stage_help(*params):
+    stages = []
+    for param in params:
+        stages += [name for name in downstream_stages(param) if name not in stages]
+    if not stages:
+        return "Tidak ada tahap yang dihitung ulang"
+    return "Dihitung ulang: " + " → ".join(stages)
+
+# Parameter pipeline yang dapat disetel pemeriksa
+with st.sidebar:
+    with st.expander("Parameter Pipeline"):
+        st.caption("Hanya tahap di hilir parameter yang berubah dihitung ulang; tahap lain diambil dari cache.")
+        analyzer.params['enhancement'] = st.radio(
+            "Peningkatan ridge", ['sharpen', 'gabor'],
+            index=['sharpen', 'gabor'].index(analyzer.params['enhancement']),
+            format_func={'sharpen': "Sharpen 3x3", 'gabor': "Gabor kontekstual (FFT per blok)"}.get,
+            help="Filter Gabor per blok mengikuti orientasi dan frekuensi ridge lokal, menyambung ridge "
+                 "terputus pada latent sehingga minutiae palsu berkurang. " + stage_help('enhancement')
+        )
+        analyzer.params['threshold_block_size'] = st.slider(
+            "Ukuran blok threshold adaptif", 3, 51, analyzer.params['threshold_block_size'], step=2,
+            help=stage_help('threshold_block_size')
+        )
+        analyzer.params['threshold_c'] = st.slider(
+            "Konstanta C threshold adaptif", -10, 20, analyzer.params['threshold_c'],
+            help=stage_help('threshold_c')
+        )
+        analyzer.params['close_kernel_size'] = st.slider(
+            "Ukuran kernel closing", 1, 9, analyzer.params['close_kernel_size'], step=2,
+            help=stage_help('close_kernel_size')
+        )
+        analyzer.params['prune_branch_length'] = st.slider(
+            "Panjang cabang pembersihan minutiae (px)", 0, 30, analyzer.params['prune_branch_length'],
+            help="Spur, bridge, hole, dan island sependek ini dibuang beserta minutiae-nya (0 = mati). "
+                 + stage_help('prune_branch_length')
+        )
+        analyzer.params['prune_min_distance'] = st.slider(
+            "Jarak minimum antar minutiae (px)", 0, 20, analyzer.params['prune_min_distance'],
+            help="Minutiae yang lebih dekat dari jarak ini ke minutiae lain dibuang (0 = mati). "
+                 + stage_help('prune_min_distance')
+        )
+        analyzer.params['min_quality'] = st.slider(
+            "Skor kualitas minimum", 0.0, 1.0, analyzer.params['min_quality'], step=0.05,
+            help="Gambar dengan skor kualitas (coherence ridge pada area sidik jari) di bawah ambang ini "
+                 "ditolak sebelum skeletonisasi. " + stage_help('min_quality')
+        )
+        analyzer.match_params['matcher'] = st.radio(
+            "Matcher minutiae", ['spatial', 'descriptor'],
+            index=['spatial', 'descriptor'].index(analyzer.match_params['matcher']),
+            format_func={'spatial': "Spasial (penyelarasan + radius)",
+                         'descriptor': "Deskriptor bit-vector (MCC)"}.get,
+            help="Deskriptor membandingkan lingkungan setiap minutiae sebagai bit-vector (XOR/popcount), "
+                 "tanpa penyelarasan dan jauh lebih cepat, tetapi lebih kasar daripada matcher spasial. "
+                 + stage_help('matcher')
+        )
+        descriptor_matcher = analyzer.match_params['matcher'] == 'descriptor'
+        analyzer.match_params['match_radius'] = st.slider(
+            "Radius pencocokan minutiae (px)", 1.0, 20.0, float(analyzer.match_params['match_radius']),
+            step=0.5, disabled=descriptor_matcher, help=stage_help('match_radius')
+        )
+        analyzer.match_params['align'] = st.checkbox(
+            "Selaraskan rotasi dan pergeseran", analyzer.match_params['align'], disabled=descriptor_matcher,
+            help="Transformasi rigid diperkirakan dari pasangan minutiae (akumulator Hough) sebelum "
+                 "pencocokan, sehingga latent yang bergeser atau berputar tidak perlu dipotong ulang. "
+                 + stage_help('align')
+        )
+        analyzer.match_params['score_medium'], analyzer.match_params['score_high'] = st.slider(
+            "Batas skor SEDANG / TINGGI (%)", 0, 100,
+            (analyzer.match_params['score_medium'], analyzer.match_params['score_high']),
+            help=stage_help('score_medium', 'score_high')
+        )
+
+def run_analysis(image, file_bytes, filename, analysis_cache, service_client=None, progress=None):
+    """Analisis ber-cache tanpa pemanggilan Streamlit, sehingga aman dijalankan di thread worker
+
+    progress(tahap, selesai, total) diteruskan ke StagedPipeline.analyze; hasil
+    dari cache atau layanan tidak melaporkan tahap.
+    """
+    def compute():
+        # Layanan menerima parameter sesi, sehingga hasilnya sah disimpan dengan kunci yang sama
+        if service_client is not None and file_bytes is not None:
+            return service_client.analyze(file_bytes, filename, analyzer.params)
+        return staged_pipeline.analyze(image, progress)
+
+    return analysis_cache.get_or_compute(cache_key(image, analyzer.params), compute)
+
+def analyze_cached(image, file_bytes=None, filename=''):
+    """Analisis gambar lengkap, dilewati jika gambar dan parameter yang sama sudah pernah dianalisis"""
+    service_client = load_service_client(SERVICE_URL) if SERVICE_URL else None
+    return run_analysis(image, file_bytes, filename, load_analysis_cache(), service_client)
+
+def analyze_or_reject(image, file_bytes=None, filename=''):
+    """analyze_cached; jika gambar ditolak karena kualitas, pesan ditampilkan dan hasilnya None"""
+    try:
+        return analyze_cached(image, file_bytes, filename)
+    except LowQualityError as exc:
+        st.error(f"{filename or 'Gambar'} ditolak: {exc}")
+        return None
 
 # Fungsi untuk menampilkan gambar
 def display_image(image, title, caption=""):
-    fig, ax = plt.subplots(figsize=(6, 6))
-    if len(image.shape) == 3:
-        ax.imshow(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-    else:
-        ax.imshow(image, cmap='gray')
-    ax.set_title(title, fontsize=14)
-    ax.axis('off')
-    if caption:
-        plt.figtext(0.5, 0.01, caption, ha='center', fontsize=10)
-    st.pyplot(fig)
-    plt.close()
+    with stage('render'):
+        preview, _ = to_display(image)
+        st.image(preview, caption=f"{title} — {caption}" if caption else title, width='stretch')
 
 # Fungsi untuk menampilkan minutiae pada gambar
-def plot_minutiae(image, minutiae_points, title):
-    fig, ax = plt.subplots(figsize=(6, 6))
-    
-    if len(image.shape) == 3:
-        ax.imshow(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-    else:
-        ax.imshow(image, cmap='gray')
-    
-    # Plot minutiae
-    colors = {'ridge_ending': 'red', 'bifurcation': 'green', 'ridge_start': 'blue'}
-    
-    for minutiae in minutiae_points[:100]:  # Batasi untuk visualisasi
-        color = colors.get(minutiae['type'], 'yellow')
-        ax.plot(minutiae['x'], minutiae['y'], marker='o', 
-                markersize=6, color=color, markeredgecolor='white')
-    
-    ax.set_title(title, fontsize=14)
-    ax.axis('off')
-    
-    # Legenda
-    from matplotlib.patches import Patch
-    legend_elements = [
-        Patch(facecolor='red', label='Ridge Ending'),
-        Patch(facecolor='green', label='Bifurcation'),
-        Patch(facecolor='blue', label='Ridge Start')
-    ]
-    ax.legend(handles=legend_elements, loc='upper right', fontsize=8)
-    
-    st.pyplot(fig)
-    plt.close()
+def plot_minutiae(image, minutiae_points, title, scale=1, limit=100):
+    with stage('render'):
+        # Jumlah titik dibatasi agar overlay tetap terbaca
+        overlay = draw_minutiae(image, minutiae_points, scale,
+                                minutiae_types=analyzer.minutiae_types, limit=limit)
+        st.image(overlay, caption=f"{title} — {MINUTIAE_LEGEND}", width='stretch')
 
-# Mode analisis tunggal
-if analysis_mode == "Analisis Sidik Jari Tunggal":
-    st.markdown("<h2 class='sub-header'>Analisis Sidik Jari Tunggal</h2>", unsafe_allow_html=True)
-    
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        uploaded_file = st.file_uploader(
-            "Unggah gambar sidik jari", 
-            type=['jpg', 'jpeg', 'png', 'bmp', 'tiff']
-        )
+# Profil waktu seluruh rerun halaman: tahap analisis dan rendering. Blok with menutup profil
+# (ContextVar dan tracemalloc) juga saat halaman berhenti karena error, st.stop() atau rerun
+with profile_request(analysis_mode, trace_memory=PROFILE_MEMORY) as page_profile:
+    # Mode analisis tunggal
+    if analysis_mode == "Analisis Sidik Jari Tunggal":
+        st.markdown("<h2 class='sub-header'>Analisis Sidik Jari Tunggal</h2>", unsafe_allow_html=True)
         
-        if uploaded_file is not None:
-            # Baca gambar
-            file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
-            image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-            
-            # Tampilkan gambar asli
-            display_image(image, "Sidik Jari Asli")
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            uploaded_file = st.file_uploader(
+                "Unggah gambar sidik jari", 
+                type=['jpg', 'jpeg', 'png', 'bmp', 'tiff']
+            )
             
-            # Preprocessing
-            with st.spinner("Melakukan preprocessing dan analisis..."):
-                gray, enhanced, binary = analyzer.preprocess_image(image)
+            analysis = None
+            if uploaded_file is not None:
+                # Baca gambar langsung dari buffer unggahan, tanpa salinan perantara
+                file_bytes = uploaded_file.getbuffer()
+                image = decode_image(file_bytes)
                 
-                # Ekstraksi minutiae
-                minutiae_points, skeleton = analyzer.extract_minutiae(binary)
+                # Tampilkan gambar asli
+                display_image(image, "Sidik Jari Asli")
                 
-                # Analisis pola
-                pattern, pattern_confidence, hand, hand_confidence = analyzer.analyze_pattern(binary)
-                
-                # Prediksi jari
-                predicted_finger, finger_confidence, finger_probs = analyzer.predict_finger(
-                    pattern, hand, len(minutiae_points)
-                )
+                # Preprocessing
+                with st.spinner("Melakukan preprocessing dan analisis..."):
+                    analysis = analyze_or_reject(image, file_bytes, uploaded_file.name)
+            
+            if analysis is not None:
+                enhanced, minutiae_points = analysis['enhanced'], analysis['minutiae']
+                pattern, pattern_confidence = analysis['pattern'], analysis['pattern_confidence']
+                hand, hand_confidence = analysis['hand'], analysis['hand_confidence']
+                predicted_finger = analysis['predicted_finger']
+                finger_confidence = analysis['finger_confidence']
+                finger_probs = analysis['finger_probabilities']
                 
                 # Metadata
                 metadata = {
@@ -433,291 +345,815 @@ if analysis_mode == "Analisis Sidik Jari Tunggal":
                     'predicted_hand': hand,
                     'hand_confidence': hand_confidence,
                     'predicted_finger': predicted_finger,
-                    'finger_confidence': finger_confidence
+                    'finger_confidence': finger_confidence,
+                    'quality_score': analysis['quality_score']
                 }
+                
+                # Tampilkan hasil preprocessing
+                st.markdown("<h3 class='sub-header'>Hasil Preprocessing</h3>", unsafe_allow_html=True)
+                
+                col_pre1, col_pre2 = st.columns(2)
+                
+                with col_pre1:
+                    # Grayscale tidak disimpan dalam hasil analisis; equalize dihitung ulang untuk tampilan
+                    display_image(analyzer.equalize(image), "Grayscale", "Citra skala abu-abu")
+                
+                with col_pre2:
+                    display_image(enhanced, "Enhanced", "Peningkatan kontras dan ridge")
+                
+                # Tampilkan minutiae
+                st.markdown("<h3 class='sub-header'>Deteksi Minutiae</h3>", unsafe_allow_html=True)
+                plot_minutiae(enhanced, analysis['minutiae_array'], "Titik Minutiae Terdeteksi",
+                              analysis['preview_scale'])
+                
+                # Citra biner dan skeleton hanya dirender saat panel dibuka
+                detail_panel = st.expander("Citra Biner dan Skeleton", key="panel_biner_skeleton",
+                                           on_change="rerun")
+                if detail_panel.open:
+                    with detail_panel:
+                        col_skel1, col_skel2 = st.columns(2)
+                        
+                        # Mask bit-packed hanya dibongkar selama panel ini dirender
+                        with col_skel1:
+                            display_image(unpack_image(analysis['binary_bits'], analysis['mask_width']),
+                                          "Binary", "Citra biner untuk analisis")
+                        
+                        with col_skel2:
+                            display_image(unpack_mask(analysis['skeleton_bits'], analysis['mask_width']),
+                                          "Skeleton", "Struktur ridge sidik jari")
+                
+                # Peta kualitas per blok dan ROI yang dipakai skeletonisasi, minutiae, dan pola
+                quality_panel = st.expander(f"Peta Kualitas dan ROI (skor {analysis['quality_score']:.2f})",
+                                            key="panel_kualitas", on_change="rerun")
+                if quality_panel.open and analysis.get('quality_map') is not None:
+                    with quality_panel, stage('render'):
+                        st.image(draw_quality(enhanced, analysis['quality_map'],
+                                              analyzer.params['quality_block_size'], analysis['roi'],
+                                              analysis['preview_scale']),
+                                 caption="Biru = kualitas rendah, merah = tinggi; kotak putih = ROI",
+                                 width='stretch')
+        
+        with col2:
+            if analysis is not None:
+                st.markdown("<div class='result-box'>", unsafe_allow_html=True)
+                st.markdown("### 📊 Hasil Analisis")
+                
+                # Metadata
+                st.markdown("#### Metadata")
+                st.json(metadata)
+                
+                # Pola sidik jari
+                st.markdown("#### Pola Sidik Jari")
+                pattern_info = analyzer.finger_patterns.get(pattern, {})
+                
+                col_pat1, col_pat2 = st.columns(2)
+                with col_pat1:
+                    st.metric("Pola Terdeteksi", pattern)
+                    st.metric("Tingkat Kepercayaan", f"{pattern_confidence*100:.1f}%")
+                
+                with col_pat2:
+                    st.metric("Tangan Diprediksi", hand)
+                    st.metric("Tingkat Kepercayaan", f"{hand_confidence*100:.1f}%")
+                
+                if pattern_info:
+                    st.info(f"**Deskripsi**: {pattern_info.get('description', 'Tidak diketahui')}")
+                
+                # Prediksi jari
+                st.markdown("#### Prediksi Jari")
+                st.metric("Jari Diprediksi", predicted_finger)
+                st.metric("Tingkat Kepercayaan", f"{finger_confidence*100:.1f}%")
+                
+                # Probabilitas jari
+                st.markdown("##### Probabilitas per Jari")
+                finger_df = pd.DataFrame(list(finger_probs.items()), 
+                                       columns=['Jari', 'Probabilitas'])
+                finger_df['Probabilitas'] = (finger_df['Probabilitas'] * 100).round(1)
+                st.dataframe(finger_df.style.highlight_max(axis=0))
+                
+                # Minutiae
+                st.markdown("#### Analisis Minutiae")
+                type_names = {code: name for name, code in analyzer.minutiae_types.items()}
+                type_codes, type_counts = np.unique(minutiae_points['type'], return_counts=True)
+                
+                for code, count in zip(type_codes.tolist(), type_counts.tolist()):
+                    st.metric(f"Jumlah {type_names[code].replace('_', ' ').title()}", count)
+                
+                st.metric("Total Minutiae", len(minutiae_points))
+                
+                # Efek setiap aturan pembersihan terhadap jumlah minutiae dan ukuran template
+                pruning = analysis['pruning']
+                template_size = lambda count: HEADER_DTYPE.itemsize + count * RECORD_DTYPE.itemsize
+                st.caption(f"Pembersihan minutiae: {pruning['before']} kandidat → {pruning['after']} minutiae, "
+                           f"template {template_size(pruning['before']) / 1024:.1f} KB → "
+                           f"{template_size(pruning['after']) / 1024:.1f} KB")
+                st.dataframe(pd.DataFrame(list(pruning['removed'].items()), columns=['Aturan', 'Dibuang']),
+                             hide_index=True)
+                
+                # Template biner ringkas untuk disimpan atau dipakai di sistem lain
+                template_bytes = encode_template(
+                    analysis['minutiae_array'], pattern, hand,
+                    width=image.shape[1], height=image.shape[0],
+                    minutiae_types=analyzer.minutiae_types
+                )
+                st.download_button(
+                    f"Unduh Template Minutiae ({len(template_bytes) / 1024:.1f} KB)",
+                    template_bytes,
+                    file_name=os.path.splitext(uploaded_file.name)[0] + '.fpt',
+                    mime='application/octet-stream'
+                )
+                
+                st.markdown("</div>", unsafe_allow_html=True)
+
+    # Mode perbandingan dua sidik jari
+    elif analysis_mode == "Perbandingan Dua Sidik Jari":
+        st.markdown("<h2 class='sub-header'>Perbandingan Dua Sidik Jari</h2>", unsafe_allow_html=True)
+        
+        st.markdown("""
+        <div class='info-box'>
+            <strong>Instruksi:</strong><br>
+            1. Unggah sidik jari referensi (database)<br>
+            2. Unggah sidik jari latent (TKP)<br>
+            3. Sistem akan membandingkan dan menganalisis kesamaan
+        </div>
+        """, unsafe_allow_html=True)
+        
+        col_upload1, col_upload2 = st.columns(2)
+        
+        fp1_data = None
+        fp2_data = None
+        uploads = {}
+        
+        with col_upload1:
+            st.markdown("### Sidik Jari Referensi")
+            ref_file = st.file_uploader(
+                "Unggah sidik jari referensi", 
+                type=['jpg', 'jpeg', 'png', 'bmp', 'tiff'],
+                key="ref"
+            )
             
-            # Tampilkan hasil preprocessing
-            st.markdown("<h3 class='sub-header'>Hasil Preprocessing</h3>", unsafe_allow_html=True)
-            
-            col_pre1, col_pre2, col_pre3 = st.columns(3)
-            
-            with col_pre1:
-                display_image(gray, "Grayscale", "Citra skala abu-abu")
-            
-            with col_pre2:
-                display_image(enhanced, "Enhanced", "Peningkatan kontras dan ridge")
-            
-            with col_pre3:
-                display_image(binary, "Binary", "Citra biner untuk analisis")
-            
-            # Tampilkan skeleton dan minutiae
-            st.markdown("<h3 class='sub-header'>Deteksi Minutiae</h3>", unsafe_allow_html=True)
-            
-            col_skel1, col_skel2 = st.columns(2)
+            if ref_file is not None:
+                ref_image = decode_image(ref_file.getbuffer())
+                display_image(ref_image, "Sidik Jari Referensi")
+                uploads['ref'] = (ref_file, ref_image, st.empty())
+        
+        with col_upload2:
+            st.markdown("### Sidik Jari Latent (TKP)")
+            latent_file = st.file_uploader(
+                "Unggah sidik jari latent", 
+                type=['jpg', 'jpeg', 'png', 'bmp', 'tiff'],
+                key="latent"
+            )
             
-            with col_skel1:
-                display_image(skeleton, "Skeleton", "Struktur ridge sidik jari")
+            if latent_file is not None:
+                latent_image = decode_image(latent_file.getbuffer())
+                display_image(latent_image, "Sidik Jari Latent")
+                uploads['latent'] = (latent_file, latent_image, st.empty())
+        
+        # Referensi dan latent dianalisis bersamaan di executor bersama, sehingga waktu tunggu
+        # mendekati sidik jari yang paling lambat; progres tiap sidik jari tampil di kolomnya
+        analyses = {}
+        if uploads:
+            compare_cache = load_analysis_cache()
+            compare_client = load_service_client(SERVICE_URL) if SERVICE_URL else None
+            bars = {name: slot.progress(0.0, text="Menunggu analisis...")
+                    for name, (_, _, slot) in uploads.items()}
+            tasks = {
+                name: (lambda progress, upload=upload, image=image:
+                       run_analysis(image, upload.getbuffer(), upload.name, compare_cache, compare_client, progress))
+                for name, (upload, image, _) in uploads.items()
+            }
+            analysis_start = time.perf_counter()
+            for event in iter_concurrent(load_analysis_executor(), tasks):
+                upload, _, slot = uploads[event['name']]
+                if event['kind'] == 'progress':
+                    bars[event['name']].progress(event['done'] / event['total'],
+                                                 text=f"Analisis {event['stage']} ({event['done']}/{event['total']})")
+                elif isinstance(event['error'], LowQualityError):
+                    slot.error(f"{upload.name} ditolak: {event['error']}")
+                elif event['error'] is not None:
+                    raise event['error']
+                else:
+                    slot.caption(f"Dianalisis dalam {event['seconds'] * 1000:.0f} ms")
+                    analyses[event['name']] = event['result']
+            if len(uploads) == 2:
+                st.caption(f"Referensi dan latent dianalisis bersamaan dalam "
+                           f"{(time.perf_counter() - analysis_start) * 1000:.0f} ms")
+        
+        if 'ref' in analyses:
+            fp1_data = dict(analyses['ref'], image=ref_image, filename=ref_file.name)
+        if 'latent' in analyses:
+            fp2_data = dict(analyses['latent'], image=latent_image, filename=latent_file.name)
+        
+        # Lakukan perbandingan jika kedua sidik jari telah diunggah
+        if fp1_data is not None and fp2_data is not None:
+            st.markdown("<h3 class='sub-header'>Hasil Perbandingan</h3>", unsafe_allow_html=True)
             
-            with col_skel2:
-                plot_minutiae(enhanced, minutiae_points, "Titik Minutiae Terdeteksi")
-    
-    with col2:
-        if uploaded_file is not None:
-            st.markdown("<div class='result-box'>", unsafe_allow_html=True)
-            st.markdown("### 📊 Hasil Analisis")
+            with st.spinner("Membandingkan sidik jari..."):
+                if SERVICE_URL:
+                    comparison_result = load_service_client(SERVICE_URL).compare(fp1_data, fp2_data,
+                                                                                 analyzer.match_params)
+                else:
+                    comparison_result = staged_pipeline.compare(fp1_data, fp2_data)
             
-            # Metadata
-            st.markdown("#### Metadata")
-            st.json(metadata)
+            # Tampilkan hasil perbandingan
+            col_result1, col_result2 = st.columns([1, 2])
             
-            # Pola sidik jari
-            st.markdown("#### Pola Sidik Jari")
-            pattern_info = analyzer.finger_patterns.get(pattern, {})
+            with col_result1:
+                st.markdown("<div class='result-box'>", unsafe_allow_html=True)
+                st.markdown("### 📈 Skor Kecocokan")
+                
+                similarity_score = comparison_result['similarity_score']
+                match_level = comparison_result['match_level']
+                match_class = comparison_result['match_class']
+                
+                # Tampilkan skor dengan progress bar
+                st.markdown(f"### <span class='{match_class}'>{similarity_score:.1f}%</span>", 
+                           unsafe_allow_html=True)
+                st.progress(similarity_score / 100)
+                st.markdown(f"**Tingkat Kecocokan**: <span class='{match_class}'>{match_level}</span>", 
+                           unsafe_allow_html=True)
+                
+                st.markdown("---")
+                
+                # Detail perbandingan
+                st.markdown("#### Detail Analisis")
+                st.metric("Kesamaan Pola", f"{comparison_result['pattern_similarity']:.1f}%")
+                st.metric("Kesamaan Minutiae", f"{comparison_result['minutiae_similarity']:.1f}%")
+                st.metric("Minutiae yang Cocok", comparison_result['matched_minutiae_count'])
+                alignment = comparison_result.get('alignment')
+                if alignment:
+                    st.metric("Penyelarasan Latent", f"{np.rad2deg(alignment['theta']):+.1f}°",
+                              help="Rotasi latent terhadap referensi; pergeseran "
+                                   f"({alignment['dx']:+.0f}, {alignment['dy']:+.0f}) px, "
+                                   f"{alignment['inliers']} minutiae sejajar")
+
+                st.markdown("</div>", unsafe_allow_html=True)
             
-            col_pat1, col_pat2 = st.columns(2)
-            with col_pat1:
-                st.metric("Pola Terdeteksi", pattern)
-                st.metric("Tingkat Kepercayaan", f"{pattern_confidence*100:.1f}%")
+            with col_result2:
+                # Visualisasi perbandingan
+                st.markdown("### Visualisasi Perbandingan")
+                
+                # Baris 1: sidik jari referensi, baris 2: sidik jari latent
+                for label, fp_data in (("Referensi", fp1_data), ("Latent", fp2_data)):
+                    col_vis1, col_vis2, col_vis3 = st.columns(3)
+                    with col_vis1:
+                        display_image(fp_data['image'], f"{label}: {fp_data['filename']}")
+                    with col_vis2:
+                        display_image(fp_data['enhanced'], "Enhanced")
+                    with col_vis3:
+                        plot_minutiae(fp_data['enhanced'], fp_data['minutiae_array'],
+                                      f"Minutiae: {len(fp_data['minutiae'])} titik",
+                                      fp_data['preview_scale'], limit=50)
             
-            with col_pat2:
-                st.metric("Tangan Diprediksi", hand)
-                st.metric("Tingkat Kepercayaan", f"{hand_confidence*100:.1f}%")
+            # Analisis forensik
+            st.markdown("<h3 class='sub-header'>Analisis Forensik</h3>", unsafe_allow_html=True)
             
-            if pattern_info:
-                st.info(f"**Deskripsi**: {pattern_info.get('description', 'Tidak diketahui')}")
+            col_forensic1, col_forensic2, col_forensic3 = st.columns(3)
             
-            # Prediksi jari
-            st.markdown("#### Prediksi Jari")
-            st.metric("Jari Diprediksi", predicted_finger)
-            st.metric("Tingkat Kepercayaan", f"{finger_confidence*100:.1f}%")
+            with col_forensic1:
+                st.markdown("##### Pola Sidik Jari")
+                pattern_match = fp1_data['pattern'] == fp2_data['pattern']
+                st.metric("Pola Referensi", fp1_data['pattern'])
+                st.metric("Pola Latent", fp2_data['pattern'])
+                st.metric("Kecocokan Pola", "Ya" if pattern_match else "Tidak")
             
-            # Probabilitas jari
-            st.markdown("##### Probabilitas per Jari")
-            finger_df = pd.DataFrame(list(finger_probs.items()), 
-                                   columns=['Jari', 'Probabilitas'])
-            finger_df['Probabilitas'] = (finger_df['Probabilitas'] * 100).round(1)
-            st.dataframe(finger_df.style.highlight_max(axis=0))
+            with col_forensic2:
+                st.markdown("##### Analisis Tangan")
+                hand_match = fp1_data['hand'] == fp2_data['hand']
+                st.metric("Tangan Referensi", fp1_data['hand'])
+                st.metric("Tangan Latent", fp2_data['hand'])
+                st.metric("Kecocokan Tangan", "Ya" if hand_match else "Tidak")
             
-            # Minutiae
-            st.markdown("#### Analisis Minutiae")
-            minutiae_types = {}
-            for m in minutiae_points:
-                minutiae_types[m['type']] = minutiae_types.get(m['type'], 0) + 1
+            with col_forensic3:
+                st.markdown("##### Statistik Minutiae")
+                minutiae_diff = abs(len(fp1_data['minutiae']) - len(fp2_data['minutiae']))
+                st.metric("Minutiae Referensi", len(fp1_data['minutiae']))
+                st.metric("Minutiae Latent", len(fp2_data['minutiae']))
+                st.metric("Perbedaan Jumlah", minutiae_diff)
             
-            for m_type, count in minutiae_types.items():
-                st.metric(f"Jumlah {m_type.replace('_', ' ').title()}", count)
+            # Kesimpulan forensik
+            st.markdown("<div class='result-box'>", unsafe_allow_html=True)
+            st.markdown("### 🎯 Kesimpulan Forensik")
             
-            st.metric("Total Minutiae", len(minutiae_points))
+            if match_level == "TINGGI":
+                st.success("**KESIMPULAN**: Tingkat kemiripan SANGAT TINGGI. Sidik jari referensi dan latent kemungkinan berasal dari sumber yang sama.")
+                st.info("**REKOMENDASI**: Hasil ini dapat digunakan sebagai bukti pendukung dalam penyelidikan forensik.")
+            elif match_level == "SEDANG":
+                st.warning("**KESIMPULAN**: Tingkat kemiripan SEDANG. Diperlukan analisis lebih lanjut oleh ahli daktiloskopi.")
+                st.info("**REKOMENDASI**: Lakukan verifikasi manual dan pertimbangkan faktor kualitas gambar.")
+            else:
+                st.error("**KESIMPULAN**: Tingkat kemiripan RENDAH. Sidik jari referensi dan latent kemungkinan berasal dari sumber yang berbeda.")
+                st.info("**REKOMENDASI**: Periksa kualitas gambar atau carilah referensi sidik jari lain.")
             
             st.markdown("</div>", unsafe_allow_html=True)
 
-# Mode perbandingan dua sidik jari
-else:
-    st.markdown("<h2 class='sub-header'>Perbandingan Dua Sidik Jari</h2>", unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class='info-box'>
-        <strong>Instruksi:</strong><br>
-        1. Unggah sidik jari referensi (database)<br>
-        2. Unggah sidik jari latent (TKP)<br>
-        3. Sistem akan membandingkan dan menganalisis kesamaan
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col_upload1, col_upload2 = st.columns(2)
-    
-    fp1_data = None
-    fp2_data = None
-    
-    with col_upload1:
-        st.markdown("### Sidik Jari Referensi")
-        ref_file = st.file_uploader(
-            "Unggah sidik jari referensi", 
+    # Mode perbandingan satu latent terhadap daftar pendek referensi
+    elif analysis_mode == "Perbandingan Satu Latent dengan Banyak Referensi":
+        st.markdown("<h2 class='sub-header'>Perbandingan Satu Latent dengan Banyak Referensi</h2>",
+                    unsafe_allow_html=True)
+
+        st.markdown("""
+        <div class='info-box'>
+            <strong>Instruksi:</strong><br>
+            1. Unggah sidik jari latent (TKP)<br>
+            2. Unggah daftar pendek referensi: gambar sidik jari dan/atau template <code>.fpt</code><br>
+            3. Minutiae latent diekstrak sekali, lalu setiap referensi dinilai paralel dan diurutkan
+        </div>
+        """, unsafe_allow_html=True)
+
+        col_latent, col_refs = st.columns([1, 2])
+        with col_latent:
+            many_latent_file = st.file_uploader(
+                "Unggah sidik jari latent",
+                type=['jpg', 'jpeg', 'png', 'bmp', 'tiff'],
+                key="many_latent"
+            )
+        with col_refs:
+            reference_files = st.file_uploader(
+                "Unggah sidik jari referensi",
+                type=['jpg', 'jpeg', 'png', 'bmp', 'tiff', 'fpt'],
+                accept_multiple_files=True,
+                key="many_refs"
+            )
+            compare_workers = st.slider(
+                "Jumlah proses pencocokan", 1, max(os.cpu_count() or 1, 2), os.cpu_count() or 1,
+                help="Template referensi ditulis ke satu file koleksi yang di-memory-map oleh setiap proses"
+            )
+
+        many_latent = None
+        if many_latent_file is not None:
+            many_latent_image = decode_image(many_latent_file.getbuffer())
+            with col_latent:
+                display_image(many_latent_image, "Sidik Jari Latent")
+                with st.spinner("Menganalisis sidik jari latent..."):
+                    many_latent = analyze_or_reject(many_latent_image, many_latent_file.getbuffer(),
+                                                    many_latent_file.name)
+
+        if many_latent is not None and reference_files:
+            ref_cache = load_analysis_cache()
+            ref_client = load_service_client(SERVICE_URL) if SERVICE_URL else None
+            # Template .fpt dipakai apa adanya; gambar dianalisis dengan decode bertumpuk dan ikut cache analisis
+            references = [bytes(f.getbuffer()) if f.name.lower().endswith('.fpt') else None
+                          for f in reference_files]
+            image_indices = [i for i, reference in enumerate(references) if reference is None]
+            if image_indices:
+                ref_progress = st.progress(0.0, text=f"Analisis referensi 0 / {len(image_indices)}")
+                finished = iter_pipelined(
+                    image_indices,
+                    lambda i: decode_image(reference_files[i].getbuffer()),
+                    lambda i, image: run_analysis(image, reference_files[i].getbuffer(), reference_files[i].name,
+                                                  ref_cache, ref_client)
+                )
+                for done, item in enumerate(finished, start=1):
+                    ref_index = image_indices[item['index']]
+                    if item['error'] is not None:
+                        st.warning(f"Dilewati — {reference_files[ref_index].name}: {item['error']}")
+                    else:
+                        references[ref_index] = dict(item['result'], image_dimensions=item['image'].shape)
+                    ref_progress.progress(done / len(image_indices),
+                                          text=f"Analisis referensi {done} / {len(image_indices)}")
+                ref_progress.empty()
+
+            ranked_indices = [i for i, reference in enumerate(references) if reference is not None]
+            if ranked_indices:
+                # Peringkat di-cache per latent, daftar referensi, parameter, dan jumlah proses
+                ranking_key = stage_key(
+                    'ranking',
+                    [cache_key(many_latent_image, analyzer.params)]
+                    + [hashlib.sha256(reference_files[i].getbuffer()).hexdigest() for i in ranked_indices],
+                    dict(analyzer.params, workers=compare_workers, **analyzer.match_params)
+                )
+
+                def rank_references():
+                    with tempfile.TemporaryDirectory() as workdir:
+                        collection_path = write_reference_collection(
+                            os.path.join(workdir, 'referensi.fpc'),
+                            [references[i] for i in ranked_indices],
+                            analyzer.minutiae_types
+                        )
+                        return compare_many(analyzer, many_latent, collection_path,
+                                            [reference_files[i].name for i in ranked_indices], compare_workers)
+
+                with st.spinner(f"Membandingkan latent dengan {len(ranked_indices)} referensi..."):
+                    ranking = ref_cache.get_or_compute(ranking_key, rank_references)
+
+                st.markdown("<h3 class='sub-header'>Peringkat Referensi</h3>", unsafe_allow_html=True)
+                st.caption(f"{ranking['candidates']} referensi dibandingkan dalam "
+                           f"{ranking['elapsed_seconds']*1000:.0f} ms dengan {ranking['workers']} proses "
+                           f"(latent: pola {many_latent['pattern']}, {len(many_latent['minutiae_array'])} minutiae)")
+
+                best = ranking['results'][0]
+                col_best, col_score, col_level = st.columns(3)
+                col_best.metric("Referensi Teratas", best['label'])
+                col_score.metric("Skor Kecocokan", f"{best['similarity_score']:.1f}%")
+                col_level.metric("Tingkat Kecocokan", best['match_level'])
+
+                st.dataframe(pd.DataFrame([{
+                    'Peringkat': rank,
+                    'Referensi': result['label'],
+                    'Skor (%)': result['similarity_score'],
+                    'Tingkat': result['match_level'],
+                    'Minutiae Cocok': result['matched_minutiae_count'],
+                    'Minutiae Referensi': result['minutiae_count'],
+                    'Pola': result['pattern'],
+                    'Tangan': result['hand']
+                } for rank, result in enumerate(ranking['results'], start=1)]).round(1), hide_index=True)
+
+    # Mode analisis banyak sidik jari sekaligus (mis. kartu sepuluh jari)
+    elif analysis_mode == "Analisis Banyak Sidik Jari (Kartu Sepuluh Jari)":
+        st.markdown("<h2 class='sub-header'>Analisis Banyak Sidik Jari</h2>", unsafe_allow_html=True)
+
+        st.markdown("""
+        <div class='info-box'>
+            <strong>Instruksi:</strong><br>
+            1. Unggah beberapa gambar sidik jari sekaligus (mis. sepuluh jari dari satu kartu)<br>
+            2. Gambar berikutnya di-decode selagi gambar sebelumnya dianalisis<br>
+            3. Hasil setiap jari ditampilkan begitu analisisnya selesai
+        </div>
+        """, unsafe_allow_html=True)
+
+        batch_files = st.file_uploader(
+            "Unggah gambar sidik jari",
             type=['jpg', 'jpeg', 'png', 'bmp', 'tiff'],
-            key="ref"
+            accept_multiple_files=True,
+            key="batch"
         )
-        
-        if ref_file is not None:
-            ref_bytes = np.asarray(bytearray(ref_file.read()), dtype=np.uint8)
-            ref_image = cv2.imdecode(ref_bytes, cv2.IMREAD_COLOR)
-            display_image(ref_image, "Sidik Jari Referensi")
-            
-            # Analisis sidik jari referensi
-            with st.spinner("Menganalisis sidik jari referensi..."):
-                gray_ref, enhanced_ref, binary_ref = analyzer.preprocess_image(ref_image)
-                minutiae_ref, skeleton_ref = analyzer.extract_minutiae(binary_ref)
-                pattern_ref, conf_ref, hand_ref, hand_conf_ref = analyzer.analyze_pattern(binary_ref)
-                
-                fp1_data = {
-                    'image': ref_image,
-                    'gray': gray_ref,
-                    'enhanced': enhanced_ref,
-                    'binary': binary_ref,
-                    'minutiae': minutiae_ref,
-                    'skeleton': skeleton_ref,
-                    'pattern': pattern_ref,
-                    'pattern_confidence': conf_ref,
-                    'hand': hand_ref,
-                    'hand_confidence': hand_conf_ref,
-                    'minutiae_count': len(minutiae_ref),
-                    'filename': ref_file.name
+        analysis_workers = st.slider(
+            "Jumlah thread analisis", 1, 4, 1,
+            help="Decode selalu berjalan paralel dengan analisis; thread tambahan menganalisis "
+                 "beberapa gambar sekaligus"
+        )
+
+        if batch_files:
+            batch_cache = load_analysis_cache()
+            batch_client = load_service_client(SERVICE_URL) if SERVICE_URL else None
+            batch_buffers = [f.getbuffer() for f in batch_files]
+
+            progress = st.progress(0.0, text=f"0 / {len(batch_files)} selesai")
+            metrics_slot = st.empty()
+
+            # Slot hasil disiapkan sesuai urutan unggah dan diisi sesuai urutan selesai
+            batch_columns = st.columns(2)
+            slots = [batch_columns[i % 2].empty() for i in range(len(batch_files))]
+            for slot, batch_file in zip(slots, batch_files):
+                slot.info(f"⏳ {batch_file.name}: menunggu analisis")
+
+            batch_rows = [None] * len(batch_files)
+            first_result_ms = None
+            batch_start = time.perf_counter()
+
+            finished = iter_pipelined(
+                range(len(batch_files)),
+                lambda i: decode_image(batch_buffers[i]),
+                lambda i, image: run_analysis(image, batch_buffers[i], batch_files[i].name,
+                                              batch_cache, batch_client),
+                analysis_workers=analysis_workers
+            )
+            for done, item in enumerate(finished, start=1):
+                index = item['index']
+                batch_file = batch_files[index]
+                analysis = item['result']
+
+                with slots[index].container(border=True):
+                    if item['error'] is not None:
+                        st.error(f"{batch_file.name}: {item['error']}")
+                    else:
+                        plot_minutiae(analysis['enhanced'], analysis['minutiae_array'], batch_file.name,
+                                      analysis['preview_scale'], limit=50)
+                        st.caption(f"Pola **{analysis['pattern']}** ({analysis['pattern_confidence']*100:.0f}%) · "
+                                   f"tangan {analysis['hand']} · {analysis['predicted_finger']} · "
+                                   f"{len(analysis['minutiae_array'])} minutiae")
+
+                batch_rows[index] = {
+                    'Berkas': batch_file.name,
+                    'Pola': analysis['pattern'] if analysis else '-',
+                    'Tangan': analysis['hand'] if analysis else '-',
+                    'Jari': analysis['predicted_finger'] if analysis else '-',
+                    'Minutiae': len(analysis['minutiae_array']) if analysis else 0,
+                    'Decode (ms)': item['decode_seconds'] * 1000,
+                    'Analisis (ms)': item['analyze_seconds'] * 1000,
+                    'Status': 'OK' if item['error'] is None else str(item['error'])
                 }
-    
-    with col_upload2:
-        st.markdown("### Sidik Jari Latent (TKP)")
-        latent_file = st.file_uploader(
-            "Unggah sidik jari latent", 
-            type=['jpg', 'jpeg', 'png', 'bmp', 'tiff'],
-            key="latent"
+
+                elapsed_ms = (time.perf_counter() - batch_start) * 1000
+                if first_result_ms is None:
+                    first_result_ms = elapsed_ms
+                progress.progress(done / len(batch_files), text=f"{done} / {len(batch_files)} selesai")
+
+                with metrics_slot.container():
+                    col_first, col_total, col_rate = st.columns(3)
+                    col_first.metric("Hasil Pertama", f"{first_result_ms:.0f} ms")
+                    col_total.metric("Waktu Berjalan", f"{elapsed_ms:.0f} ms")
+                    col_rate.metric("Rata-rata per Gambar", f"{elapsed_ms / done:.0f} ms")
+
+            st.markdown("<h3 class='sub-header'>Ringkasan</h3>", unsafe_allow_html=True)
+            st.dataframe(pd.DataFrame(batch_rows).round(1), hide_index=True)
+
+    # Mode perekaman langsung: skor kualitas murah per frame, analisis penuh hanya untuk frame terbaik
+    elif analysis_mode == "Perekaman Langsung (Live Capture)":
+        st.markdown("<h2 class='sub-header'>Perekaman Langsung</h2>", unsafe_allow_html=True)
+
+        st.markdown("""
+        <div class='info-box'>
+            <strong>Instruksi:</strong><br>
+            1. Pilih sumber frame: rekaman video scanner, folder keluaran scanner, atau kamera<br>
+            2. Setiap frame dinilai cepat (coverage, kontras, fokus) tanpa menjalankan pipeline<br>
+            3. Hanya frame terbaik di setiap jendela yang dianalisis penuh
+        </div>
+        """, unsafe_allow_html=True)
+
+        capture_type = st.radio("Sumber frame", ["File video rekaman", "Folder yang dipantau", "Kamera"],
+                                horizontal=True)
+        video_file = None
+        capture_source = None
+        if capture_type == "File video rekaman":
+            video_file = st.file_uploader("Unggah rekaman video scanner", type=['mp4', 'avi', 'mov', 'mkv'],
+                                          key="capture_video")
+        elif capture_type == "Folder yang dipantau":
+            watch_dir = st.text_input("Folder keluaran scanner",
+                                      help=f"Gambar baru dibaca sesuai urutan waktu; perekaman berhenti setelah "
+                                           f"{CAPTURE_IDLE_SECONDS} detik tanpa gambar baru")
+            if watch_dir and os.path.isdir(watch_dir):
+                capture_source = watch_dir
+            elif watch_dir:
+                st.warning(f"Folder tidak ditemukan: {watch_dir}")
+        else:
+            capture_source = int(st.number_input("Indeks kamera", 0, 9, 0))
+
+        col_window, col_min_quality, col_max_frames = st.columns(3)
+        capture_window = col_window.slider("Jendela pemilihan (frame)", 3, 60, WINDOW)
+        capture_min_quality = col_min_quality.slider("Skor frame minimum", 0.0, 1.0, MIN_FRAME_QUALITY, step=0.05,
+                                                     help="Frame terbaik jendela di bawah skor ini tidak dianalisis")
+        capture_max_frames = col_max_frames.number_input(
+            "Frame maksimum (0 = sampai aliran habis)", 0, 100000, 300 if capture_type == "Kamera" else 0
         )
+
+        if (video_file is not None or capture_source is not None) and st.button("Mulai perekaman", type="primary"):
+            col_live, col_best = st.columns(2)
+            with col_live:
+                st.markdown("### Frame Langsung")
+                live_view = st.empty()
+                live_caption = st.empty()
+            with col_best:
+                st.markdown("### Frame Terbaik (Dianalisis)")
+                best_view = st.empty()
+                best_caption = st.empty()
+            capture_status = st.empty()
+
+            capture_rows = []
+            best_event = None
+            frames_seen = 0
+            fps = 0.0
+            last_paint = 0.0
+            # cv2.VideoCapture membutuhkan path, jadi rekaman unggahan ditulis ke folder sementara
+            with tempfile.TemporaryDirectory() as workdir:
+                if video_file is not None:
+                    capture_source = os.path.join(workdir, os.path.basename(video_file.name))
+                    with open(capture_source, 'wb') as handle:
+                        handle.write(video_file.getbuffer())
+                try:
+                    frames = open_source(capture_source, idle_timeout=CAPTURE_IDLE_SECONDS)
+                    if capture_max_frames:
+                        frames = itertools.islice(frames, int(capture_max_frames))
+                    for event in iter_capture(frames, analyzer.analyze_image, capture_window,
+                                              min_quality=capture_min_quality, executor=load_analysis_executor()):
+                        fps = event['fps']
+                        quality = event['quality']
+                        if event['kind'] == 'frame':
+                            frames_seen += 1
+                            # Layar diperbarui paling sering setiap CAPTURE_PAINT_INTERVAL agar tidak menahan laju frame
+                            if time.perf_counter() - last_paint >= CAPTURE_PAINT_INTERVAL:
+                                with stage('render'):
+                                    preview, _ = to_display(event['image'])
+                                    live_view.image(preview, width='stretch')
+                                live_caption.caption(
+                                    f"Frame {event['index']} · skor {quality['score']:.2f} (coverage "
+                                    f"{quality['coverage']:.2f}, kontras {quality['contrast']:.2f}, fokus "
+                                    f"{quality['focus']:.0f}) · {fps:.1f} frame/detik"
+                                )
+                                last_paint = time.perf_counter()
+                        elif event['kind'] == 'analysis':
+                            result = event['result']
+                            capture_rows.append({
+                                'Frame': event['index'],
+                                'Skor Frame': quality['score'],
+                                'Coverage': quality['coverage'],
+                                'Kontras': quality['contrast'],
+                                'Fokus': quality['focus'],
+                                'Pola': result['pattern'] if result else '-',
+                                'Minutiae': len(result['minutiae_array']) if result else 0,
+                                'Kualitas Analisis': result['quality_score'] if result else 0.0,
+                                'Analisis (ms)': event['seconds'] * 1000,
+                                'Status': 'OK' if event['error'] is None else str(event['error'])
+                            })
+                            if event['error'] is not None and not isinstance(event['error'], LowQualityError):
+                                raise event['error']
+                            if result is not None and (best_event is None
+                                                       or quality['score'] > best_event['quality']['score']):
+                                best_event = event
+                                with best_view.container():
+                                    plot_minutiae(result['enhanced'], result['minutiae_array'],
+                                                  f"Frame {event['index']}", result['preview_scale'], limit=50)
+                                best_caption.caption(
+                                    f"Skor frame {quality['score']:.2f} · pola **{result['pattern']}** "
+                                    f"({result['pattern_confidence']*100:.0f}%) · {len(result['minutiae_array'])} "
+                                    f"minutiae · analisis {event['seconds'] * 1000:.0f} ms"
+                                )
+                        capture_status.caption(f"{frames_seen} frame dinilai · {len(capture_rows)} dianalisis · "
+                                               f"{fps:.1f} frame/detik berkelanjutan")
+                except ValueError as exc:
+                    st.error(f"Sumber frame tidak dapat dibuka: {exc}")
+
+            if frames_seen:
+                col_frames, col_fps, col_analyzed = st.columns(3)
+                col_frames.metric("Frame Dinilai", frames_seen)
+                col_fps.metric("Frame per Detik", f"{fps:.1f}")
+                col_analyzed.metric("Frame Dianalisis", len(capture_rows))
+            if capture_rows:
+                st.dataframe(pd.DataFrame(capture_rows).round(2), hide_index=True)
+            elif frames_seen:
+                st.warning("Tidak ada frame yang mencapai skor minimum; turunkan ambang atau periksa penempatan jari.")
+
+    # Mode identifikasi 1:N terhadap galeri
+    else:
+        st.markdown("<h2 class='sub-header'>Identifikasi 1:N terhadap Galeri</h2>", unsafe_allow_html=True)
         
-        if latent_file is not None:
-            latent_bytes = np.asarray(bytearray(latent_file.read()), dtype=np.uint8)
-            latent_image = cv2.imdecode(latent_bytes, cv2.IMREAD_COLOR)
-            display_image(latent_image, "Sidik Jari Latent")
-            
-            # Analisis sidik jari latent
-            with st.spinner("Menganalisis sidik jari latent..."):
-                gray_latent, enhanced_latent, binary_latent = analyzer.preprocess_image(latent_image)
-                minutiae_latent, skeleton_latent = analyzer.extract_minutiae(binary_latent)
-                pattern_latent, conf_latent, hand_latent, hand_conf_latent = analyzer.analyze_pattern(binary_latent)
-                
-                fp2_data = {
-                    'image': latent_image,
-                    'gray': gray_latent,
-                    'enhanced': enhanced_latent,
-                    'binary': binary_latent,
-                    'minutiae': minutiae_latent,
-                    'skeleton': skeleton_latent,
-                    'pattern': pattern_latent,
-                    'pattern_confidence': conf_latent,
-                    'hand': hand_latent,
-                    'hand_confidence': hand_conf_latent,
-                    'minutiae_count': len(minutiae_latent),
-                    'filename': latent_file.name
-                }
-    
-    # Lakukan perbandingan jika kedua sidik jari telah diunggah
-    if fp1_data is not None and fp2_data is not None:
-        st.markdown("<h3 class='sub-header'>Hasil Perbandingan</h3>", unsafe_allow_html=True)
+        st.markdown("""
+        <div class='info-box'>
+            <strong>Instruksi:</strong><br>
+            1. Daftarkan sidik jari referensi ke galeri<br>
+            2. Unggah sidik jari latent (TKP) untuk dicari di galeri<br>
+            3. Sistem menampilkan peringkat kandidat dengan kecocokan tertinggi
+        </div>
+        """, unsafe_allow_html=True)
         
-        with st.spinner("Membandingkan sidik jari..."):
-            comparison_result = analyzer.compare_fingerprints(fp1_data, fp2_data)
+        gallery = load_gallery(GALLERY_DIR)
+        st.metric("Sidik Jari Terdaftar", len(gallery))
         
-        # Tampilkan hasil perbandingan
-        col_result1, col_result2 = st.columns([1, 2])
+        col_enroll, col_search = st.columns(2)
+        search_results = None
+        cascade_stages = None
         
-        with col_result1:
-            st.markdown("<div class='result-box'>", unsafe_allow_html=True)
-            st.markdown("### 📈 Skor Kecocokan")
-            
-            similarity_score = comparison_result['similarity_score']
-            match_level = comparison_result['match_level']
-            match_class = comparison_result['match_class']
-            
-            # Tampilkan skor dengan progress bar
-            st.markdown(f"### <span class='{match_class}'>{similarity_score:.1f}%</span>", 
-                       unsafe_allow_html=True)
-            st.progress(similarity_score / 100)
-            st.markdown(f"**Tingkat Kecocokan**: <span class='{match_class}'>{match_level}</span>", 
-                       unsafe_allow_html=True)
+        with col_enroll:
+            st.markdown("### Pendaftaran Galeri")
+            enroll_file = st.file_uploader(
+                "Unggah sidik jari referensi", 
+                type=['jpg', 'jpeg', 'png', 'bmp', 'tiff'],
+                key="enroll"
+            )
+            enroll_label = st.text_input("Label / identitas pemilik sidik jari")
             
-            st.markdown("---")
-            
-            # Detail perbandingan
-            st.markdown("#### Detail Analisis")
-            st.metric("Kesamaan Pola", f"{comparison_result['pattern_similarity']:.1f}%")
-            st.metric("Kesamaan Minutiae", f"{comparison_result['minutiae_similarity']:.1f}%")
-            st.metric("Minutiae yang Cocok", comparison_result['matched_minutiae_count'])
-            
-            st.markdown("</div>", unsafe_allow_html=True)
+            if enroll_file is not None and st.button("Daftarkan ke Galeri"):
+                enroll_image = decode_image(enroll_file.getbuffer())
+                
+                with st.spinner("Menganalisis dan mendaftarkan sidik jari..."):
+                    enroll_analysis = analyze_or_reject(enroll_image, enroll_file.getbuffer(), enroll_file.name)
+                    if enroll_analysis is not None:
+                        template_id = gallery.enroll(
+                            enroll_label or enroll_file.name,
+                            enroll_analysis['minutiae_array'],
+                            enroll_analysis['pattern'],
+                            enroll_analysis['hand'],
+                            {'filename': enroll_file.name, 'image_dimensions': enroll_image.shape,
+                             'quality_score': enroll_analysis['quality_score']}
+                        )
+                        gallery.save()
+                
+                if enroll_analysis is not None:
+                    st.success(f"Terdaftar dengan ID {template_id}: {len(enroll_analysis['minutiae_array'])} minutiae, "
+                               f"pola {enroll_analysis['pattern']}")
         
-        with col_result2:
-            # Visualisasi perbandingan
-            st.markdown("### Visualisasi Perbandingan")
-            
-            # Gabungkan kedua gambar untuk perbandingan visual
-            fig, axes = plt.subplots(2, 3, figsize=(12, 8))
-            
-            # Baris 1: Sidik jari referensi
-            axes[0, 0].imshow(cv2.cvtColor(fp1_data['image'], cv2.COLOR_BGR2RGB))
-            axes[0, 0].set_title(f"Referensi: {fp1_data['filename']}")
-            axes[0, 0].axis('off')
+        with col_search:
+            st.markdown("### Pencarian Sidik Jari Latent")
+            search_file = st.file_uploader(
+                "Unggah sidik jari latent", 
+                type=['jpg', 'jpeg', 'png', 'bmp', 'tiff'],
+                key="search"
+            )
+            top_k = st.slider("Jumlah kandidat teratas", 1, 50, 10)
+            search_method = st.radio(
+                "Metode pencarian",
+                ["Indeks hash minutiae", "Bertingkat (pola, tangan, jumlah minutiae)"],
+                help="Metode bertingkat menolak kandidat dengan pola, tangan, atau jumlah minutiae "
+                     "yang jauh berbeda sebelum pencocokan minutiae penuh"
+            )
+            filter_pattern = st.checkbox("Saring kandidat berdasarkan kelas pola", value=True,
+                                         disabled=search_method != "Indeks hash minutiae")
             
-            axes[0, 1].imshow(fp1_data['enhanced'], cmap='gray')
-            axes[0, 1].set_title("Enhanced")
-            axes[0, 1].axis('off')
-            
-            # Plot minutiae referensi
-            axes[0, 2].imshow(fp1_data['enhanced'], cmap='gray')
-            for m in fp1_data['minutiae'][:50]:
-                color = 'red' if m['type'] == 'ridge_ending' else 'green'
-                axes[0, 2].plot(m['x'], m['y'], 'o', markersize=4, color=color)
-            axes[0, 2].set_title(f"Minutiae: {len(fp1_data['minutiae'])} titik")
-            axes[0, 2].axis('off')
-            
-            # Baris 2: Sidik jari latent
-            axes[1, 0].imshow(cv2.cvtColor(fp2_data['image'], cv2.COLOR_BGR2RGB))
-            axes[1, 0].set_title(f"Latent: {fp2_data['filename']}")
-            axes[1, 0].axis('off')
-            
-            axes[1, 1].imshow(fp2_data['enhanced'], cmap='gray')
-            axes[1, 1].set_title("Enhanced")
-            axes[1, 1].axis('off')
+            if search_file is not None and len(gallery) > 0:
+                search_image = decode_image(search_file.getbuffer())
+                display_image(search_image, "Sidik Jari Latent")
+                
+                with st.spinner("Mencari di galeri..."):
+                    search_analysis = analyze_or_reject(search_image, search_file.getbuffer(), search_file.name)
+                if search_analysis is not None:
+                    minutiae_search = search_analysis['minutiae_array']
+                    pattern_search = search_analysis['pattern']
+                    pattern_conf_search = search_analysis['pattern_confidence']
+                    hand_search, hand_conf_search = search_analysis['hand'], search_analysis['hand_confidence']
+                    
+                    query_data = {'minutiae': minutiae_search, 'pattern': pattern_search}
+                    
+                    # Skor penuh hanya untuk kandidat yang lolos indeks
+                    def score_candidate(record, template):
+                        candidate_data = {'minutiae': template, 'pattern': record['pattern']}
+                        return analyzer.compare_fingerprints(query_data, candidate_data)['similarity_score']
+                    
+                    search_start = time.perf_counter()
+                    if search_method == "Indeks hash minutiae":
+                        search_results = gallery.search(
+                            minutiae_search,
+                            pattern_search if filter_pattern else None,
+                            top_k=top_k,
+                            scorer=score_candidate
+                        )
+                    else:
+                        cascade = cascade_search(
+                            analyzer,
+                            dict(query_data, pattern_confidence=pattern_conf_search,
+                                 hand=hand_search, hand_confidence=hand_conf_search),
+                            CandidateSet.from_gallery(gallery),
+                            top_k=top_k
+                        )
+                        cascade_stages = cascade['stages']
+                        search_results = [{
+                            'id': result['index'],
+                            'label': result['label'],
+                            'pattern': gallery.records[result['index']]['pattern'],
+                            'hand': gallery.records[result['index']]['hand'],
+                            'minutiae_count': gallery.records[result['index']]['count'],
+                            'similarity_score': result['similarity_score']
+                        } for result in cascade['results']]
+                    search_time = time.perf_counter() - search_start
+            elif search_file is not None:
+                st.warning("Galeri masih kosong. Daftarkan sidik jari referensi terlebih dahulu.")
+        
+        if search_results is not None:
+            st.markdown("<h3 class='sub-header'>Peringkat Kandidat</h3>", unsafe_allow_html=True)
+            st.caption(f"Pencarian {len(gallery)} sidik jari selesai dalam {search_time*1000:.0f} ms "
+                       f"(pola latent: {pattern_search}, {len(minutiae_search)} minutiae)")
             
-            # Plot minutiae latent
-            axes[1, 2].imshow(fp2_data['enhanced'], cmap='gray')
-            for m in fp2_data['minutiae'][:50]:
-                color = 'red' if m['type'] == 'ridge_ending' else 'green'
-                axes[1, 2].plot(m['x'], m['y'], 'o', markersize=4, color=color)
-            axes[1, 2].set_title(f"Minutiae: {len(fp2_data['minutiae'])} titik")
-            axes[1, 2].axis('off')
+            if search_results:
+                results_df = pd.DataFrame(search_results).rename(columns={
+                    'id': 'ID',
+                    'label': 'Label',
+                    'pattern': 'Pola',
+                    'hand': 'Tangan',
+                    'minutiae_count': 'Jumlah Minutiae',
+                    'index_votes': 'Suara Indeks',
+                    'similarity_score': 'Skor Kecocokan (%)'
+                })
+                results_df['Skor Kecocokan (%)'] = results_df['Skor Kecocokan (%)'].round(1)
+                results_df.insert(0, 'Peringkat', range(1, len(results_df) + 1))
+                st.dataframe(results_df, hide_index=True)
+            else:
+                st.info("Tidak ada kandidat yang lolos penyaringan indeks.")
             
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close()
-        
-        # Analisis forensik
-        st.markdown("<h3 class='sub-header'>Analisis Forensik</h3>", unsafe_allow_html=True)
-        
-        col_forensic1, col_forensic2, col_forensic3 = st.columns(3)
-        
-        with col_forensic1:
-            st.markdown("##### Pola Sidik Jari")
-            pattern_match = fp1_data['pattern'] == fp2_data['pattern']
-            st.metric("Pola Referensi", fp1_data['pattern'])
-            st.metric("Pola Latent", fp2_data['pattern'])
-            st.metric("Kecocokan Pola", "Ya" if pattern_match else "Tidak")
-        
-        with col_forensic2:
-            st.markdown("##### Analisis Tangan")
-            hand_match = fp1_data['hand'] == fp2_data['hand']
-            st.metric("Tangan Referensi", fp1_data['hand'])
-            st.metric("Tangan Latent", fp2_data['hand'])
-            st.metric("Kecocokan Tangan", "Ya" if hand_match else "Tidak")
-        
-        with col_forensic3:
-            st.markdown("##### Statistik Minutiae")
-            minutiae_diff = abs(len(fp1_data['minutiae']) - len(fp2_data['minutiae']))
-            st.metric("Minutiae Referensi", len(fp1_data['minutiae']))
-            st.metric("Minutiae Latent", len(fp2_data['minutiae']))
-            st.metric("Perbedaan Jumlah", minutiae_diff)
-        
-        # Kesimpulan forensik
-        st.markdown("<div class='result-box'>", unsafe_allow_html=True)
-        st.markdown("### 🎯 Kesimpulan Forensik")
-        
-        if similarity_score > 70:
-            st.success("**KESIMPULAN**: Tingkat kemiripan SANGAT TINGGI. Sidik jari referensi dan latent kemungkinan berasal dari sumber yang sama.")
-            st.info("**REKOMENDASI**: Hasil ini dapat digunakan sebagai bukti pendukung dalam penyelidikan forensik.")
-        elif similarity_score > 40:
-            st.warning("**KESIMPULAN**: Tingkat kemiripan SEDANG. Diperlukan analisis lebih lanjut oleh ahli daktiloskopi.")
-            st.info("**REKOMENDASI**: Lakukan verifikasi manual dan pertimbangkan faktor kualitas gambar.")
-        else:
-            st.error("**KESIMPULAN**: Tingkat kemiripan RENDAH. Sidik jari referensi dan latent kemungkinan berasal dari sumber yang berbeda.")
-            st.info("**REKOMENDASI**: Periksa kualitas gambar atau carilah referensi sidik jari lain.")
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+            if cascade_stages is not None:
+                stages_df = pd.DataFrame(cascade_stages)
+                stages_df['seconds'] = stages_df['seconds'] * 1000
+                st.dataframe(stages_df.rename(columns={
+                    'stage': 'Tahap',
+                    'active': 'Aktif',
+                    'input': 'Masuk',
+                    'eliminated': 'Dieliminasi',
+                    'remaining': 'Tersisa',
+                    'seconds': 'Waktu (ms)'
+                }).round(2), hide_index=True)
+
+# Panel waktu proses per tahap untuk rerun ini
+if page_profile.stages:
+    with st.expander(f"⏱️ Waktu Proses per Tahap ({page_profile.wall_ms:.0f} ms total)"):
+        timing_df = pd.DataFrame(page_profile.stages).rename(columns={
+            'stage': 'Tahap',
+            'wall_ms': 'Wall (ms)',
+            'cpu_ms': 'CPU (ms)',
+            'peak_bytes': 'Puncak Alokasi (MB)',
+            'calls': 'Panggilan'
+        })
+        timing_df['Puncak Alokasi (MB)'] = timing_df['Puncak Alokasi (MB)'].astype(float) / 1024**2
+        st.dataframe(timing_df.round(2), hide_index=True)
+        if not PROFILE_MEMORY:
+            st.caption("Set FINGERPRINT_PROFILE_MEMORY=1 untuk mencatat puncak alokasi per tahap.")
+
+# Statistik cache hasil analisis (ditampilkan setelah analisis pada rerun ini)
+with st.sidebar:
+    with st.expander("Statistik Cache Analisis"):
+        cache_stats = load_analysis_cache().stats()
+        col_hit, col_miss = st.columns(2)
+        col_hit.metric("Hit", cache_stats['hits'] + cache_stats['disk_hits'])
+        col_miss.metric("Miss", cache_stats['misses'])
+        st.caption(f"{cache_stats['entries']} entri, "
+                   f"{cache_stats['bytes'] / 1024**2:.1f} / {cache_stats['max_bytes'] / 1024**2:.0f} MB, "
+                   f"{cache_stats['evictions']} eviksi, hit rate {cache_stats['hit_rate']*100:.0f}%"
+                   + (f", {cache_stats['disk_hits']} dari disk" if CACHE_DIR else ""))
+    
+    with st.expander("Metrik Pipeline (p50/p99)"):
+        metrics_summary = REGISTRY.summary()
+        if metrics_summary:
+            metrics_df = pd.DataFrame(metrics_summary)[['stage', 'count', 'p50_ms', 'p99_ms']]
+            st.dataframe(metrics_df.round(2), hide_index=True)
+            st.code(REGISTRY.prometheus_text(), language='text')
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,256 @@
+"""Pemrosesan batch tanpa antarmuka untuk folder atau arsip tar berisi gambar sidik jari
+
+Contoh:
+    python fingerprint_batch.py /data/scan_malam -o hasil.jsonl
+    python fingerprint_batch.py kartu_sidik_jari.tar.gz -o hasil.jsonl --parquet hasil.parquet
+"""
+import argparse
+import json
+import os
+import sys
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from fingerprint_analyzer import FingerprintAnalyzer
+from fingerprint_cache import params_key
+from fingerprint_quality import LowQualityError
+from minutiae_engine import minutiae_to_dicts
+from minutiae_matcher import DEFAULT_MINUTIAE_TYPES
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')
+
+# Analyzer per proses worker dan kunci parameternya, dibuat sekali oleh initializer
+_worker_analyzer = None
+_worker_params_key = None
+
+
+def _init_worker(params=None):
+    global _worker_analyzer, _worker_params_key
+    _worker_analyzer = FingerprintAnalyzer().configured(params)
+    _worker_params_key = params_key(_worker_analyzer.params)
+    # Satu thread OpenCV per proses agar tidak berebut core dengan worker lain
+    cv2.setNumThreads(1)
+
+
+def iter_directory(root):
+    """Menghasilkan (nama relatif, path) untuk setiap gambar dalam folder"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, root), path
+
+
+def iter_tar(path):
+    """Menghasilkan (nama member, bytes) secara streaming dari arsip tar"""
+    with tarfile.open(path, mode='r|*') as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                yield member.name, archive.extractfile(member).read()
+
+
+def iter_inputs(source):
+    if os.path.isdir(source):
+        return iter_directory(source)
+    return iter_tar(source)
+
+
+def build_record(name, filesize, image, analysis, include_minutiae=True):
+    """Record metadata per gambar, mengikuti metadata mode analisis tunggal"""
+    record = {
+        'filename': name,
+        'filesize': filesize,
+        'processed_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'image_dimensions': list(image.shape),
+        'minutiae_count': analysis['minutiae_count'],
+        'pattern_detected': analysis['pattern'],
+        'pattern_confidence': float(analysis['pattern_confidence']),
+        'predicted_hand': analysis['hand'],
+        'hand_confidence': float(analysis['hand_confidence']),
+        'predicted_finger': analysis['predicted_finger'],
+        'finger_confidence': float(analysis['finger_confidence']),
+        'quality_score': float(analysis['quality_score']),
+        'pruning': analysis['pruning']
+    }
+    if include_minutiae:
+        record['minutiae'] = minutiae_to_dicts(analysis['minutiae_array'], DEFAULT_MINUTIAE_TYPES)
+    return record
+
+
+def process_image(name, source, include_minutiae=True):
+    """Menjalankan pipeline pada satu gambar (path atau bytes) di proses worker
+
+    Gambar yang tidak dapat di-decode atau ditolak oleh gerbang kualitas menjadi
+    record 'rejected' (hasil akhir yang sama setiap kali dijalankan); kegagalan
+    lain menjadi record 'error' yang dicoba ulang saat batch dilanjutkan.
+    """
+    try:
+        if isinstance(source, bytes):
+            data = source
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            record = {'filename': name, 'filesize': len(data), 'rejected': 'unreadable',
+                      'reason': "gambar tidak dapat dibaca"}
+        else:
+            analysis = _worker_analyzer.analyze_image(image)
+            record = build_record(name, len(data), image, analysis, include_minutiae)
+    except LowQualityError as exc:
+        record = {'filename': name, 'filesize': len(data), 'rejected': 'low_quality', 'reason': str(exc),
+                  'quality_score': float(exc.score), 'min_quality': float(exc.threshold)}
+    except Exception as exc:
+        record = {'filename': name, 'error': f"{type(exc).__name__}: {exc}"}
+    record['params_key'] = _worker_params_key
+    return record
+
+
+def load_completed(output_path, key):
+    """Nama file yang sudah selesai diproses dengan parameter ber-kunci key, untuk melanjutkan setelah crash
+
+    Record berhasil dan record 'rejected' dianggap selesai. Record 'error' dan
+    record dari parameter lain dibuang dari file keluaran agar gambarnya
+    diproses ulang tanpa menggandakan baris. Mengembalikan
+    (nama yang dilewati, jumlah record yang dibuang).
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed, 0
+
+    # Buang baris terakhir yang terpotong jika proses sebelumnya berhenti di tengah penulisan
+    with open(output_path, 'rb+') as f:
+        content = f.read()
+        if content and not content.endswith(b'\n'):
+            f.truncate(content.rfind(b'\n') + 1)
+            content = content[:content.rfind(b'\n') + 1]
+
+    kept = []
+    dropped = 0
+    for line in content.decode('utf-8').splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if 'error' in record or record.get('params_key') != key or record['filename'] in completed:
+            dropped += 1
+            continue
+        completed.add(record['filename'])
+        kept.append(line)
+
+    # Tulis ulang lewat file sementara agar hasil lama tetap utuh jika proses berhenti di sini
+    if dropped:
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in kept)
+        os.replace(tmp_path, output_path)
+    return completed, dropped
+
+
+def run_batch(source, output_path, workers=None, include_minutiae=True, report_every=100, params=None):
+    """Memproses semua gambar dengan process pool, menulis satu baris JSONL per gambar
+
+    params menimpa FingerprintAnalyzer.params di setiap worker (mis. {'enhancement': 'gabor'}).
+    Gambar yang sudah berhasil atau ditolak dengan parameter yang sama dilewati; yang gagal
+    atau diproses dengan parameter lain diproses ulang dan record lamanya diganti.
+    """
+    workers = workers or os.cpu_count() or 1
+    completed, replaced = load_completed(output_path, params_key(FingerprintAnalyzer().configured(params).params))
+    max_in_flight = workers * 2
+
+    processed = 0
+    failed = 0
+    rejected = 0
+    skipped = 0
+    start = time.perf_counter()
+
+    with open(output_path, 'a', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(params,)) as pool:
+        pending = set()
+
+        def drain(block_until):
+            nonlocal processed, failed, rejected, pending
+            done, pending = wait(pending, return_when=block_until)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record) + '\n')
+                processed += 1
+                if 'error' in record:
+                    failed += 1
+                elif 'rejected' in record:
+                    rejected += 1
+                if processed % report_every == 0:
+                    out.flush()
+                    elapsed = time.perf_counter() - start
+                    print(f"{processed} gambar, {processed / elapsed:.2f} gambar/detik",
+                          file=sys.stderr)
+
+        for name, item in iter_inputs(source):
+            if name in completed:
+                skipped += 1
+                continue
+
+            # Batasi jumlah tugas yang menunggu agar memori tetap terkendali
+            if len(pending) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+            pending.add(pool.submit(process_image, name, item, include_minutiae))
+
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'processed': processed,
+        'failed': failed,
+        'rejected': rejected,
+        'skipped': skipped,
+        'replaced': replaced,
+        'elapsed_seconds': elapsed,
+        'images_per_second': processed / elapsed if elapsed > 0 else 0.0,
+        'workers': workers
+    }
+
+
+def export_parquet(jsonl_path, parquet_path):
+    """Konversi hasil JSONL ke Parquet (butuh pandas dan pyarrow)"""
+    import pandas as pd
+    df = pd.read_json(jsonl_path, lines=True)
+    df.to_parquet(parquet_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis sidik jari batch tanpa antarmuka")
+    parser.add_argument('source', help="folder gambar atau arsip .tar/.tar.gz")
+    parser.add_argument('-o', '--output', default='hasil_batch.jsonl',
+                        help="file JSONL keluaran (dilanjutkan jika sudah ada)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="jumlah proses worker (default: jumlah core)")
+    parser.add_argument('--parquet', help="ekspor hasil ke file Parquet setelah selesai")
+    parser.add_argument('--without-minutiae', action='store_true',
+                        help="jangan simpan daftar minutiae di setiap record")
+    parser.add_argument('--enhancement', choices=('sharpen', 'gabor'), default='sharpen',
+                        help="peningkatan ridge sebelum threshold (gabor: filter Gabor kontekstual)")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.source, args.output, args.workers,
+                        include_minutiae=not args.without_minutiae,
+                        params={'enhancement': args.enhancement})
+    print(f"Selesai: {summary['processed']} diproses ({summary['failed']} gagal, "
+          f"{summary['rejected']} ditolak), "
+          f"{summary['skipped']} dilewati, {summary['replaced']} record lama diganti, "
+          f"{summary['elapsed_seconds']:.1f} detik, "
+          f"{summary['images_per_second']:.2f} gambar/detik dengan {summary['workers']} worker")
+
+    if args.parquet:
+        export_parquet(args.output, args.parquet)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""Benchmark pipeline analisis sidik jari dengan data sintetis yang dapat direproduksi
+
+Setiap tahap (preprocess_image, extract_minutiae, prune_minutiae, analyze_pattern,
+compare_fingerprints, compare_descriptors) dan pipeline end-to-end (analyze_image) dijalankan pada
+beberapa ukuran gambar. Hasilnya berupa latensi p50/p90/p99, throughput, dan
+puncak alokasi memori. Hasil dapat disimpan sebagai baseline JSON lalu
+dibandingkan pada run berikutnya. Tidak membutuhkan jaringan maupun dataset.
+
+Contoh:
+    python fingerprint_benchmark.py --sizes 256 480x400 1024 --output baseline_benchmark.json
+    python fingerprint_benchmark.py --baseline baseline_benchmark.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+import skimage
+
+from fingerprint_analyzer import FingerprintAnalyzer
+from minutiae_descriptors import compute_descriptors, match_descriptors
+from minutiae_pruning import prune_minutiae
+from synthetic_fingerprint import PATTERNS, generate_fingerprint
+
+STAGES = ('preprocess_image', 'extract_minutiae', 'prune_minutiae', 'analyze_pattern',
+          'compare_fingerprints', 'compare_pruned', 'compare_descriptors', 'end_to_end')
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Selisih absolut minimum agar perubahan kecil akibat noise tidak dianggap regresi
+MIN_DELTA_MS = 0.5
+MIN_DELTA_MB = 1.0
+
+
+def parse_size(text):
+    """'512' -> (512, 512), '480x400' -> (480, 400) sebagai (tinggi, lebar)"""
+    if 'x' in text:
+        rows, cols = text.lower().split('x')
+        return int(rows), int(cols)
+    return int(text), int(text)
+
+
+def environment_info():
+    """Informasi mesin dan versi pustaka, disimpan bersama baseline"""
+    return {
+        'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'scikit_image': skimage.__version__,
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': cv2.getNumThreads()
+    }
+
+
+def prepare_inputs(analyzer, size, count, dpi, noise, seed):
+    """Gambar sintetis (BGR seperti hasil upload) dan input antara untuk setiap tahap"""
+    samples = []
+    for index in range(count):
+        for pattern in PATTERNS:
+            image_seed = seed * 1000003 + index * len(PATTERNS) + PATTERNS.index(pattern)
+            gray = generate_fingerprint(pattern, size, dpi, noise, image_seed)
+            image = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+            _, _, binary = analyzer.preprocess_image(image)
+            minutiae, skeleton = analyzer.extract_minutiae_array(binary)
+            pruned, _ = prune_minutiae(minutiae, skeleton, analyzer.minutiae_types,
+                                       analyzer.params['prune_branch_length'],
+                                       analyzer.params['prune_min_distance'])
+            samples.append({
+                'image': image,
+                'binary': binary,
+                'minutiae': minutiae,
+                'skeleton': skeleton,
+                # Pola dari generator, agar compare tidak bergantung pada analyze_pattern
+                'fp_data': {'minutiae': minutiae, 'pattern': pattern},
+                'fp_pruned': {'minutiae': pruned, 'pattern': pattern},
+                'descriptors': compute_descriptors(pruned)
+            })
+    return samples
+
+
+def stage_calls(analyzer, stage_name, samples):
+    """Daftar fungsi tanpa argumen untuk satu tahap, satu per sampel"""
+    if stage_name == 'preprocess_image':
+        return [lambda s=s: analyzer.preprocess_image(s['image']) for s in samples]
+    if stage_name == 'extract_minutiae':
+        return [lambda s=s: analyzer.extract_minutiae(s['binary']) for s in samples]
+    if stage_name == 'prune_minutiae':
+        return [lambda s=s: prune_minutiae(s['minutiae'], s['skeleton'], analyzer.minutiae_types,
+                                           analyzer.params['prune_branch_length'],
+                                           analyzer.params['prune_min_distance'])
+                for s in samples]
+    if stage_name == 'analyze_pattern':
+        return [lambda s=s: analyzer.analyze_pattern(s['binary']) for s in samples]
+    if stage_name in ('compare_fingerprints', 'compare_pruned'):
+        # Setiap sampel dibandingkan dengan sampel berikutnya (pola dan minutiae berbeda);
+        # compare_pruned memakai minutiae setelah prune_minutiae
+        field = 'fp_data' if stage_name == 'compare_fingerprints' else 'fp_pruned'
+        pairs = zip(samples, samples[1:] + samples[:1])
+        return [lambda a=a, b=b: analyzer.compare_fingerprints(a[field], b[field])
+                for a, b in pairs]
+    if stage_name == 'compare_descriptors':
+        # Pasangan sama dengan compare_pruned, hanya skor deskriptor yang sudah dihitung
+        pairs = zip(samples, samples[1:] + samples[:1])
+        return [lambda a=a, b=b: match_descriptors(a['descriptors'], b['descriptors'])
+                for a, b in pairs]
+    if stage_name == 'end_to_end':
+        return [lambda s=s: analyzer.analyze_image(s['image']) for s in samples]
+    raise ValueError(f"tahap tidak dikenal: {stage_name}")
+
+
+def measure_stage(calls, repeat, pixels):
+    """Latensi per panggilan, throughput, dan puncak alokasi untuk satu tahap"""
+    # Pemanasan: cache kernel OpenCV, alokasi awal, import malas
+    for call in calls:
+        call()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for call in calls:
+            call_start = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    # Memori diukur terpisah karena tracemalloc memperlambat eksekusi
+    tracemalloc.start()
+    peak = 0
+    for call in calls:
+        tracemalloc.reset_peak()
+        call()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    latencies = np.asarray(latencies)
+    result = {
+        'calls': len(latencies),
+        'mean_ms': float(latencies.mean()),
+        'throughput_per_s': len(latencies) / elapsed,
+        'megapixels_per_s': len(latencies) * pixels / elapsed / 1e6,
+        'peak_traced_mb': peak / 1024**2
+    }
+    for q in QUANTILES:
+        result[f'p{int(q * 100)}_ms'] = float(np.quantile(latencies, q))
+    return result
+
+
+def run_benchmark(sizes=((256, 256), (480, 400), (1024, 1024)), stages=STAGES, repeat=10,
+                  count=1, dpi=500, noise=0.1, seed=0, progress=None, enhancement='sharpen'):
+    """Menjalankan semua tahap untuk semua ukuran; tahap yang gagal dicatat sebagai error"""
+    analyzer = FingerprintAnalyzer().configured({'enhancement': enhancement})
+    results = []
+    for size in sizes:
+        samples = prepare_inputs(analyzer, size, count, dpi, noise, seed)
+        for stage_name in stages:
+            row = {'stage': stage_name, 'size': list(size)}
+            try:
+                row.update(measure_stage(stage_calls(analyzer, stage_name, samples), repeat,
+                                         size[0] * size[1]))
+            except Exception as exc:
+                row['error'] = f"{type(exc).__name__}: {exc}"
+            results.append(row)
+            if progress:
+                progress(row)
+
+    return {
+        'environment': environment_info(),
+        'config': {'repeat': repeat, 'count': count, 'dpi': dpi, 'noise': noise, 'seed': seed,
+                   'patterns': list(PATTERNS), 'enhancement': enhancement},
+        'results': results,
+        # ru_maxrss dalam kilobyte di Linux
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def result_key(row):
+    return f"{row['stage']}@{row['size'][0]}x{row['size'][1]}"
+
+
+def config_mismatches(report, baseline):
+    """Kunci konfigurasi yang berbeda antara laporan dan baseline: {kunci: (baseline, sekarang)}
+
+    Baseline lama tanpa kunci 'enhancement' diukur dengan sharpen.
+    """
+    before = {'enhancement': 'sharpen', **baseline.get('config', {})}
+    after = report['config']
+    return {key: (before.get(key), after[key]) for key in after if before.get(key) != after[key]}
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """Daftar regresi: p50 atau puncak memori naik melebihi toleransi relatif"""
+    baseline_rows = {result_key(row): row for row in baseline['results']}
+    regressions = []
+    for row in report['results']:
+        key = result_key(row)
+        old = baseline_rows.get(key)
+        if old is None or 'error' in old:
+            continue
+        if 'error' in row:
+            regressions.append({'key': key, 'metric': 'error', 'baseline': None,
+                                'current': row['error'], 'change': None})
+            continue
+
+        for metric, min_delta in (('p50_ms', MIN_DELTA_MS), ('peak_traced_mb', MIN_DELTA_MB)):
+            before, after = old[metric], row[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta:
+                regressions.append({'key': key, 'metric': metric, 'baseline': before,
+                                    'current': after, 'change': after / before - 1 if before else None})
+    return regressions
+
+
+def format_row(row):
+    name = f"{row['stage']:<22} {row['size'][0]:>5}x{row['size'][1]:<5}"
+    if 'error' in row:
+        return f"{name} ERROR {row['error']}"
+    return (f"{name} {row['p50_ms']:>9.2f} {row['p90_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+            f"{row['throughput_per_s']:>9.1f} {row['megapixels_per_s']:>8.2f} "
+            f"{row['peak_traced_mb']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline sidik jari dengan data sintetis")
+    parser.add_argument('--sizes', nargs='+', default=['256', '480x400', '1024'],
+                        help="ukuran gambar, mis. 512 atau 480x400 (tinggi x lebar)")
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--repeat', type=int, default=10, help="jumlah putaran per tahap")
+    parser.add_argument('--count', type=int, default=1, help="jumlah gambar per pola")
+    parser.add_argument('--dpi', type=int, default=500)
+    parser.add_argument('--noise', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--enhancement', choices=('sharpen', 'gabor'), default='sharpen',
+                        help="peningkatan ridge yang diukur (gabor: filter Gabor kontekstual)")
+    parser.add_argument('--threads', type=int, default=1,
+                        help="jumlah thread OpenCV (default 1 agar hasil stabil)")
+    parser.add_argument('-o', '--output', help="simpan hasil sebagai JSON (mis. baseline baru)")
+    parser.add_argument('--baseline', help="baseline JSON untuk deteksi regresi")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="kenaikan relatif yang dianggap regresi (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    cv2.setNumThreads(args.threads)
+    print(f"{'tahap':<22} {'ukuran':<11} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'ops/s':>9} {'MP/s':>8} {'peak MB':>8}")
+    report = run_benchmark([parse_size(size) for size in args.sizes], args.stages, args.repeat,
+                           args.count, args.dpi, args.noise, args.seed,
+                           progress=lambda row: print(format_row(row), flush=True),
+                           enhancement=args.enhancement)
+    print(f"RSS maksimum proses: {report['max_rss_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['environment'].get('platform') != report['environment']['platform']:
+            print("Peringatan: baseline dibuat di platform lain, perbandingan kurang akurat",
+                  file=sys.stderr)
+        mismatches = config_mismatches(report, baseline)
+        if mismatches:
+            for key, (before, after) in mismatches.items():
+                print(f"Konfigurasi {key} berbeda: baseline {before}, sekarang {after}", file=sys.stderr)
+            print("Baseline tidak dibandingkan; ukur ulang baseline dengan konfigurasi yang sama",
+                  file=sys.stderr)
+            return 2
+
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for item in regressions:
+            if item['metric'] == 'error':
+                print(f"REGRESI {item['key']}: sekarang gagal ({item['current']})")
+            else:
+                change = f"+{item['change'] * 100:.0f}%" if item['change'] is not None else "baseline 0"
+                print(f"REGRESI {item['key']} {item['metric']}: {item['baseline']:.2f} -> "
+                      f"{item['current']:.2f} ({change})")
+        if regressions:
+            return 1
+        print(f"Tidak ada regresi terhadap {args.baseline} (toleransi {args.tolerance * 100:.0f}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Cache hasil analisis berbasis hash konten gambar dengan eviksi LRU dan tier disk opsional"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Perkiraan biaya memori satu dict minutiae Python
+_MINUTIAE_DICT_BYTES = 400
+
+# Versi struktur hasil analisis; dinaikkan saat isinya berubah agar entri tier disk lama tidak terbaca
+CACHE_FORMAT = 3
+
+
+def cache_key(image, params):
+    """SHA-256 dari byte gambar hasil decode ditambah parameter analyzer"""
+    digest = hashlib.sha256()
+    digest.update(f'v{CACHE_FORMAT}'.encode('utf-8'))
+    digest.update(str(image.shape).encode('utf-8'))
+    digest.update(str(image.dtype).encode('utf-8'))
+    digest.update(np.ascontiguousarray(image).data)
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def params_key(params):
+    """SHA-256 dari parameter analyzer saja, untuk hasil yang disimpan per nama file (mis. resume batch)"""
+    digest = hashlib.sha256()
+    digest.update(f'v{CACHE_FORMAT}'.encode('utf-8'))
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def entry_nbytes(entry):
+    """Perkiraan ukuran memori satu entri cache"""
+    total = 0
+    seen = set()
+    for value in entry.values():
+        if isinstance(value, np.ndarray):
+            # Array yang sama bisa dirujuk dua kunci ('minutiae' dan 'minutiae_array')
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += value.nbytes
+        elif isinstance(value, list):
+            total += len(value) * _MINUTIAE_DICT_BYTES
+        else:
+            total += 64
+    return total
+
+
+class AnalysisCache:
+    """Cache LRU di memori dengan batas byte, ditambah tier disk .npz opsional"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Mengambil entri; mencoba memori lalu disk. None jika tidak ada"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._store_in_memory(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """Menyimpan entri ke memori (dan disk jika tier disk aktif)"""
+        self._store_in_memory(key, entry)
+        if self.disk_dir:
+            self._save_to_disk(key, entry)
+
+    def get_or_compute(self, key, compute):
+        """Mengembalikan entri dari cache, atau menjalankan compute() lalu menyimpannya"""
+        entry = self.get(key)
+        if entry is None:
+            entry = compute()
+            self.put(key, entry)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def _store_in_memory(self, key, entry):
+        size = entry_nbytes(entry)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+
+            # Entri yang lebih besar dari seluruh anggaran tidak disimpan di memori
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = entry
+            self._sizes[key] = size
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self.current_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.npz')
+
+    def _save_to_disk(self, key, entry):
+        arrays = {name: value for name, value in entry.items() if isinstance(value, np.ndarray)}
+        meta = {name: value for name, value in entry.items() if not isinstance(value, np.ndarray)}
+        arrays['__meta__'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        tmp_path = self._disk_path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, self._disk_path(key))
+
+    def _load_from_disk(self, key):
+        if not self.disk_dir or not os.path.exists(self._disk_path(key)):
+            return None
+        try:
+            with np.load(self._disk_path(key)) as data:
+                entry = {name: data[name] for name in data.files if name != '__meta__'}
+                entry.update(json.loads(data['__meta__'].tobytes().decode('utf-8')))
+        except (OSError, ValueError):
+            return None
+        return entry
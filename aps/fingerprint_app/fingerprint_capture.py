@@ -0,0 +1,316 @@
+"""Perekaman langsung: aliran frame dengan skor kualitas murah dan analisis frame terbaik
+
+Sumber frame (open_source):
+    - file video rekaman atau perangkat kamera (cv2.VideoCapture; angka = indeks kamera)
+    - folder yang dipantau: gambar baru dibaca sesuai urutan waktu modifikasi
+
+Setiap frame diberi skor kualitas murah (frame_quality, sekitar 1 ms untuk
+480x400) dari grayscale setengah resolusi:
+    - coverage: porsi blok dengan variasi intensitas ridge (jari menempel)
+    - contrast: rentang intensitas persentil 5-95 di blok tersebut (tekanan)
+    - focus: energi Laplacian di blok tersebut (ketajaman)
+Grayscale diambil sebelum equalizeHist, karena equalizeHist pada
+preprocess_image menormalkan kontras sehingga frame yang pudar tidak lagi
+terbedakan. Skor frame adalah rata-rata geometrik ketiga komponen (masing-masing
+dibatasi 0..1), sehingga frame kosong atau kabur tidak tertolong oleh satu
+komponen yang tinggi.
+
+Pipeline penuh hanya dijalankan pada frame terbaik setiap jendela `window`
+frame yang bergeser `stride` frame, dan hanya jika skornya minimal
+min_quality. Dengan executor, analisis berjalan di thread lain sehingga
+penilaian frame tetap mengikuti laju kamera; paling banyak satu analisis
+berjalan dan satu frame menunggu (yang terbaik sejak analisis terakhir).
+
+Contoh:
+    python fingerprint_capture.py rekaman.avi --window 15
+    python fingerprint_capture.py /data/scanner_out --idle-timeout 10 --save-best terbaik/
+    python fingerprint_capture.py 0 --max-frames 300 --background
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from fingerprint_batch import IMAGE_EXTENSIONS
+from fingerprint_pipeline import submit
+from fingerprint_quality import LowQualityError
+
+# Jendela pemilihan frame terbaik (frame) dan skor frame minimum agar dianalisis
+WINDOW = 15
+MIN_FRAME_QUALITY = 0.5
+
+# Ukuran blok pada grayscale setengah resolusi dan deviasi standar minimum blok latar depan
+BLOCK_SIZE = 8
+MIN_BLOCK_STD = 12.0
+
+# Nilai komponen yang dianggap penuh (skor 1): porsi blok, rentang intensitas / 255,
+# dan RMS Laplacian (scan tajam 500 dpi sekitar 250-300 pada setengah resolusi)
+FULL_COVERAGE = 0.5
+FULL_CONTRAST = 0.5
+FULL_FOCUS = 200.0
+
+# Gambar di folder pantauan yang belum terbaca dicoba lagi selama ini (masih ditulis)
+_WRITE_GRACE_SECONDS = 2.0
+
+
+def frame_quality(image):
+    """Skor kualitas frame 0..1 beserta komponen coverage, contrast, dan focus"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    rows, cols = gray.shape[0] // 2, gray.shape[1] // 2
+    small = cv2.resize(gray, (cols, rows), interpolation=cv2.INTER_AREA).astype(np.float32)
+    block_rows, block_cols = rows // BLOCK_SIZE, cols // BLOCK_SIZE
+    if block_rows == 0 or block_cols == 0:
+        return {'score': 0.0, 'coverage': 0.0, 'contrast': 0.0, 'focus': 0.0}
+
+    # Rata-rata per blok lewat INTER_AREA: mean, mean kuadrat, dan energi Laplacian
+    grid = (block_cols, block_rows)
+    cropped = small[:block_rows * BLOCK_SIZE, :block_cols * BLOCK_SIZE]
+    mean = cv2.resize(cropped, grid, interpolation=cv2.INTER_AREA)
+    square = cv2.resize(cropped * cropped, grid, interpolation=cv2.INTER_AREA)
+    foreground = np.sqrt(np.maximum(square - mean * mean, 0)) > MIN_BLOCK_STD
+    coverage = float(foreground.mean())
+    if not foreground.any():
+        return {'score': 0.0, 'coverage': coverage, 'contrast': 0.0, 'focus': 0.0}
+
+    laplacian = cv2.Laplacian(cropped, cv2.CV_32F)
+    energy = cv2.resize(laplacian * laplacian, grid, interpolation=cv2.INTER_AREA)
+    focus = float(np.median(np.sqrt(energy[foreground])))
+
+    pixels = cropped.reshape(block_rows, BLOCK_SIZE, block_cols, BLOCK_SIZE).transpose(0, 2, 1, 3)
+    low, high = np.percentile(pixels[foreground], (5, 95))
+    contrast = float(high - low) / 255
+
+    components = (min(coverage / FULL_COVERAGE, 1.0), min(contrast / FULL_CONTRAST, 1.0),
+                  min(focus / FULL_FOCUS, 1.0))
+    return {
+        'score': float(np.prod(components) ** (1 / 3)),
+        'coverage': coverage,
+        'contrast': contrast,
+        'focus': focus
+    }
+
+
+def iter_video(source):
+    """Frame BGR dari file video atau indeks kamera (int) sampai aliran habis
+
+    Sumber dibuka saat dipanggil, sehingga ValueError untuk sumber yang tidak
+    dapat dibuka muncul di sini, bukan saat frame pertama diminta.
+    """
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"sumber video tidak dapat dibuka: {source}")
+    return _read_frames(capture)
+
+
+def _read_frames(capture):
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def iter_directory_watch(root, poll_interval=0.2, idle_timeout=None):
+    """Frame dari gambar di folder, termasuk yang muncul kemudian, urut waktu modifikasi
+
+    Berhenti setelah idle_timeout detik tanpa gambar baru (None = terus memantau).
+    Gambar yang belum dapat dibaca (masih ditulis) dicoba lagi pada putaran berikutnya.
+    """
+    seen = set()
+    last_frame = time.monotonic()
+    while True:
+        pending = []
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if (entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+                        and entry.path not in seen):
+                    pending.append((entry.stat().st_mtime, entry.path))
+
+        for mtime, path in sorted(pending):
+            image = cv2.imread(path, cv2.IMREAD_COLOR)
+            if image is None and time.time() - mtime < _WRITE_GRACE_SECONDS:
+                continue
+            seen.add(path)
+            if image is not None:
+                last_frame = time.monotonic()
+                yield image
+
+        if idle_timeout is not None and time.monotonic() - last_frame > idle_timeout:
+            return
+        time.sleep(poll_interval)
+
+
+def open_source(source, poll_interval=0.2, idle_timeout=None):
+    """Iterator frame untuk indeks kamera (angka), folder pantauan, atau file video"""
+    if isinstance(source, int) or str(source).isdigit():
+        return iter_video(int(source))
+    if os.path.isdir(source):
+        return iter_directory_watch(source, poll_interval, idle_timeout)
+    return iter_video(str(source))
+
+
+def iter_capture(frames, analyze, window=WINDOW, stride=None, min_quality=MIN_FRAME_QUALITY,
+                 executor=None):
+    """Menilai setiap frame dan menganalisis frame terbaik per jendela; menghasilkan event
+
+    analyze(frame) -> hasil (mis. FingerprintAnalyzer.analyze_image). Event
+    berupa dict dengan kind:
+        'frame'    - index, image, quality, fps (frame per detik sejak awal), elapsed
+        'window'   - index dan quality frame terbaik jendela, queued (True jika
+                     akan dianalisis), fps
+        'analysis' - index, image, quality, result, error (exception atau None),
+                     seconds, fps
+    Frame yang sama tidak dianalisis dua kali meskipun jendela bertumpang tindih.
+    """
+    stride = stride or window
+    recent = deque(maxlen=window)
+    running = None      # (future, index, image, quality) analisis yang sedang berjalan
+    waiting = None      # (index, image, quality) terbaik yang menunggu analisis selesai
+    last_selected = -1
+    frames_seen = 0
+    start = time.perf_counter()
+
+    def fps():
+        return frames_seen / max(time.perf_counter() - start, 1e-9)
+
+    def run(index, image, quality):
+        analysis_start = time.perf_counter()
+        try:
+            result, error = analyze(image), None
+        except Exception as exc:
+            result, error = None, exc
+        return {'kind': 'analysis', 'index': index, 'image': image, 'quality': quality,
+                'result': result, 'error': error, 'seconds': time.perf_counter() - analysis_start}
+
+    def finished(block):
+        """Event analisis yang selesai; kandidat yang menunggu langsung dijalankan"""
+        nonlocal running, waiting
+        events = []
+        while running is not None and (block or running[0].done()):
+            event = running[0].result()
+            event['fps'] = fps()
+            events.append(event)
+            running = None
+            if waiting is not None:
+                running = (submit(executor, run, *waiting),) + waiting
+                waiting = None
+        return events
+
+    def select():
+        nonlocal running, waiting, last_selected
+        index, image, quality = max(recent, key=lambda item: item[2]['score'])
+        queued = index != last_selected and quality['score'] >= min_quality
+        yield {'kind': 'window', 'index': index, 'quality': quality, 'queued': queued, 'fps': fps()}
+        if not queued:
+            return
+        last_selected = index
+        if executor is None:
+            event = run(index, image, quality)
+            event['fps'] = fps()
+            yield event
+        elif running is None:
+            running = (submit(executor, run, index, image, quality), index, image, quality)
+        elif waiting is None or quality['score'] > waiting[2]['score']:
+            waiting = (index, image, quality)
+
+    since_selection = 0
+    for index, image in enumerate(frames):
+        quality = frame_quality(image)
+        frames_seen += 1
+        recent.append((index, image, quality))
+        yield {'kind': 'frame', 'index': index, 'image': image, 'quality': quality,
+               'fps': fps(), 'elapsed': time.perf_counter() - start}
+
+        since_selection += 1
+        if len(recent) == window and since_selection >= stride:
+            since_selection = 0
+            yield from select()
+        yield from finished(block=False)
+
+    # Sisa frame setelah jendela terakhir, lalu tunggu analisis yang masih berjalan
+    if recent and since_selection:
+        yield from select()
+    yield from finished(block=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perekaman langsung: analisis frame terbaik dari aliran frame")
+    parser.add_argument('source', help="file video, folder yang dipantau, atau indeks kamera (mis. 0)")
+    parser.add_argument('--window', type=int, default=WINDOW, help="jumlah frame per jendela pemilihan")
+    parser.add_argument('--stride', type=int, help="pergeseran jendela dalam frame (default = window)")
+    parser.add_argument('--min-quality', type=float, default=MIN_FRAME_QUALITY,
+                        help="skor frame minimum agar frame terbaik dianalisis")
+    parser.add_argument('--max-frames', type=int, help="berhenti setelah sejumlah frame (mis. untuk kamera)")
+    parser.add_argument('--idle-timeout', type=float, default=10.0,
+                        help="folder pantauan: berhenti setelah sekian detik tanpa gambar baru")
+    parser.add_argument('--enhancement', choices=('sharpen', 'gabor'), default='sharpen',
+                        help="peningkatan ridge untuk analisis frame terbaik")
+    parser.add_argument('--background', action='store_true',
+                        help="analisis di thread terpisah agar penilaian frame tidak tertahan")
+    parser.add_argument('--save-best', help="folder untuk menyimpan frame yang dianalisis (PNG)")
+    args = parser.parse_args(argv)
+
+    from fingerprint_analyzer import FingerprintAnalyzer
+
+    analyzer = FingerprintAnalyzer().configured({'enhancement': args.enhancement})
+    try:
+        frames = open_source(args.source, idle_timeout=args.idle_timeout)
+    except ValueError as exc:
+        print(f"Gagal membuka sumber frame: {exc}", file=sys.stderr)
+        return 1
+    if args.max_frames:
+        frames = itertools.islice(frames, args.max_frames)
+    if args.save_best:
+        os.makedirs(args.save_best, exist_ok=True)
+
+    executor = ThreadPoolExecutor(1, thread_name_prefix='capture-analyze') if args.background else None
+    frames_seen, analyzed, best = 0, 0, None
+    fps = 0.0
+    try:
+        for event in iter_capture(frames, analyzer.analyze_image, args.window, args.stride,
+                                  args.min_quality, executor):
+            fps = event['fps']
+            if event['kind'] == 'frame':
+                frames_seen += 1
+            elif event['kind'] == 'window' and not event['queued']:
+                print(f"frame {event['index']:>6}: terbaik di jendela, skor {event['quality']['score']:.2f} "
+                      f"(tidak dianalisis)")
+            elif event['kind'] == 'analysis':
+                analyzed += 1
+                quality = event['quality']
+                prefix = (f"frame {event['index']:>6}: skor {quality['score']:.2f} (coverage "
+                          f"{quality['coverage']:.2f}, contrast {quality['contrast']:.2f}, focus "
+                          f"{quality['focus']:.0f}), analisis {event['seconds'] * 1000:.0f} ms")
+                if isinstance(event['error'], LowQualityError):
+                    print(f"{prefix}, ditolak: {event['error']}")
+                    continue
+                if event['error'] is not None:
+                    raise event['error']
+                result = event['result']
+                print(f"{prefix}, pola {result['pattern']}, {len(result['minutiae'])} minutiae, "
+                      f"kualitas {result['quality_score']:.2f}")
+                if args.save_best:
+                    cv2.imwrite(os.path.join(args.save_best, f"frame_{event['index']:06d}.png"), event['image'])
+                if best is None or quality['score'] > best['quality']['score']:
+                    best = event
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    print(f"{frames_seen} frame, {fps:.1f} frame/detik berkelanjutan, {analyzed} frame dianalisis")
+    if best is not None:
+        print(f"frame terbaik: {best['index']} (skor {best['quality']['score']:.2f}, pola {best['result']['pattern']})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Perbandingan 1:N bertingkat: penolakan murah sebelum matcher minutiae penuh
+
+Tahap (urutan tetap, masing-masing dapat dimatikan dengan ambang None):
+    1. pattern  - kelas pola kandidat harus sama dengan pola latent
+    2. hand     - tangan kandidat harus sama jika prediksi tangan latent cukup yakin
+    3. count      - jumlah minutiae kandidat dalam rentang rasio terhadap latent
+    4. descriptor - hanya descriptor_top kandidat dengan skor deskriptor bit-vector
+                    (minutiae_descriptors.gallery_scores) tertinggi yang diteruskan
+    5. minutiae   - compare_fingerprints penuh; skor di bawah min_score ditolak
+
+Tahap 1-3 berupa operasi mask pada array kode pola/tangan/jumlah minutiae,
+sehingga hanya kandidat yang lolos yang template-nya dibaca dan dicocokkan.
+Tahap 4 membandingkan query dengan semua kandidat tersisa sekaligus sebagai
+operasi matriks XOR/popcount; deskriptor kandidat disimpan di CandidateSet
+setelah dihitung pertama kali.
+Jumlah kandidat yang dieliminasi setiap tahap dilaporkan untuk menimbang
+percepatan terhadap kehilangan recall (lihat evaluate_cascade).
+"""
+import time
+
+import numpy as np
+
+from fingerprint_template import HAND_CODES, PATTERN_CODES, PATTERN_NAMES, from_records
+from minutiae_descriptors import compute_descriptors, gallery_scores
+from minutiae_matcher import DEFAULT_MINUTIAE_TYPES, as_minutiae_array
+
+UNKNOWN_CODE = 0
+
+DEFAULT_CASCADE = {
+    # Tahap pattern aktif jika confidence pola latent minimal sebesar ini
+    'pattern_min_confidence': 0.6,
+    # Tahap hand aktif jika confidence tangan latent minimal sebesar ini
+    'hand_min_confidence': 0.6,
+    # Rentang rasio jumlah minutiae kandidat / latent (latent parsial cenderung lebih sedikit)
+    'count_ratio_min': 0.33,
+    'count_ratio_max': 3.0,
+    # Jumlah kandidat dengan skor deskriptor tertinggi yang dicocokkan penuh (None = semua)
+    'descriptor_top': None,
+    # Skor compare_fingerprints minimum agar kandidat masuk hasil
+    'min_score': 0.0
+}
+
+# Semua tahap murah dimatikan: setiap kandidat dicocokkan penuh (pembanding recall)
+EXHAUSTIVE = {
+    'pattern_min_confidence': None,
+    'hand_min_confidence': None,
+    'count_ratio_min': None,
+    'count_ratio_max': None,
+    'descriptor_top': None,
+    'min_score': 0.0
+}
+
+
+class CandidateSet:
+    """Atribut kandidat sebagai array kolom, template minutiae dibaca saat dibutuhkan"""
+
+    def __init__(self, patterns, hands, counts, loader, labels=None):
+        self.patterns = np.asarray(patterns, dtype=np.uint8)
+        self.hands = np.asarray(hands, dtype=np.uint8)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.labels = labels
+        self._loader = loader
+        self._descriptors = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def load(self, index):
+        """fp_data kandidat (minutiae dan pola) untuk compare_fingerprints"""
+        return {
+            'minutiae': self._loader(index),
+            'pattern': PATTERN_NAMES.get(int(self.patterns[index]), 'Tidak Diketahui')
+        }
+
+    def descriptors(self, index):
+        """Deskriptor bit-vector minutiae kandidat, dihitung sekali lalu disimpan"""
+        if index not in self._descriptors:
+            self._descriptors[index] = compute_descriptors(self._loader(index))
+        return self._descriptors[index]
+
+    def label(self, index):
+        return self.labels[index] if self.labels is not None else str(index)
+
+    @classmethod
+    def from_gallery(cls, gallery):
+        """Kandidat dari FingerprintGallery (record di memori, template dari memmap atau pending)"""
+        records = list(gallery.records)
+        return cls(
+            [PATTERN_CODES.get(r['pattern'], UNKNOWN_CODE) for r in records],
+            [HAND_CODES.get(r['hand'], UNKNOWN_CODE) for r in records],
+            [r['count'] for r in records],
+            gallery.get_template,
+            [r['label'] for r in records]
+        )
+
+    @classmethod
+    def from_collection(cls, collection, labels=None):
+        """Kandidat dari TemplateCollection; atribut dibaca dari header tanpa membaca minutiae"""
+        headers = collection.headers()
+        return cls(headers['pattern'], headers['hand'], headers['count'],
+                   lambda index: from_records(collection[index]['records']), labels)
+
+    @classmethod
+    def from_fp_data(cls, items, labels=None, minutiae_types=DEFAULT_MINUTIAE_TYPES):
+        """Kandidat dari daftar dict hasil analyze_image atau template_to_fp_data"""
+        minutiae = [as_minutiae_array(item.get('minutiae_array', item.get('minutiae', [])),
+                                      minutiae_types)
+                    for item in items]
+        return cls(
+            [PATTERN_CODES.get(item.get('pattern'), UNKNOWN_CODE) for item in items],
+            [HAND_CODES.get(item.get('hand'), UNKNOWN_CODE) for item in items],
+            [len(m) for m in minutiae],
+            minutiae.__getitem__,
+            labels
+        )
+
+
+def _pattern_mask(query, candidates, config):
+    threshold = config['pattern_min_confidence']
+    code = PATTERN_CODES.get(query.get('pattern'), UNKNOWN_CODE)
+    if threshold is None or code == UNKNOWN_CODE or query.get('pattern_confidence', 1.0) < threshold:
+        return None
+    # Kandidat dengan pola tidak diketahui tidak ditolak
+    return (candidates.patterns == code) | (candidates.patterns == UNKNOWN_CODE)
+
+
+def _hand_mask(query, candidates, config):
+    threshold = config['hand_min_confidence']
+    code = HAND_CODES.get(query.get('hand'), UNKNOWN_CODE)
+    if threshold is None or code == UNKNOWN_CODE or query.get('hand_confidence', 0.0) < threshold:
+        return None
+    return (candidates.hands == code) | (candidates.hands == UNKNOWN_CODE)
+
+
+def _count_mask(query_count, candidates, config):
+    low, high = config['count_ratio_min'], config['count_ratio_max']
+    if query_count == 0 or (low is None and high is None):
+        return None
+    ratio = candidates.counts / query_count
+    mask = np.ones(len(candidates), dtype=bool)
+    if low is not None:
+        mask &= ratio >= low
+    if high is not None:
+        mask &= ratio <= high
+    return mask
+
+
+def _descriptor_mask(query_minutiae, candidates, alive, config):
+    top = config['descriptor_top']
+    survivors = np.flatnonzero(alive)
+    if top is None or len(query_minutiae) == 0 or len(survivors) <= top:
+        return None
+    scores = gallery_scores(compute_descriptors(query_minutiae),
+                            [candidates.descriptors(index) for index in survivors.tolist()])
+    mask = np.zeros(len(candidates), dtype=bool)
+    mask[survivors[np.argsort(-scores, kind='stable')[:top]]] = True
+    return mask
+
+
+def cascade_search(analyzer, query, candidates, config=None, top_k=10):
+    """Pencarian 1:N bertingkat; query adalah dict hasil analyze_image (atau subset-nya)
+
+    Mengembalikan dict berisi 'results' (hasil compare_fingerprints ditambah
+    index dan label kandidat, urut skor) dan 'stages' (eliminasi per tahap).
+    """
+    config = dict(DEFAULT_CASCADE, **(config or {}))
+    query_minutiae = as_minutiae_array(query.get('minutiae', []), analyzer.minutiae_types)
+    query_data = {'minutiae': query_minutiae, 'pattern': query.get('pattern', 'Tidak Diketahui')}
+
+    alive = np.ones(len(candidates), dtype=bool)
+    stages = []
+
+    def apply(name, mask_fn):
+        start = time.perf_counter()
+        before = int(alive.sum())
+        mask = mask_fn()
+        if mask is not None:
+            alive[:] &= mask
+        remaining = int(alive.sum())
+        stages.append({
+            'stage': name,
+            'active': mask is not None,
+            'input': before,
+            'eliminated': before - remaining,
+            'remaining': remaining,
+            'seconds': time.perf_counter() - start
+        })
+
+    search_start = time.perf_counter()
+    apply('pattern', lambda: _pattern_mask(query, candidates, config))
+    apply('hand', lambda: _hand_mask(query, candidates, config))
+    apply('count', lambda: _count_mask(len(query_minutiae), candidates, config))
+    apply('descriptor', lambda: _descriptor_mask(query_minutiae, candidates, alive, config))
+
+    # Tahap terakhir: matcher penuh hanya untuk kandidat yang lolos
+    start = time.perf_counter()
+    survivors = np.flatnonzero(alive)
+    results = []
+    for index in survivors.tolist():
+        comparison = analyzer.compare_fingerprints(query_data, candidates.load(index))
+        if comparison['similarity_score'] >= config['min_score']:
+            comparison['index'] = index
+            comparison['label'] = candidates.label(index)
+            results.append(comparison)
+    stages.append({
+        'stage': 'minutiae',
+        'active': True,
+        'input': len(survivors),
+        'eliminated': len(survivors) - len(results),
+        'remaining': len(results),
+        'seconds': time.perf_counter() - start
+    })
+
+    results.sort(key=lambda r: r['similarity_score'], reverse=True)
+    return {
+        'results': results[:top_k],
+        'stages': stages,
+        'candidates': len(candidates),
+        'compared': len(survivors),
+        'elapsed_seconds': time.perf_counter() - search_start
+    }
+
+
+def evaluate_cascade(analyzer, queries, mates, candidates, config=None, top_k=10):
+    """Recall@k dan percepatan cascade dibanding pencocokan penuh ke semua kandidat
+
+    mates[i] adalah indeks kandidat yang benar untuk queries[i].
+    """
+    summary = {}
+    for name, stage_config in (('cascade', config), ('exhaustive', EXHAUSTIVE)):
+        hits = 0
+        elapsed = 0.0
+        compared = 0
+        eliminated = {}
+        for query, mate in zip(queries, mates):
+            outcome = cascade_search(analyzer, query, candidates, stage_config, top_k)
+            hits += any(r['index'] == mate for r in outcome['results'])
+            elapsed += outcome['elapsed_seconds']
+            compared += outcome['compared']
+            for stage in outcome['stages']:
+                eliminated[stage['stage']] = eliminated.get(stage['stage'], 0) + stage['eliminated']
+        summary[name] = {
+            'recall': hits / max(len(queries), 1),
+            'seconds_per_query': elapsed / max(len(queries), 1),
+            'compared_per_query': compared / max(len(queries), 1),
+            'eliminated': eliminated
+        }
+
+    summary['speedup'] = (summary['exhaustive']['seconds_per_query']
+                          / max(summary['cascade']['seconds_per_query'], 1e-9))
+    summary['recall_loss'] = summary['exhaustive']['recall'] - summary['cascade']['recall']
+    return summary
+
+
+def benchmark(gallery_size=1000, queries=10, seed=0, config=None):
+    """Galeri minutiae sintetis dengan latent parsial dan kesalahan klasifikasi pola/tangan"""
+    from fingerprint_analyzer import FingerprintAnalyzer
+    from synthetic_fingerprint import synthetic_template
+
+    rng = np.random.default_rng(seed)
+    patterns = rng.choice(['Loop', 'Whorl', 'Arch', 'Tented Arch'], gallery_size,
+                          p=[0.62, 0.3, 0.05, 0.03])
+    hands = rng.choice(['Kanan', 'Kiri'], gallery_size)
+    templates = [synthetic_template(rng, int(np.clip(rng.normal(60, 20), 15, 150)), size=400)
+                 for _ in range(gallery_size)]
+    candidates = CandidateSet.from_fp_data(
+        [{'minutiae_array': t, 'pattern': p, 'hand': h}
+         for t, p, h in zip(templates, patterns, hands)]
+    )
+
+    query_list = []
+    mates = rng.choice(gallery_size, queries, replace=False)
+    for mate in mates.tolist():
+        # Latent parsial: sebagian minutiae dengan jitter posisi
+        reference = templates[mate]
+        keep = rng.random(len(reference)) < 0.7
+        latent = reference[keep].copy()
+        latent['x'] = np.clip(latent['x'] + rng.integers(-2, 3, len(latent)), 0, None)
+        latent['y'] = np.clip(latent['y'] + rng.integers(-2, 3, len(latent)), 0, None)
+        pattern = patterns[mate] if rng.random() < 0.9 else rng.choice(['Loop', 'Whorl', 'Arch'])
+        hand = hands[mate] if rng.random() < 0.8 else ('Kiri' if hands[mate] == 'Kanan' else 'Kanan')
+        query_list.append({
+            'minutiae': latent,
+            'pattern': str(pattern),
+            'pattern_confidence': 0.85,
+            'hand': str(hand),
+            'hand_confidence': float(rng.uniform(0.3, 0.9))
+        })
+
+    return evaluate_cascade(FingerprintAnalyzer(), query_list, mates.tolist(), candidates, config)
+
+
+if __name__ == '__main__':
+    summary = benchmark()
+    for name in ('exhaustive', 'cascade'):
+        row = summary[name]
+        stages = ', '.join(f"{stage}={count}" for stage, count in row['eliminated'].items())
+        print(f"{name:>10}: recall@10 {row['recall']:.2f}, {row['seconds_per_query'] * 1000:.1f} ms/query, "
+              f"{row['compared_per_query']:.0f} dicocokkan penuh; eliminasi: {stages}")
+    print(f"percepatan {summary['speedup']:.1f}x, kehilangan recall {summary['recall_loss']:.2f}")
@@ -0,0 +1,347 @@
+"""Galeri sidik jari persisten dengan indeks hash pasangan minutiae untuk identifikasi 1:N
+
+Isi galeri di disk: record (JSONL), template minutiae (biner, ditambah di
+akhir), dan indeks terbalik berupa pasangan file kunci/id .npy yang dapat
+di-memory-map. Manifest index.json ditulis terakhir secara atomik dan menjadi
+titik komit: ia menunjuk pasangan file indeks yang berlaku dan mencatat ukuran
+file record dan template yang sudah dikomit. Jika proses mati di tengah save(),
+galeri dibuka kembali pada keadaan save() terakhir yang selesai; sisa tulisan
+yang belum dikomit dipotong pada save() berikutnya.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from minutiae_engine import MINUTIAE_DTYPE
+
+# Parameter hash pasangan minutiae
+PAIR_NEIGHBORS = 4          # pasangan dengan k tetangga terdekat
+DISTANCE_BIN = 8.0          # lebar bin jarak (piksel)
+DISTANCE_BINS = 64
+ANGLE_BINS = 12             # 30 derajat per bin
+TYPE_BINS = 4
+
+RECORDS_FILE = 'records.jsonl'
+TEMPLATES_FILE = 'minutiae.bin'
+INDEX_MANIFEST_FILE = 'index.json'
+# Galeri lama tanpa manifest memakai nama tetap ini
+INDEX_KEYS_FILE = 'index_keys.npy'
+INDEX_IDS_FILE = 'index_ids.npy'
+
+
+def pair_hash_keys(minutiae, neighbors=PAIR_NEIGHBORS):
+    """Kunci hash unik dari pasangan minutiae (invarian translasi dan rotasi)"""
+    if len(minutiae) < 2:
+        return np.empty(0, dtype=np.uint32)
+
+    from scipy.spatial import cKDTree
+
+    points = np.column_stack([minutiae['x'], minutiae['y']]).astype(np.float64)
+    k = min(neighbors + 1, len(minutiae))
+    distances, nearest = cKDTree(points).query(points, k=k)
+
+    # Kolom pertama adalah titik itu sendiri
+    i = np.repeat(np.arange(len(minutiae)), k - 1)
+    j = nearest[:, 1:].ravel()
+    d = distances[:, 1:].ravel()
+
+    # Sudut garis penghubung dan orientasi relatif tiap minutiae terhadapnya
+    phi = np.arctan2(points[j, 1] - points[i, 1], points[j, 0] - points[i, 0])
+    angles = minutiae['angle'].astype(np.float64)
+    rel_i = np.mod(angles[i] - phi, 2 * np.pi)
+    rel_j = np.mod(angles[j] - phi, 2 * np.pi)
+
+    d_bin = np.minimum((d / DISTANCE_BIN).astype(np.uint32), DISTANCE_BINS - 1)
+    a_i = (rel_i / (2 * np.pi) * ANGLE_BINS).astype(np.uint32) % ANGLE_BINS
+    a_j = (rel_j / (2 * np.pi) * ANGLE_BINS).astype(np.uint32) % ANGLE_BINS
+    t_i = minutiae['type'][i].astype(np.uint32) % TYPE_BINS
+    t_j = minutiae['type'][j].astype(np.uint32) % TYPE_BINS
+
+    keys = (((d_bin * ANGLE_BINS + a_i) * ANGLE_BINS + a_j) * TYPE_BINS + t_i) * TYPE_BINS + t_j
+    return np.unique(keys)
+
+
+def _posting_votes(index_keys, index_ids, query_keys, count):
+    """Jumlah kunci query yang sama per template dari indeks terurut (kunci, id)"""
+    votes = np.zeros(count, dtype=np.int64)
+    if not len(query_keys) or not len(index_keys):
+        return votes
+    lo = np.searchsorted(index_keys, query_keys, side='left')
+    hi = np.searchsorted(index_keys, query_keys, side='right')
+    lengths = hi - lo
+    total = int(lengths.sum())
+    if total:
+        # Gabungkan semua posting list tanpa loop Python
+        starts = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+        positions = starts + np.arange(total)
+        votes += np.bincount(np.asarray(index_ids[positions]), minlength=count)
+    return votes
+
+
+def _save_atomic(path, array):
+    """Menyimpan array .npy lewat file sementara agar indeks lama tetap utuh saat crash"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _write_manifest(path, manifest):
+    """Menulis manifest lewat file sementara; os.replace adalah titik komit save()"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+class FingerprintGallery:
+    """Galeri template minutiae di disk dengan indeks terbalik kunci hash -> template
+
+    enroll hanya menambah ke memori; save() menulisnya ke disk. Pencarian tidak
+    pernah menulis: template yang belum disimpan dicari lewat indeks pending di
+    memori. Satu instance aman dipakai bersama beberapa thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        self._manifest = self._load_manifest()
+        self.records = []
+        records_path = os.path.join(path, RECORDS_FILE)
+        if os.path.exists(records_path):
+            # Hanya bagian yang sudah dikomit manifest; sisa save() yang terputus diabaikan
+            with open(records_path, 'rb') as f:
+                data = f.read(self._manifest['records_bytes'])
+            self.records = [json.loads(line) for line in data.decode('utf-8').splitlines() if line.strip()]
+
+        self._templates = self._load_templates()
+        self._index_keys, self._index_ids = self._load_index()
+        self._patterns = None
+
+        self._lock = threading.RLock()
+        self._reset_pending()
+
+    def _reset_pending(self):
+        self._pending_records = []
+        self._pending_templates = {}
+        self._pending_keys = []
+        self._pending_ids = []
+        self._pending_minutiae = 0
+        self._pending_index = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def _file_size(self, name):
+        path = os.path.join(self.path, name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _load_manifest(self):
+        """Manifest komit terakhir; galeri lama tanpa manifest dianggap utuh seperti adanya"""
+        manifest_path = os.path.join(self.path, INDEX_MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        legacy = os.path.exists(os.path.join(self.path, INDEX_KEYS_FILE))
+        return {
+            'generation': 0,
+            'records_bytes': self._file_size(RECORDS_FILE),
+            'templates_bytes': self._file_size(TEMPLATES_FILE),
+            'keys': INDEX_KEYS_FILE if legacy else None,
+            'ids': INDEX_IDS_FILE if legacy else None
+        }
+
+    def _load_templates(self):
+        templates_path = os.path.join(self.path, TEMPLATES_FILE)
+        count = self._manifest['templates_bytes'] // MINUTIAE_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=MINUTIAE_DTYPE)
+        return np.memmap(templates_path, dtype=MINUTIAE_DTYPE, mode='r', shape=(count,))
+
+    def _load_index(self):
+        if self._manifest['keys'] is None:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint32)
+        return (np.load(os.path.join(self.path, self._manifest['keys']), mmap_mode='r'),
+                np.load(os.path.join(self.path, self._manifest['ids']), mmap_mode='r'))
+
+    def _append_committed(self, name, committed_bytes, chunks):
+        """Menambah chunks ke file setelah memotong sisa tulisan yang belum dikomit; mengembalikan ukuran baru"""
+        with open(os.path.join(self.path, name), 'ab') as f:
+            if f.tell() > committed_bytes:
+                f.truncate(committed_bytes)
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            return os.fstat(f.fileno()).st_size
+
+    def enroll(self, label, minutiae, pattern, hand, metadata=None):
+        """Mendaftarkan template minutiae ke galeri, disimpan saat save()"""
+        return self.enroll_many([(label, minutiae, pattern, hand, metadata)])[0]
+
+    def enroll_many(self, entries):
+        """Mendaftarkan banyak (label, minutiae, pattern, hand, metadata) sekaligus; mengembalikan id-nya
+
+        Kunci hash dihitung di luar lock; record dan indeks pending diperbarui
+        sekali untuk seluruh batch.
+        """
+        prepared = []
+        for label, minutiae, pattern, hand, metadata in entries:
+            minutiae = np.asarray(minutiae, dtype=MINUTIAE_DTYPE)
+            prepared.append((label, minutiae, pattern, hand, metadata, pair_hash_keys(minutiae)))
+
+        enrolled_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        template_ids = []
+        with self._lock:
+            for label, minutiae, pattern, hand, metadata, keys in prepared:
+                template_id = len(self.records)
+                record = {
+                    'id': template_id,
+                    'label': label,
+                    'pattern': pattern,
+                    'hand': hand,
+                    'offset': int(len(self._templates) + self._pending_minutiae),
+                    'count': int(len(minutiae)),
+                    'enrolled_at': enrolled_at,
+                    'metadata': metadata or {}
+                }
+                self.records.append(record)
+                self._pending_records.append(record)
+                self._pending_templates[template_id] = minutiae
+                self._pending_minutiae += len(minutiae)
+                self._pending_keys.append(keys)
+                self._pending_ids.append(np.full(len(keys), template_id, dtype=np.uint32))
+                template_ids.append(template_id)
+            self._patterns = None
+            self._pending_index = None
+        return template_ids
+
+    def _sorted_pending(self):
+        """Indeks (kunci, id) terurut dari template yang belum disimpan; dibangun sekali per batch enroll"""
+        if self._pending_index is None:
+            keys = np.concatenate(self._pending_keys) if self._pending_keys else np.empty(0, dtype=np.uint32)
+            ids = np.concatenate(self._pending_ids) if self._pending_ids else np.empty(0, dtype=np.uint32)
+            order = np.argsort(keys, kind='stable')
+            self._pending_index = keys[order], ids[order]
+        return self._pending_index
+
+    def save(self):
+        """Menulis template baru ke disk dan menggabungkan indeks pending ke indeks di disk
+
+        Template, record, dan pasangan file indeks generasi baru ditulis lebih
+        dulu; manifest yang menunjuk semuanya ditulis terakhir, sehingga crash
+        di tengah jalan tidak pernah meninggalkan kunci dan id yang tidak sepadan.
+        """
+        with self._lock:
+            if not self._pending_records:
+                return
+
+            old = self._manifest
+            templates_bytes = self._append_committed(
+                TEMPLATES_FILE, old['templates_bytes'],
+                (minutiae.tobytes() for minutiae in self._pending_templates.values()))
+            records_bytes = self._append_committed(
+                RECORDS_FILE, old['records_bytes'],
+                ((json.dumps(record) + '\n').encode('utf-8') for record in self._pending_records))
+
+            # Indeks di disk sudah terurut: cukup sisipkan kunci pending yang sudah diurutkan
+            new_keys, new_ids = self._sorted_pending()
+            old_keys, old_ids = np.asarray(self._index_keys), np.asarray(self._index_ids)
+            positions = np.searchsorted(old_keys, new_keys, side='right')
+            keys = np.insert(old_keys, positions, new_keys)
+            ids = np.insert(old_ids, positions, new_ids)
+
+            generation = old['generation'] + 1
+            manifest = {
+                'generation': generation,
+                'records_bytes': records_bytes,
+                'templates_bytes': templates_bytes,
+                'keys': f'index_keys.{generation}.npy',
+                'ids': f'index_ids.{generation}.npy'
+            }
+            _save_atomic(os.path.join(self.path, manifest['keys']), keys)
+            _save_atomic(os.path.join(self.path, manifest['ids']), ids)
+            _write_manifest(os.path.join(self.path, INDEX_MANIFEST_FILE), manifest)
+
+            self._manifest = manifest
+            self._index_keys = self._index_ids = old_keys = old_ids = None
+            for name in (old['keys'], old['ids']):
+                # Generasi lama tidak lagi dirujuk manifest; di Windows file yang masih
+                # di-memory-map pembaca lain tidak dapat dihapus dan dibiarkan saja
+                if name is not None:
+                    try:
+                        os.remove(os.path.join(self.path, name))
+                    except OSError:
+                        pass
+
+            self._reset_pending()
+            self._templates = self._load_templates()
+            self._index_keys, self._index_ids = self._load_index()
+
+    def get_template(self, template_id):
+        """Mengambil template minutiae (structured array) berdasarkan id"""
+        with self._lock:
+            if template_id in self._pending_templates:
+                return self._pending_templates[template_id]
+            record = self.records[template_id]
+            templates = self._templates
+        start = record['offset']
+        return np.asarray(templates[start:start + record['count']])
+
+    def candidates(self, minutiae, pattern=None, limit=100):
+        """Kandidat terbaik berdasarkan jumlah kunci hash yang sama (tanpa skor penuh)"""
+        query_keys = pair_hash_keys(np.asarray(minutiae, dtype=MINUTIAE_DTYPE))
+        return self._rank_candidates(query_keys, pattern, limit)
+
+    def _rank_candidates(self, query_keys, pattern, limit):
+        # Salinan referensi di bawah lock; pencocokan sendiri berjalan tanpa lock
+        with self._lock:
+            count = len(self.records)
+            if count == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+            index_keys, index_ids = self._index_keys, self._index_ids
+            pending_keys, pending_ids = self._sorted_pending()
+            if pattern in ('Loop', 'Whorl', 'Arch', 'Tented Arch') and self._patterns is None:
+                self._patterns = np.array([r['pattern'] for r in self.records], dtype=object)
+            patterns = self._patterns
+
+        votes = (_posting_votes(index_keys, index_ids, query_keys, count)
+                 + _posting_votes(pending_keys, pending_ids, query_keys, count))
+
+        # Pangkas kandidat dengan kelas pola yang berbeda
+        if pattern in ('Loop', 'Whorl', 'Arch', 'Tented Arch'):
+            votes[patterns[:count] != pattern] = -1
+
+        limit = min(limit, len(votes))
+        top = np.argpartition(-votes, limit - 1)[:limit]
+        top = top[votes[top] > 0]
+        top = top[np.argsort(-votes[top], kind='stable')]
+        return top, votes[top]
+
+    def search(self, minutiae, pattern=None, top_k=10, shortlist=100, scorer=None):
+        """Pencarian 1:N: pemangkasan indeks lalu skor penuh pada kandidat tersisa"""
+        query_keys = pair_hash_keys(np.asarray(minutiae, dtype=MINUTIAE_DTYPE))
+        ids, votes = self._rank_candidates(query_keys, pattern, max(shortlist, top_k))
+
+        results = []
+        for template_id, vote in zip(ids.tolist(), votes.tolist()):
+            record = self.records[template_id]
+            if scorer is not None:
+                score = scorer(record, self.get_template(template_id))
+            else:
+                score = vote / max(len(query_keys), 1) * 100
+            results.append({
+                'id': template_id,
+                'label': record['label'],
+                'pattern': record['pattern'],
+                'hand': record['hand'],
+                'minutiae_count': record['count'],
+                'index_votes': vote,
+                'similarity_score': score
+            })
+
+        results.sort(key=lambda r: r['similarity_score'], reverse=True)
+        return results[:top_k]
@@ -0,0 +1,176 @@
+"""Perbandingan satu latent terhadap banyak referensi dengan process pool
+
+Template referensi ditulis sekali ke satu file koleksi (fingerprint_template)
+yang di-memory-map oleh setiap proses worker; isinya dibagi antar proses lewat
+page cache OS tanpa salinan per worker. Minutiae latent dan parameter
+pencocokan dikirim sekali per worker lewat initializer. Task hanya berisi
+rentang indeks (dua int) dan hasilnya hanya dict skor, sehingga tidak ada
+array minutiae yang di-pickle per task.
+
+Contoh (benchmark skala dengan template sintetis):
+    python fingerprint_multicompare.py --candidates 500 --workers 1 2 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from fingerprint_analyzer import FingerprintAnalyzer
+from fingerprint_template import (HAND_NAMES, PATTERN_NAMES, TemplateCollection, TemplateWriter,
+                                  encode_template, from_records)
+from minutiae_matcher import DEFAULT_MINUTIAE_TYPES, as_minutiae_array
+
+# Jumlah task per worker; lebih dari satu agar worker yang selesai lebih cepat mengambil sisa
+CHUNKS_PER_WORKER = 4
+
+# Analyzer, koleksi template, dan latent per proses worker, dibuat sekali oleh initializer
+_worker_state = None
+
+
+def _init_worker(collection_path, query, match_params):
+    global _worker_state
+    analyzer = FingerprintAnalyzer()
+    analyzer.match_params.update(match_params)
+    # Satu thread OpenCV per proses agar tidak berebut core dengan worker lain
+    cv2.setNumThreads(1)
+    _worker_state = (analyzer, TemplateCollection(collection_path), query)
+
+
+def _score(analyzer, collection, query, index):
+    template = collection[index]
+    comparison = analyzer.compare_fingerprints(
+        query, {'minutiae': from_records(template['records']), 'pattern': template['pattern']}
+    )
+    comparison['index'] = index
+    return comparison
+
+
+def _score_range(start, stop):
+    analyzer, collection, query = _worker_state
+    return [_score(analyzer, collection, query, index) for index in range(start, stop)]
+
+
+def write_reference_collection(path, references, minutiae_types=DEFAULT_MINUTIAE_TYPES):
+    """Menulis referensi (dict hasil analyze_image atau bytes template .fpt) ke satu file koleksi"""
+    with TemplateWriter(path) as writer:
+        for reference in references:
+            if not isinstance(reference, (bytes, bytearray, memoryview)):
+                height, width = reference.get('image_dimensions', (0, 0))[:2]
+                reference = encode_template(
+                    reference.get('minutiae_array', reference.get('minutiae', [])),
+                    reference.get('pattern', 'Tidak Diketahui'),
+                    reference.get('hand', 'Tidak Diketahui'),
+                    width=width, height=height, minutiae_types=minutiae_types
+                )
+            writer.write(reference)
+    return path
+
+
+def compare_many(analyzer, query, collection_path, labels=None, workers=None):
+    """Skor compare_fingerprints latent terhadap setiap template dalam file koleksi
+
+    query adalah dict hasil analyze_image (atau subset berisi minutiae dan
+    pattern). workers=1 mencocokkan di proses ini tanpa pool. Mengembalikan
+    dict berisi 'results' (hasil compare_fingerprints ditambah index, label,
+    pola, tangan, dan jumlah minutiae referensi, urut skor), 'candidates',
+    'workers', dan 'elapsed_seconds'.
+    """
+    start = time.perf_counter()
+    query_data = {
+        'minutiae': as_minutiae_array(query.get('minutiae_array', query.get('minutiae', [])),
+                                      analyzer.minutiae_types),
+        'pattern': query.get('pattern', 'Tidak Diketahui')
+    }
+    collection = TemplateCollection(collection_path)
+    count = len(collection)
+    workers = max(1, min(workers or os.cpu_count() or 1, count))
+
+    if workers == 1:
+        results = [_score(analyzer, collection, query_data, index) for index in range(count)]
+    else:
+        chunk_size = -(-count // (workers * CHUNKS_PER_WORKER))
+        starts = list(range(0, count, chunk_size))
+        stops = [min(s + chunk_size, count) for s in starts]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(collection_path, query_data, dict(analyzer.match_params))) as pool:
+            results = [comparison for chunk in pool.map(_score_range, starts, stops)
+                       for comparison in chunk]
+
+    headers = collection.headers()
+    for comparison in results:
+        header = headers[comparison['index']]
+        comparison['label'] = labels[comparison['index']] if labels is not None else str(comparison['index'])
+        comparison['pattern'] = PATTERN_NAMES.get(int(header['pattern']), 'Tidak Diketahui')
+        comparison['hand'] = HAND_NAMES.get(int(header['hand']), 'Tidak Diketahui')
+        comparison['minutiae_count'] = int(header['count'])
+
+    results.sort(key=lambda r: r['similarity_score'], reverse=True)
+    return {
+        'results': results,
+        'candidates': count,
+        'workers': workers,
+        'elapsed_seconds': time.perf_counter() - start
+    }
+
+
+def benchmark(candidates=500, worker_counts=(1, 2, 4), minutiae=1500, seed=0, repeats=3):
+    """Waktu compare_many untuk setiap jumlah worker pada template sintetis
+
+    Setiap konfigurasi dijalankan sekali tanpa diukur (import di worker, memmap
+    dan page cache koleksi), lalu repeats kali; seconds adalah median dan
+    best_seconds yang tercepat. Speedup dihitung dari median.
+    """
+    from synthetic_fingerprint import synthetic_template
+
+    rng = np.random.default_rng(seed)
+    templates = [synthetic_template(rng, int(np.clip(rng.normal(minutiae, minutiae / 4), 15, None)),
+                                    size=480)
+                 for _ in range(candidates)]
+    mate = int(rng.integers(candidates))
+    latent = templates[mate][rng.random(len(templates[mate])) < 0.7]
+    analyzer = FingerprintAnalyzer()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        path = write_reference_collection(os.path.join(workdir, 'referensi.fpc'),
+                                          [{'minutiae_array': t} for t in templates])
+        for workers in worker_counts:
+            compare_many(analyzer, {'minutiae': latent}, path, workers=workers)
+            outcomes = [compare_many(analyzer, {'minutiae': latent}, path, workers=workers)
+                        for _ in range(max(repeats, 1))]
+            seconds = [outcome['elapsed_seconds'] for outcome in outcomes]
+            rows.append({
+                'workers': outcomes[0]['workers'],
+                'seconds': float(np.median(seconds)),
+                'best_seconds': min(seconds),
+                'top_is_mate': all(outcome['results'][0]['index'] == mate for outcome in outcomes)
+            })
+    for row in rows:
+        row['speedup'] = rows[0]['seconds'] / max(row['seconds'], 1e-9)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=500, help="jumlah referensi sintetis")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help="jumlah proses worker yang diukur")
+    parser.add_argument('--minutiae', type=int, default=1500,
+                        help="rata-rata minutiae per template (hasil analisis gambar 480x400 sekitar 1500-2800)")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="jumlah pengukuran per jumlah worker setelah satu putaran pemanasan")
+    args = parser.parse_args(argv)
+
+    print(f"{args.candidates} referensi, {os.cpu_count()} CPU, median dari {args.repeats} pengukuran")
+    print(f"{'workers':>8} {'median':>8} {'terbaik':>8} {'speedup':>8} {'mate #1':>8}")
+    for row in benchmark(args.candidates, args.workers, args.minutiae, repeats=args.repeats):
+        print(f"{row['workers']:>8} {row['seconds']:>8.2f} {row['best_seconds']:>8.2f} {row['speedup']:>7.2f}x "
+              f"{'ya' if row['top_is_mate'] else 'tidak':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Decode dan analisis bertumpuk untuk banyak gambar (mis. kartu sepuluh jari)
+
+Decode gambar N+1 berjalan di thread terpisah selagi gambar N dianalisis,
+dan hasil dikirim satu per satu begitu selesai sehingga hasil pertama
+tersedia setelah satu latensi pipeline, bukan setelah semua gambar selesai.
+OpenCV dan NumPy melepas GIL pada operasi berat, jadi thread cukup untuk
+tumpang tindih ini tanpa biaya serialisasi antar proses.
+
+iter_concurrent menjalankan beberapa analisis (mis. referensi dan latent)
+bersamaan di executor yang dipakai bersama, dengan progres per tugas.
+"""
+import contextvars
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+
+def decode_image(buffer):
+    """Decode bytes/memoryview gambar tanpa salinan perantara (bytearray/np.asarray)"""
+    image = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("gambar tidak dapat dibaca")
+    return image
+
+
+def submit(pool, fn, *args):
+    """pool.submit dengan konteks pemanggil (mis. profil request aktif) ikut ke thread worker"""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def iter_pipelined(items, decode, analyze, analysis_workers=1, prefetch=1):
+    """Menghasilkan dict hasil per item sesuai urutan selesai
+
+    decode(item) -> gambar, analyze(item, gambar) -> hasil. Paling banyak
+    analysis_workers + prefetch item berada di antara decode dan analisis,
+    sehingga memori tetap terbatas. Setiap dict berisi index, image, result,
+    error (exception atau None), decode_seconds, dan analyze_seconds.
+    """
+    items = list(items)
+    next_index = 0
+    decoding = {}
+    analyzing = {}
+
+    with ThreadPoolExecutor(1, thread_name_prefix='decode') as decode_pool, \
+            ThreadPoolExecutor(analysis_workers, thread_name_prefix='analyze') as analysis_pool:
+
+        def fill():
+            nonlocal next_index
+            while next_index < len(items) and len(decoding) + len(analyzing) < analysis_workers + prefetch:
+                decoding[submit(decode_pool, _timed, decode, items[next_index])] = next_index
+                next_index += 1
+
+        fill()
+        while decoding or analyzing:
+            done, _ = wait(list(decoding) + list(analyzing), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in decoding:
+                    index = decoding.pop(future)
+                    try:
+                        image, decode_seconds = future.result()
+                    except Exception as exc:
+                        yield {'index': index, 'image': None, 'result': None, 'error': exc,
+                               'decode_seconds': 0.0, 'analyze_seconds': 0.0}
+                        continue
+                    analysis_future = submit(analysis_pool, _timed, analyze, items[index], image)
+                    analyzing[analysis_future] = (index, image, decode_seconds)
+                else:
+                    index, image, decode_seconds = analyzing.pop(future)
+                    try:
+                        result, analyze_seconds = future.result()
+                        error = None
+                    except Exception as exc:
+                        result, analyze_seconds, error = None, 0.0, exc
+                    yield {'index': index, 'image': image, 'result': result, 'error': error,
+                           'decode_seconds': decode_seconds, 'analyze_seconds': analyze_seconds}
+            fill()
+
+
+def iter_concurrent(executor, tasks):
+    """Menjalankan tasks {nama: fn(progress)} bersamaan di executor, menghasilkan event sesuai urutan terjadi
+
+    progress(tahap, selesai, total) aman dipanggil dari thread worker: event
+    diteruskan lewat antrean sehingga pemanggil (mis. skrip Streamlit)
+    memperbarui tampilan dari thread-nya sendiri. Setiap event adalah dict
+    berisi name dan kind: 'progress' (stage, done, total) atau 'done'
+    (result, error berupa exception atau None, seconds).
+    """
+    events = queue.SimpleQueue()
+
+    def run(name, fn):
+        def progress(stage, done, total):
+            events.put({'kind': 'progress', 'name': name, 'stage': stage, 'done': done, 'total': total})
+
+        start = time.perf_counter()
+        try:
+            result, error = fn(progress), None
+        except Exception as exc:
+            result, error = None, exc
+        events.put({'kind': 'done', 'name': name, 'result': result, 'error': error,
+                    'seconds': time.perf_counter() - start})
+
+    for name, fn in tasks.items():
+        submit(executor, run, name, fn)
+
+    remaining = len(tasks)
+    while remaining:
+        event = events.get()
+        remaining -= event['kind'] == 'done'
+        yield event
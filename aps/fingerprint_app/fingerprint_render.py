@@ -0,0 +1,101 @@
+"""Rendering gambar untuk antarmuka: pratinjau seukuran layar dan overlay minutiae dengan OpenCV
+
+Semua fungsi mengembalikan array uint8 (grayscale atau RGB) yang langsung
+dikirim lewat st.image, tanpa figure matplotlib dan tanpa rasterisasi ulang.
+"""
+import cv2
+import numpy as np
+
+from minutiae_matcher import DEFAULT_MINUTIAE_TYPES, as_minutiae_array
+
+# Sisi terpanjang pratinjau; gambar yang lebih besar diperkecil sebelum dikirim ke browser
+DISPLAY_MAX_SIDE = 720
+
+# Warna per tipe minutiae (RGB), sama dengan legenda tampilan sebelumnya
+MINUTIAE_COLORS = {
+    'ridge_ending': (255, 0, 0),
+    'bifurcation': (0, 128, 0),
+    'ridge_start': (0, 0, 255)
+}
+OTHER_COLOR = (255, 255, 0)
+
+MINUTIAE_LEGEND = "🔴 Ridge Ending · 🟢 Bifurcation · 🔵 Ridge Start"
+
+
+def display_factor(shape, max_side=DISPLAY_MAX_SIDE):
+    """Faktor pengecilan agar sisi terpanjang tidak melebihi max_side (1 jika sudah kecil)"""
+    return max(max(shape[:2]) / max_side, 1.0)
+
+
+def to_display(image, max_side=DISPLAY_MAX_SIDE):
+    """Pratinjau uint8 (grayscale atau RGB) seukuran layar beserta faktor pengecilannya"""
+    factor = display_factor(image.shape, max_side)
+    thin = image.dtype == bool
+    if thin:
+        image = image.astype(np.uint8) * 255
+    elif len(image.shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    if factor > 1:
+        size = (max(1, round(image.shape[1] / factor)), max(1, round(image.shape[0] / factor)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        if thin:
+            # Garis skeleton 1 piksel memudar saat dirata-rata; kontras dinaikkan kembali
+            image = cv2.convertScaleAbs(image, alpha=factor)
+    return image, factor
+
+
+def draw_minutiae(image, minutiae, scale=1, max_side=DISPLAY_MAX_SIDE,
+                  minutiae_types=DEFAULT_MINUTIAE_TYPES, limit=None):
+    """Overlay titik minutiae pada pratinjau gambar
+
+    scale adalah faktor antara koordinat minutiae dan gambar yang diberikan
+    (preview_scale untuk scan besar yang diproses per tile).
+    """
+    preview, factor = to_display(image, max_side)
+    if preview.ndim == 2:
+        preview = cv2.cvtColor(preview, cv2.COLOR_GRAY2RGB)
+    else:
+        preview = preview.copy()
+
+    minutiae = as_minutiae_array(minutiae, minutiae_types)
+    if limit is not None:
+        minutiae = minutiae[:limit]
+    if len(minutiae) == 0:
+        return preview
+
+    colors = {code: MINUTIAE_COLORS.get(name, OTHER_COLOR) for name, code in minutiae_types.items()}
+    radius = max(3, round(min(preview.shape[:2]) / 150))
+    xs = np.rint(minutiae['x'] / (scale * factor)).astype(np.int64)
+    ys = np.rint(minutiae['y'] / (scale * factor)).astype(np.int64)
+
+    for x, y, code in zip(xs.tolist(), ys.tolist(), minutiae['type'].tolist()):
+        cv2.circle(preview, (x, y), radius + 1, (255, 255, 255), -1, cv2.LINE_AA)
+        cv2.circle(preview, (x, y), radius, colors.get(code, OTHER_COLOR), -1, cv2.LINE_AA)
+    return preview
+
+
+def draw_quality(image, quality_map, block_size, roi, scale=1, max_side=DISPLAY_MAX_SIDE, alpha=0.4):
+    """Peta kualitas per blok (biru = rendah, merah = tinggi) dan kotak ROI di atas pratinjau
+
+    block_size dan roi dalam piksel resolusi penuh; scale seperti pada draw_minutiae.
+    """
+    preview, factor = to_display(image, max_side)
+    if preview.ndim == 2:
+        preview = cv2.cvtColor(preview, cv2.COLOR_GRAY2RGB)
+    else:
+        preview = preview.copy()
+
+    step = scale * factor
+    if quality_map.size:
+        heat = cv2.applyColorMap(np.clip(quality_map * 255, 0, 255).astype(np.uint8), cv2.COLORMAP_JET)
+        heat = cv2.cvtColor(heat, cv2.COLOR_BGR2RGB)
+        height = min(max(1, round(quality_map.shape[0] * block_size / step)), preview.shape[0])
+        width = min(max(1, round(quality_map.shape[1] * block_size / step)), preview.shape[1])
+        heat = cv2.resize(heat, (width, height), interpolation=cv2.INTER_NEAREST)
+        region = preview[:height, :width]
+        preview[:height, :width] = cv2.addWeighted(region, 1 - alpha, heat, alpha, 0)
+
+    x0, y0, x1, y1 = (round(value / step) for value in roi)
+    cv2.rectangle(preview, (x0, y0), (max(x0, x1 - 1), max(y0, y1 - 1)), (255, 255, 255), 2)
+    return preview
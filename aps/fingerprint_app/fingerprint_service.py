@@ -0,0 +1,472 @@
+"""Layanan analisis sidik jari asinkron (HTTP + asyncio) dengan antrean job dan worker pool terbatas
+
+Endpoint:
+    POST /submit?filename=...   body: gambar            -> 202 {"job_id": ...}
+    GET  /status/<job_id>                               -> status job dan hasilnya jika selesai
+    GET  /status                                        -> statistik layanan
+    GET  /metrics                                       -> metrik per tahap (format Prometheus)
+    POST /analyze?filename=...  body: gambar            -> hasil analisis (menunggu job selesai)
+    POST /compare               body: JSON              -> hasil compare_fingerprints
+
+Body gambar berupa bytes gambar mentah (parameter default), atau JSON
+{"image": base64, "params": {...}} dengan Content-Type application/json untuk
+menimpa FingerprintAnalyzer.params pada job itu. Body /compare dapat memuat
+"match_params" dengan cara yang sama.
+
+Jika antrean penuh, layanan menjawab 503 dengan header Retry-After (backpressure).
+Gambar dengan skor kualitas di bawah ambang ditolak dengan 422 beserta quality_score.
+Gambar yang tidak dapat di-decode atau input perbandingan yang tidak valid dijawab 400.
+
+Contoh:
+    python fingerprint_service.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, quote, urlsplit
+
+import cv2
+import numpy as np
+
+from fingerprint_analyzer import FingerprintAnalyzer
+from fingerprint_quality import LowQualityError
+from fingerprint_template import decode_template, encode_template, template_to_fp_data
+from minutiae_engine import minutiae_to_dicts
+from minutiae_matcher import as_minutiae_array
+from pipeline_profiler import REGISTRY, MetricsRegistry, RequestProfile, add_stages, profile_request
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+JOB_HISTORY = 1000
+IMAGE_FIELDS = ('enhanced',)
+# Mask bit-packed (packed_skeleton) dikirim apa adanya, satu baris = ceil(mask_width / 8) byte
+MASK_FIELDS = ('binary_bits', 'skeleton_bits')
+SCALAR_FIELDS = (
+    'pattern', 'pattern_confidence', 'hand', 'hand_confidence', 'minutiae_count',
+    'predicted_finger', 'finger_confidence', 'finger_probabilities', 'preview_scale',
+    'quality_score', 'roi', 'mask_width', 'pruning'
+)
+
+HTTP_REASONS = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+    500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'
+}
+
+# Analyzer dan registry metrik per proses worker
+_worker_analyzer = None
+_worker_registry = MetricsRegistry()
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = FingerprintAnalyzer()
+    cv2.setNumThreads(1)
+
+
+def encode_analysis(analysis, minutiae_types):
+    """Hasil analyze_image -> payload JSON (citra sebagai PNG base64, minutiae sebagai template biner)"""
+    payload = {name: analysis[name] for name in SCALAR_FIELDS}
+    payload['images'] = {}
+    for name in IMAGE_FIELDS:
+        ok, png = cv2.imencode('.png', analysis[name])
+        payload['images'][name] = base64.b64encode(png.tobytes()).decode('ascii')
+    payload['masks'] = {name: base64.b64encode(analysis[name].tobytes()).decode('ascii')
+                        for name in MASK_FIELDS}
+
+    height, width = analysis['binary_bits'].shape[0], analysis['mask_width']
+    template = encode_template(analysis['minutiae_array'], analysis['pattern'], analysis['hand'],
+                               width=width, height=height, minutiae_types=minutiae_types)
+    payload['template'] = base64.b64encode(template).decode('ascii')
+    return payload
+
+
+def decode_analysis(payload, minutiae_types):
+    """Payload JSON -> dict dengan struktur yang sama seperti analyze_image"""
+    analysis = {name: payload[name] for name in SCALAR_FIELDS}
+    add_stages(payload.get('timings', []))
+    for name, encoded in payload['images'].items():
+        png = np.frombuffer(base64.b64decode(encoded), dtype=np.uint8)
+        analysis[name] = cv2.imdecode(png, cv2.IMREAD_UNCHANGED)
+    row_bytes = -(-analysis['mask_width'] // 8)
+    for name, encoded in payload['masks'].items():
+        analysis[name] = np.frombuffer(base64.b64decode(encoded), dtype=np.uint8).reshape(-1, row_bytes)
+
+    template = decode_template(base64.b64decode(payload['template']))
+    fp_data = template_to_fp_data(template, minutiae_types)
+    analysis['minutiae'] = analysis['minutiae_array'] = fp_data['minutiae_array']
+    return analysis
+
+
+def _analyze_job(data, params=None):
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("gambar tidak dapat dibaca")
+    analyzer = _worker_analyzer.configured(params)
+    with profile_request('analyze', registry=_worker_registry) as profile:
+        analysis = analyzer.analyze_image(image)
+    payload = encode_analysis(analysis, analyzer.minutiae_types)
+    payload['image_dimensions'] = list(image.shape)
+    payload['timings'] = profile.stages
+    return payload
+
+
+def _compare_job(fp1_data, fp2_data, match_params=None):
+    analyzer = _worker_analyzer.configured(match_params=match_params)
+    with profile_request('compare', registry=_worker_registry) as profile:
+        result = analyzer.compare_fingerprints(fp1_data, fp2_data)
+    result['timings'] = profile.stages
+    return result
+
+
+def checked_params(values, defaults, kind='parameter'):
+    """Parameter analyzer dari request; nama yang tidak ada di defaults ditolak dengan ValueError"""
+    values = values or {}
+    if not isinstance(values, dict):
+        raise ValueError(f"{kind} harus berupa objek JSON")
+    unknown = sorted(set(values) - set(defaults))
+    if unknown:
+        raise ValueError(f"{kind} tidak dikenal: {', '.join(unknown)}")
+    return values
+
+
+class ServiceBusyError(RuntimeError):
+    """Antrean layanan penuh; coba lagi setelah retry_after detik"""
+
+    def __init__(self, retry_after=1):
+        super().__init__(f"layanan analisis sibuk, coba lagi dalam {retry_after} detik")
+        self.retry_after = retry_after
+
+
+class AnalysisService:
+    """Antrean job terbatas di depan ProcessPoolExecutor berisi FingerprintAnalyzer"""
+
+    def __init__(self, workers=None, queue_size=64, job_timeout=300):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.job_timeout = job_timeout
+        self.jobs = OrderedDict()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._queue = None
+        self._pool = None
+        self._dispatchers = []
+        # Nama parameter yang boleh ditimpa per job
+        defaults = FingerprintAnalyzer()
+        self.params = defaults.params
+        self.match_params = defaults.match_params
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, kind, *args):
+        """Memasukkan job ke antrean; ServiceBusyError jika antrean penuh"""
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'future': asyncio.get_running_loop().create_future()
+        }
+        try:
+            self._queue.put_nowait((job, args))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ServiceBusyError(retry_after=max(1, self._queue.qsize() // self.workers))
+
+        self.jobs[job['job_id']] = job
+        while len(self.jobs) > JOB_HISTORY:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest['status'] in ('queued', 'running'):
+                break
+            del self.jobs[oldest_id]
+        return job
+
+    async def wait(self, job):
+        return await asyncio.wait_for(asyncio.shield(job['future']), self.job_timeout)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        functions = {'analyze': _analyze_job, 'compare': _compare_job}
+        while True:
+            job, args = await self._queue.get()
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            try:
+                result = await loop.run_in_executor(self._pool, functions[job['kind']], *args)
+                job['status'] = 'done'
+                job['result'] = result
+                self.completed += 1
+                self._observe(job, result)
+                job['future'].set_result(result)
+            except Exception as exc:
+                job['status'] = 'failed'
+                job['error'] = f"{type(exc).__name__}: {exc}"
+                self.failed += 1
+                job['future'].set_exception(exc)
+                # Hasil gagal tetap bisa dibaca lewat /status tanpa memicu peringatan asyncio
+                job['future'].exception()
+            finally:
+                job['finished_at'] = time.time()
+                self._queue.task_done()
+
+    def _observe(self, job, result):
+        """Mencatat waktu tahap dari worker ke registry metrik proses layanan"""
+        profile = RequestProfile(job['kind'])
+        profile.wall_ms = (time.time() - job['started_at']) * 1000
+        profile.cpu_ms = sum(record['cpu_ms'] for record in result.get('timings', []))
+        profile.stages = result.get('timings', [])
+        REGISTRY.observe(profile)
+
+    def job_status(self, job):
+        status = {key: job[key] for key in ('job_id', 'kind', 'status', 'submitted_at')}
+        for key in ('started_at', 'finished_at', 'error', 'result'):
+            if key in job:
+                status[key] = job[key]
+        return status
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'queued': self._queue.qsize(),
+            'running': sum(1 for job in self.jobs.values() if job['status'] == 'running'),
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected
+        }
+
+    async def handle_connection(self, reader, writer):
+        """Satu request HTTP/1.1 per koneksi"""
+        try:
+            status, payload, headers = await self._handle_request(reader)
+        except Exception as exc:
+            status, payload, headers = 500, {'error': f"{type(exc).__name__}: {exc}"}, {}
+
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            body = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        head = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        if not request_line:
+            return 400, {'error': 'request kosong'}, {}
+        method, target = request_line.split(' ')[:2]
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            return 413, {'error': 'body terlalu besar'}, {}
+        body = await reader.readexactly(length) if length else b''
+
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        return await self._route(method, url.path.rstrip('/') or '/', query, body,
+                                 headers.get('content-type', ''))
+
+    async def _route(self, method, path, query, body, content_type=''):
+        if path == '/status' and method == 'GET':
+            return 200, self.stats(), {}
+
+        if path == '/metrics' and method == 'GET':
+            return 200, REGISTRY.prometheus_text(), {}
+
+        if path.startswith('/status/') and method == 'GET':
+            job = self.jobs.get(path[len('/status/'):])
+            if job is None:
+                return 404, {'error': 'job tidak ditemukan'}, {}
+            return 200, self.job_status(job), {}
+
+        if path in ('/submit', '/analyze', '/compare') and method != 'POST':
+            return 405, {'error': 'gunakan POST'}, {}
+
+        try:
+            if path in ('/submit', '/analyze'):
+                image_bytes, params = self._analysis_input(body, content_type)
+                if not image_bytes:
+                    return 400, {'error': 'body gambar kosong'}, {}
+                job = self.submit('analyze', image_bytes, params)
+                job['filename'] = query.get('filename', [''])[0]
+                if path == '/submit':
+                    return 202, {'job_id': job['job_id'], 'status': job['status']}, {}
+            elif path == '/compare':
+                request = json.loads(body or b'{}')
+                fp1_data = self._comparison_input(request, 'reference')
+                fp2_data = self._comparison_input(request, 'latent')
+                match_params = checked_params(request.get('match_params'), self.match_params, 'match_params')
+                job = self.submit('compare', fp1_data, fp2_data, match_params)
+            else:
+                return 404, {'error': 'endpoint tidak dikenal'}, {}
+        except ServiceBusyError as exc:
+            return 503, {'error': str(exc)}, {'Retry-After': str(exc.retry_after)}
+        except (ValueError, KeyError) as exc:
+            return 400, {'error': f"{type(exc).__name__}: {exc}"}, {}
+
+        try:
+            result = await self.wait(job)
+        except asyncio.TimeoutError:
+            return 504, {'job_id': job['job_id'], 'error': 'job belum selesai'}, {}
+        except LowQualityError as exc:
+            return 422, {'error': str(exc), 'quality_score': exc.score, 'min_quality': exc.threshold}, {}
+        except ValueError as exc:
+            # Input klien yang tidak dapat diproses (mis. gambar tidak dapat di-decode), bukan kegagalan layanan
+            return 400, {'job_id': job['job_id'], 'error': str(exc)}, {}
+        except Exception:
+            return 500, self.job_status(job), {}
+        return 200, result, {}
+
+    def _analysis_input(self, body, content_type):
+        """Bytes gambar dan parameter job dari body mentah atau JSON {"image", "params"}"""
+        if not content_type.startswith('application/json'):
+            return body, None
+        request = json.loads(body or b'{}')
+        return (base64.b64decode(request.get('image', '')),
+                checked_params(request.get('params'), self.params, 'params'))
+
+    def _comparison_input(self, request, role):
+        """Data sidik jari untuk perbandingan: dari job analisis yang selesai atau dari request"""
+        job_id = request.get(f'{role}_job')
+        if job_id:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] != 'done':
+                raise ValueError(f"job {role} belum selesai atau tidak ditemukan")
+            result = job['result']
+            template = decode_template(base64.b64decode(result['template']))
+            return {'minutiae': template_to_fp_data(template)['minutiae_array'],
+                    'pattern': result['pattern']}
+        data = request[role]
+        return {'minutiae': data.get('minutiae', []), 'pattern': data.get('pattern', 'Tidak Diketahui')}
+
+
+class FingerprintServiceClient:
+    """Klien HTTP sederhana untuk AnalysisService (dipakai halaman Streamlit)"""
+
+    def __init__(self, base_url, timeout=300, retries=3):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.minutiae_types = FingerprintAnalyzer().minutiae_types
+
+    def _request(self, method, path, body=None, content_type='application/octet-stream'):
+        for attempt in range(self.retries + 1):
+            request = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                             headers={'Content-Type': content_type})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as exc:
+                if exc.code == 503 and attempt < self.retries:
+                    time.sleep(int(exc.headers.get('Retry-After', 1)))
+                    continue
+                body = json.loads(exc.read() or b'{}')
+                detail = body.get('error', exc.reason)
+                if exc.code == 422 and 'quality_score' in body:
+                    raise LowQualityError(body['quality_score'], body['min_quality']) from exc
+                if exc.code == 503:
+                    raise ServiceBusyError(int(exc.headers.get('Retry-After', 1))) from exc
+                if exc.code == 400:
+                    raise ValueError(detail) from exc
+                raise RuntimeError(f"layanan analisis gagal ({exc.code}): {detail}") from exc
+
+    def analyze(self, file_bytes, filename='', params=None):
+        """Analisis gambar di layanan, hasil berstruktur sama seperti analyze_image
+
+        params (mis. analyzer.params sesi) menimpa parameter analyzer worker untuk job ini.
+        """
+        path = f'/analyze?filename={quote(filename)}'
+        if params is None:
+            payload = self._request('POST', path, bytes(file_bytes))
+        else:
+            body = json.dumps({'image': base64.b64encode(bytes(file_bytes)).decode('ascii'),
+                               'params': params}).encode('utf-8')
+            payload = self._request('POST', path, body, 'application/json')
+        return decode_analysis(payload, self.minutiae_types)
+
+    def compare(self, fp1_data, fp2_data, match_params=None):
+        """compare_fingerprints di layanan menggunakan minutiae dan pola kedua sidik jari
+
+        match_params (mis. analyzer.match_params sesi, termasuk matcher) dipakai worker untuk job ini.
+        """
+        def strip(fp_data):
+            minutiae = as_minutiae_array(fp_data['minutiae'], self.minutiae_types)
+            return {
+                'minutiae': minutiae_to_dicts(minutiae, self.minutiae_types),
+                'pattern': fp_data['pattern']
+            }
+        request = {'reference': strip(fp1_data), 'latent': strip(fp2_data)}
+        if match_params is not None:
+            request['match_params'] = match_params
+        body = json.dumps(request).encode('utf-8')
+        result = self._request('POST', '/compare', body, 'application/json')
+        add_stages(result.pop('timings', []))
+        return result
+
+    def status(self):
+        return self._request('GET', '/status')
+
+
+async def serve(host, port, workers, queue_size):
+    service = AnalysisService(workers, queue_size)
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Layanan analisis sidik jari di http://{host}:{port} "
+          f"({service.workers} worker, antrean {queue_size})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan analisis sidik jari asinkron")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="jumlah proses worker (default: jumlah core)")
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help="jumlah job menunggu maksimum sebelum request ditolak (503)")
+    args = parser.parse_args(argv)
+    # Satu baris JSON per request dari logger fingerprint.pipeline
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    asyncio.run(serve(args.host, args.port, args.workers, args.queue_size))
+
+
+if __name__ == '__main__':
+    main()
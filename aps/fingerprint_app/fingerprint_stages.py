@@ -0,0 +1,206 @@
+"""Pipeline analisis bertahap dengan cache keluaran per tahap
+
+Kunci setiap tahap dibentuk dari kunci tahap induknya ditambah parameter yang
+benar-benar dibaca tahap itu (STAGE_PARAMS):
+
+    enhanced -> binary -> skeleton -> minutiae -> pruning --+
+                  |                                         +--> comparison
+                  +-------> pattern ------------------------+
+    quality (ROI dan mask) -> skeleton, minutiae, pattern
+
+Mengubah satu parameter hanya mengubah kunci tahap pemakainya dan tahap di
+hilirnya; tahap di hulu tetap diambil dari cache. Contoh: radius pencocokan
+hanya dibaca tahap comparison, sehingga skor dihitung ulang dalam hitungan
+milidetik tanpa skeletonisasi ulang. min_quality tidak dibaca tahap mana pun:
+skor kualitas yang sudah di-cache hanya dibandingkan ulang dengan ambangnya.
+
+Scan besar (di atas tile_min_pixels) memakai satu tahap 'tiled' pengganti
+enhanced/binary, karena preprocessing per tile menghasilkan keduanya sekaligus.
+
+Hanya array yang dipakai tahap hilir atau tampilan yang disimpan: binary dan
+skeleton bit-packed (packed_skeleton), enhanced untuk latar overlay, tanpa
+citra grayscale (equalize cukup murah untuk dihitung ulang saat ditampilkan).
+"""
+import hashlib
+import json
+
+from fingerprint_cache import AnalysisCache, cache_key
+from packed_skeleton import pack_mask
+from pipeline_profiler import stage
+
+# Tahap induk setiap tahap
+STAGE_INPUTS = {
+    'enhanced': (),
+    'binary': ('enhanced',),
+    'tiled': (),
+    'quality': (),
+    'skeleton': ('binary', 'quality'),
+    'minutiae': ('skeleton', 'quality'),
+    'pruning': ('minutiae',),
+    'pattern': ('binary', 'quality'),
+    'comparison': ('pruning', 'pattern')
+}
+
+# Parameter (analyzer.params atau analyzer.match_params) yang dibaca setiap tahap
+STAGE_PARAMS = {
+    'enhanced': ('enhancement', 'gabor_block_size'),
+    'binary': ('threshold_block_size', 'threshold_c', 'close_kernel_size'),
+    'tiled': ('enhancement', 'gabor_block_size', 'threshold_block_size', 'threshold_c',
+              'close_kernel_size', 'tile_size', 'pyramid_levels'),
+    'quality': ('quality_block_size', 'tile_min_pixels', 'pyramid_levels'),
+    'skeleton': (),
+    'minutiae': (),
+    'pruning': ('prune_branch_length', 'prune_min_distance'),
+    'pattern': ('orientation_block_size', 'tile_min_pixels'),
+    'comparison': ('match_radius', 'score_high', 'score_medium', 'align', 'matcher')
+}
+
+
+def downstream_stages(param):
+    """Tahap yang harus dihitung ulang jika parameter param berubah, urut seperti pipeline"""
+    affected = {name for name, params in STAGE_PARAMS.items() if param in params}
+    changed = True
+    while changed:
+        changed = False
+        for name, inputs in STAGE_INPUTS.items():
+            if name not in affected and affected.intersection(inputs):
+                affected.add(name)
+                changed = True
+    return [name for name in STAGE_INPUTS if name in affected]
+
+
+def stage_key(name, parent_keys, params):
+    """Kunci cache satu tahap: nama, kunci induk, dan nilai parameter yang dibacanya"""
+    payload = json.dumps([name, list(parent_keys), params], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StagedPipeline:
+    """Analisis per tahap di atas FingerprintAnalyzer; setiap keluaran tahap di-cache terpisah"""
+
+    def __init__(self, analyzer, cache=None):
+        self.analyzer = analyzer
+        self.cache = cache if cache is not None else AnalysisCache()
+
+    def _params(self, name):
+        values = dict(self.analyzer.params, **self.analyzer.match_params)
+        return {param: values[param] for param in STAGE_PARAMS[name]}
+
+    def _run(self, name, parent_keys, compute):
+        key = stage_key(name, parent_keys, self._params(name))
+        return self.cache.get_or_compute(key, compute), key
+
+    def analyze(self, image, progress=None):
+        """Hasil setara analyze_image, ditambah 'stage_keys' untuk compare
+
+        progress(tahap, selesai, total) dipanggil setelah setiap tahap selesai
+        (dihitung atau diambil dari cache), di thread yang menjalankan analyze.
+        """
+        analyzer = self.analyzer
+        image_key = cache_key(image, {})
+        rows, cols = image.shape[:2]
+        tiled = rows * cols > analyzer.params['tile_min_pixels']
+
+        # quality, tiled atau enhanced + binary, skeleton, minutiae, pruning, pattern
+        total = 6 if tiled else 7
+        done = 0
+
+        def run(name, parent_keys, compute):
+            nonlocal done
+            result = self._run(name, parent_keys, compute)
+            done += 1
+            if progress is not None:
+                progress(name, done, total)
+            return result
+
+        # Gambar berkualitas rendah ditolak sebelum preprocessing (LowQualityError)
+        quality, quality_key = run('quality', [image_key], lambda: analyzer.assess_quality(image))
+        analyzer.check_quality(quality)
+
+        if tiled:
+            def preprocess_tiled():
+                _, enhanced, binary, pyramid = analyzer.preprocess_image_tiled(image)
+                entry = {'enhanced': enhanced, 'binary_bits': pack_mask(binary)}
+                entry.update({f'pyramid_{level}': layer for level, layer in enumerate(pyramid, start=1)})
+                return entry
+
+            pre, binary_key = run('tiled', [image_key], preprocess_tiled)
+            levels = sum(name.startswith('pyramid_') for name in pre)
+            pyramid = [pre[f'pyramid_{level}'] for level in range(1, levels + 1)]
+            enhanced, binary_bits = pre['enhanced'], pre['binary_bits']
+            preview_scale = 2 ** len(pyramid)
+        else:
+            enhanced_entry, enhanced_key = run(
+                'enhanced', [image_key], lambda: {'enhanced': analyzer.enhance(analyzer.equalize(image))}
+            )
+            enhanced = enhanced_entry['enhanced']
+            binary_entry, binary_key = run(
+                'binary', [enhanced_key], lambda: {'binary_bits': pack_mask(analyzer.binarize(enhanced))}
+            )
+            binary_bits = binary_entry['binary_bits']
+            pyramid = []
+            preview_scale = 1
+
+        skeleton_entry, skeleton_key = run(
+            'skeleton', [binary_key, quality_key],
+            lambda: {'skeleton_bits': analyzer.skeletonize_roi(binary_bits, quality)}
+        )
+        skeleton_bits = skeleton_entry['skeleton_bits']
+
+        minutiae_entry, minutiae_key = run(
+            'minutiae', [skeleton_key, quality_key],
+            lambda: {'minutiae_array': analyzer.minutiae_in_roi(skeleton_bits, cols, quality)}
+        )
+
+        def prune():
+            minutiae, report = analyzer.prune_minutiae(minutiae_entry['minutiae_array'], skeleton_bits,
+                                                       cols, quality)
+            return {'minutiae_array': minutiae, 'pruning': report}
+
+        # Induk pruning cukup kunci minutiae: kunci itu sudah memuat kunci skeleton dan quality
+        pruning_entry, pruning_key = run('pruning', [minutiae_key], prune)
+        minutiae_array = pruning_entry['minutiae_array']
+
+        def classify():
+            pattern_input, pattern_block = analyzer.pattern_input(binary_bits, cols, pyramid, quality)
+            with stage('pattern'):
+                pattern, confidence, hand, hand_confidence = analyzer.analyze_pattern(pattern_input, pattern_block)
+            return {'pattern': pattern, 'pattern_confidence': confidence,
+                    'hand': hand, 'hand_confidence': hand_confidence}
+
+        pattern_entry, pattern_key = run('pattern', [binary_key, quality_key], classify)
+
+        with stage('finger'):
+            predicted_finger, finger_confidence, finger_probs = analyzer.predict_finger(
+                pattern_entry['pattern'], pattern_entry['hand'], len(minutiae_array)
+            )
+        return dict(
+            pattern_entry,
+            enhanced=enhanced,
+            binary_bits=binary_bits,
+            skeleton_bits=skeleton_bits,
+            mask_width=cols,
+            preview_scale=preview_scale,
+            minutiae=minutiae_array,
+            minutiae_array=minutiae_array,
+            minutiae_count=len(minutiae_array),
+            pruning=pruning_entry['pruning'],
+            predicted_finger=predicted_finger,
+            finger_confidence=finger_confidence,
+            finger_probabilities=finger_probs,
+            quality_score=quality['score'],
+            quality_map=quality['quality_map'],
+            roi=quality['roi'],
+            stage_keys={'pruning': pruning_key, 'pattern': pattern_key}
+        )
+
+    def compare(self, fp1_data, fp2_data):
+        """compare_fingerprints dengan cache; tanpa stage_keys (mis. hasil layanan) dihitung langsung"""
+        keys1, keys2 = fp1_data.get('stage_keys'), fp2_data.get('stage_keys')
+        if not keys1 or not keys2:
+            return self.analyzer.compare_fingerprints(fp1_data, fp2_data)
+
+        parent_keys = [keys1['pruning'], keys1['pattern'], keys2['pruning'], keys2['pattern']]
+        result, _ = self._run('comparison', parent_keys,
+                              lambda: self.analyzer.compare_fingerprints(fp1_data, fp2_data))
+        return result
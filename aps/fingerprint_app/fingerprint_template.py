@@ -0,0 +1,230 @@
+"""Format template sidik jari biner yang ringkas dan berversi, dapat dibaca zero-copy
+
+Satu template = header 32 byte + record minutiae 8 byte (x, y, angle, type, quality).
+File koleksi = header koleksi + template berurutan + tabel offset di akhir file,
+sehingga jutaan template dapat dipindai lewat np.memmap tanpa unpickling.
+"""
+import os
+import struct
+
+import numpy as np
+
+from minutiae_engine import MINUTIAE_DTYPE, minutiae_to_dicts
+from minutiae_matcher import DEFAULT_MINUTIAE_TYPES, as_minutiae_array
+
+TEMPLATE_MAGIC = b'FPTM'
+TEMPLATE_VERSION = 1
+
+COLLECTION_MAGIC = b'FPTC'
+COLLECTION_VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('header_size', '<u2'),
+    ('width', '<u2'),
+    ('height', '<u2'),
+    ('dpi', '<u2'),
+    ('pattern', 'u1'),
+    ('hand', 'u1'),
+    ('count', '<u4'),
+    ('reserved', 'S12'),
+])
+
+RECORD_DTYPE = np.dtype([
+    ('x', '<u2'),
+    ('y', '<u2'),
+    ('angle', '<u2'),      # sudut terkuantisasi: 65536 langkah per 2*pi
+    ('type', 'u1'),
+    ('quality', 'u1'),
+])
+
+# Header koleksi: magic, versi, jumlah template; footer: offset tabel offset
+_COLLECTION_HEADER = struct.Struct('<4sHxxQ')
+_COLLECTION_FOOTER = struct.Struct('<Q4s')
+
+PATTERN_CODES = {'Tidak Diketahui': 0, 'Loop': 1, 'Whorl': 2, 'Arch': 3, 'Tented Arch': 4}
+HAND_CODES = {'Tidak Diketahui': 0, 'Kanan': 1, 'Kiri': 2}
+PATTERN_NAMES = {code: name for name, code in PATTERN_CODES.items()}
+HAND_NAMES = {code: name for name, code in HAND_CODES.items()}
+
+_ANGLE_SCALE = 65536 / (2 * np.pi)
+_UINT16_MAX = 65535
+
+
+def _check_uint16(name, values):
+    """ValueError jika ada nilai di luar rentang field <u2 (0..65535), daripada membungkus diam-diam"""
+    values = np.asarray(values)
+    if values.size and (values.min() < 0 or values.max() > _UINT16_MAX):
+        raise ValueError(f"{name} harus dalam rentang 0..{_UINT16_MAX}: "
+                         f"{values.min() if values.min() < 0 else values.max()}")
+
+
+def to_records(minutiae, minutiae_types=DEFAULT_MINUTIAE_TYPES):
+    """Konversi minutiae (structured array atau list dict) ke record 8 byte
+
+    ValueError jika koordinat berada di luar 0..65535.
+    """
+    minutiae = as_minutiae_array(minutiae, minutiae_types)
+    _check_uint16('koordinat x', minutiae['x'])
+    _check_uint16('koordinat y', minutiae['y'])
+    records = np.zeros(len(minutiae), dtype=RECORD_DTYPE)
+    records['x'] = minutiae['x']
+    records['y'] = minutiae['y']
+    angle = np.mod(minutiae['angle'].astype(np.float64), 2 * np.pi)
+    records['angle'] = np.round(angle * _ANGLE_SCALE).astype(np.int64) % 65536
+    records['type'] = minutiae['type']
+    return records
+
+
+def from_records(records):
+    """Konversi record 8 byte ke structured array MINUTIAE_DTYPE"""
+    minutiae = np.empty(len(records), dtype=MINUTIAE_DTYPE)
+    minutiae['x'] = records['x']
+    minutiae['y'] = records['y']
+    angle = records['angle'].astype(np.float64) / _ANGLE_SCALE
+    minutiae['angle'] = np.where(angle > np.pi, angle - 2 * np.pi, angle)
+    minutiae['type'] = records['type']
+    return minutiae
+
+
+def encode_template(minutiae, pattern='Tidak Diketahui', hand='Tidak Diketahui',
+                    width=0, height=0, dpi=500, minutiae_types=DEFAULT_MINUTIAE_TYPES):
+    """Menyusun template biner (bytes) dari minutiae dan hasil analisis pola
+
+    ValueError jika koordinat, width, height, atau dpi berada di luar 0..65535.
+    """
+    for name, value in (('width', width), ('height', height), ('dpi', dpi)):
+        _check_uint16(name, value)
+    records = to_records(minutiae, minutiae_types)
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = TEMPLATE_MAGIC
+    header['version'] = TEMPLATE_VERSION
+    header['header_size'] = HEADER_DTYPE.itemsize
+    header['width'] = width
+    header['height'] = height
+    header['dpi'] = dpi
+    header['pattern'] = PATTERN_CODES.get(pattern, 0)
+    header['hand'] = HAND_CODES.get(hand, 0)
+    header['count'] = len(records)
+    return header.tobytes() + records.tobytes()
+
+
+def decode_template(buffer, offset=0):
+    """Membaca template dari buffer tanpa menyalin record minutiae"""
+    header = np.frombuffer(buffer, dtype=HEADER_DTYPE, count=1, offset=offset)[0]
+    if header['magic'] != TEMPLATE_MAGIC:
+        raise ValueError("bukan template sidik jari (magic tidak cocok)")
+    if header['version'] > TEMPLATE_VERSION:
+        raise ValueError(f"versi template {header['version']} tidak didukung")
+
+    records = np.frombuffer(buffer, dtype=RECORD_DTYPE, count=int(header['count']),
+                            offset=offset + int(header['header_size']))
+    return {
+        'pattern': PATTERN_NAMES.get(int(header['pattern']), 'Tidak Diketahui'),
+        'hand': HAND_NAMES.get(int(header['hand']), 'Tidak Diketahui'),
+        'width': int(header['width']),
+        'height': int(header['height']),
+        'dpi': int(header['dpi']),
+        'records': records
+    }
+
+
+def template_to_fp_data(template, minutiae_types=DEFAULT_MINUTIAE_TYPES):
+    """Konversi template ke dict seperti fp_data untuk compare_fingerprints dan plot_minutiae"""
+    minutiae = from_records(template['records'])
+    return {
+        'minutiae': minutiae_to_dicts(minutiae, minutiae_types),
+        'minutiae_array': minutiae,
+        'minutiae_count': len(minutiae),
+        'pattern': template['pattern'],
+        'hand': template['hand'],
+        'image_dimensions': (template['height'], template['width'])
+    }
+
+
+class TemplateWriter:
+    """Menulis banyak template secara berurutan ke satu file koleksi"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path + '.tmp', 'wb')
+        self._file.write(_COLLECTION_HEADER.pack(COLLECTION_MAGIC, COLLECTION_VERSION, 0))
+        self._offsets = []
+
+    def write(self, template_bytes):
+        self._offsets.append(self._file.tell())
+        self._file.write(template_bytes)
+        return len(self._offsets) - 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        table_offset = self._file.tell()
+        self._offsets.append(table_offset)
+        self._file.write(np.asarray(self._offsets, dtype='<u8').tobytes())
+        self._file.write(_COLLECTION_FOOTER.pack(table_offset, COLLECTION_MAGIC))
+
+        # Jumlah template ditulis ulang di header setelah semua template selesai
+        self._file.seek(0)
+        self._file.write(_COLLECTION_HEADER.pack(COLLECTION_MAGIC, COLLECTION_VERSION,
+                                                 len(self._offsets) - 1))
+        self._file.close()
+        os.replace(self.path + '.tmp', self.path)
+
+    def abort(self):
+        """Membuang file sementara; file koleksi lama (jika ada) tidak berubah"""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.remove(self.path + '.tmp')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Koleksi yang terpotong karena exception tidak boleh menggantikan file lama
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class TemplateCollection:
+    """File koleksi template yang di-memory-map; akses per template tanpa salinan"""
+
+    def __init__(self, path):
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, count = _COLLECTION_HEADER.unpack_from(self._data, 0)
+        if magic != COLLECTION_MAGIC:
+            raise ValueError("bukan file koleksi template (magic tidak cocok)")
+        if version > COLLECTION_VERSION:
+            raise ValueError(f"versi koleksi {version} tidak didukung")
+
+        table_offset, _ = _COLLECTION_FOOTER.unpack_from(
+            self._data, len(self._data) - _COLLECTION_FOOTER.size)
+        self.offsets = np.frombuffer(self._data, dtype='<u8', count=count + 1,
+                                     offset=table_offset)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return decode_template(self._data, int(self.offsets[index]))
+
+    def headers(self):
+        """Semua header template sebagai satu structured array (satu operasi gather)"""
+        starts = self.offsets[:-1].astype(np.int64)
+        gather = starts[:, None] + np.arange(HEADER_DTYPE.itemsize)
+        return np.ascontiguousarray(self._data[gather]).view(HEADER_DTYPE).ravel()
+
+    def select(self, pattern=None, hand=None, min_count=0):
+        """Indeks template yang cocok dengan pola/tangan tanpa membaca minutiae"""
+        headers = self.headers()
+        mask = headers['count'] >= min_count
+        if pattern is not None:
+            mask &= headers['pattern'] == PATTERN_CODES.get(pattern, 0)
+        if hand is not None:
+            mask &= headers['hand'] == HAND_CODES.get(hand, 0)
+        return np.nonzero(mask)[0]
@@ -0,0 +1,148 @@
+"""Mesin ekstraksi minutiae tervektorisasi untuk citra skeleton sidik jari"""
+import cv2
+import numpy as np
+
+from packed_skeleton import endings_and_bifurcations, gather, word_coordinates
+
+# Format ringkas minutiae: satu record per titik
+MINUTIAE_DTYPE = np.dtype([
+    ('x', np.int32),
+    ('y', np.int32),
+    ('type', np.uint8),
+    ('angle', np.float32),
+])
+
+# Kernel penjumlahan 8-neighborhood
+_NEIGHBOR_KERNEL = np.ones((3, 3), np.float32)
+
+# Offset jendela 5x5 untuk estimasi orientasi (urutan baris seperti np.where)
+_WIN_DY, _WIN_DX = np.mgrid[-2:3, -2:3]
+_WIN_DY = _WIN_DY.ravel()
+_WIN_DX = _WIN_DX.ravel()
+
+
+def count_neighbors(skeleton):
+    """Menghitung jumlah tetangga ridge untuk setiap piksel skeleton"""
+    skel = skeleton.astype(np.uint8, copy=False)
+    total = cv2.filter2D(skel, cv2.CV_32F, _NEIGHBOR_KERNEL,
+                         borderType=cv2.BORDER_CONSTANT)
+    return total.astype(np.int16) - skel
+
+
+def orientation_at(skeleton, ys, xs):
+    """Orientasi ridge pada sekumpulan titik sekaligus (jendela 5x5)"""
+    angles = np.zeros(len(ys), dtype=np.float64)
+    rows, cols = skeleton.shape
+
+    # Hanya titik dengan jendela 5x5 utuh, sama seperti calculate_orientation
+    inner = (ys > 1) & (ys < rows - 2) & (xs > 1) & (xs < cols - 2)
+    if not inner.any():
+        return angles
+
+    yi = ys[inner]
+    xi = xs[inner]
+    angles[inner] = _window_angles(skeleton[yi[:, None] + _WIN_DY, xi[:, None] + _WIN_DX])
+    return angles
+
+
+def _window_angles(window):
+    """Orientasi dari jendela 5x5 yang sudah diratakan (satu baris per titik)"""
+    window = window.astype(np.int64)
+    n = window.sum(axis=1)
+
+    # Rata-rata indeks baris/kolom dalam jendela, lalu geser ke pusat
+    mean_y = (window * (_WIN_DY + 2)).sum(axis=1) / np.maximum(n, 1)
+    mean_x = (window * (_WIN_DX + 2)).sum(axis=1) / np.maximum(n, 1)
+    return np.where(n > 1, np.arctan2(mean_y - 2, mean_x - 2), 0.0)
+
+
+def extract_minutiae_array(skeleton, minutiae_types):
+    """Ekstraksi minutiae dari skeleton sebagai structured array MINUTIAE_DTYPE"""
+    skel = np.asarray(skeleton).astype(bool, copy=False)
+    if skel.ndim != 2 or min(skel.shape) < 3:
+        return np.empty(0, dtype=MINUTIAE_DTYPE)
+
+    ridge_count = count_neighbors(skel)
+
+    # Piksel tepi tidak diperiksa, sama seperti loop lama
+    candidates = skel.copy()
+    candidates[0, :] = False
+    candidates[-1, :] = False
+    candidates[:, 0] = False
+    candidates[:, -1] = False
+
+    endings = candidates & (ridge_count == 1)
+    bifurcations = candidates & (ridge_count == 3)
+
+    # np.nonzero mengembalikan titik dalam urutan baris, sama seperti loop lama
+    ys, xs = np.nonzero(endings | bifurcations)
+
+    minutiae = np.empty(len(ys), dtype=MINUTIAE_DTYPE)
+    minutiae['x'] = xs
+    minutiae['y'] = ys
+    minutiae['type'] = np.where(endings[ys, xs],
+                                minutiae_types['ridge_ending'],
+                                minutiae_types['bifurcation'])
+    minutiae['angle'] = orientation_at(skel, ys, xs)
+    return minutiae
+
+
+def extract_minutiae_packed(bits, width, minutiae_types, bounds=None):
+    """extract_minutiae_array untuk skeleton bit-packed (packed_skeleton), tanpa membongkarnya
+
+    bounds (x0, y0, x1, y1) memberi hasil yang sama dengan mengekstraksi
+    potongan skeleton[y0:y1, x0:x1], tetapi dalam koordinat citra penuh.
+    """
+    x0, y0, x1, y1 = bounds if bounds is not None else (0, 0, width, bits.shape[0])
+    if min(x1 - x0, y1 - y0) < 3:
+        return np.empty(0, dtype=MINUTIAE_DTYPE)
+
+    endings, bifurcations = endings_and_bifurcations(bits, width, bounds)
+    ending_ys, ending_xs = word_coordinates(endings)
+    bifurcation_ys, bifurcation_xs = word_coordinates(bifurcations)
+
+    # Urutan baris seperti np.nonzero pada skeleton utuh
+    ys = np.concatenate([ending_ys, bifurcation_ys])
+    xs = np.concatenate([ending_xs, bifurcation_xs])
+    is_ending = np.arange(len(ys)) < len(ending_ys)
+    order = np.lexsort((xs, ys))
+    ys, xs, is_ending = ys[order], xs[order], is_ending[order]
+
+    minutiae = np.empty(len(ys), dtype=MINUTIAE_DTYPE)
+    minutiae['x'] = xs
+    minutiae['y'] = ys
+    minutiae['type'] = np.where(is_ending, minutiae_types['ridge_ending'], minutiae_types['bifurcation'])
+
+    # Jendela 5x5 utuh di dalam bounds, sama seperti orientation_at pada potongan
+    angles = np.zeros(len(ys), dtype=np.float64)
+    inner = (ys > y0 + 1) & (ys < y1 - 2) & (xs > x0 + 1) & (xs < x1 - 2)
+    if inner.any():
+        yi, xi = ys[inner], xs[inner]
+        angles[inner] = _window_angles(gather(bits, yi[:, None] + _WIN_DY, xi[:, None] + _WIN_DX))
+    minutiae['angle'] = angles
+    return minutiae
+
+
+def minutiae_to_dicts(minutiae, minutiae_types):
+    """Konversi structured array ke list dict {'x','y','type','orientation'}"""
+    type_names = {code: name for name, code in minutiae_types.items()}
+    return [
+        {
+            'x': int(x),
+            'y': int(y),
+            'type': type_names.get(int(code), 'ridge_ending'),
+            'orientation': float(angle)
+        }
+        for x, y, code, angle in zip(minutiae['x'].tolist(), minutiae['y'].tolist(),
+                                     minutiae['type'].tolist(), minutiae['angle'].tolist())
+    ]
+
+
+def minutiae_from_dicts(minutiae_points, minutiae_types):
+    """Konversi list dict minutiae ke structured array MINUTIAE_DTYPE"""
+    minutiae = np.empty(len(minutiae_points), dtype=MINUTIAE_DTYPE)
+    for idx, m in enumerate(minutiae_points):
+        minutiae[idx] = (m['x'], m['y'],
+                         minutiae_types.get(m['type'], 0),
+                         m.get('orientation', 0.0))
+    return minutiae
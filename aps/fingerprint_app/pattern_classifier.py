@@ -0,0 +1,170 @@
+"""Klasifikasi pola sidik jari dari medan orientasi ridge dan titik singular
+
+Medan orientasi dihitung per blok dari gradien (Sobel) seluruh citra sekaligus.
+Core dan delta dideteksi dengan indeks Poincaré pada grid blok. Semua langkah
+berupa operasi array dengan jumlah pass tetap, sehingga biayanya sebanding
+dengan luas citra dan tidak bergantung pada jumlah kontur atau ridge.
+"""
+import cv2
+import numpy as np
+
+UNKNOWN = 'Tidak Diketahui'
+
+# Batas coherence (rata-rata lokal) untuk blok latar depan
+_MIN_COHERENCE = 0.3
+
+# Delta dianggap "di bawah" core (Tented Arch) jika sudutnya dari vertikal kurang dari ini
+_TENTED_MAX_ANGLE = np.deg2rad(25)
+
+
+def _block_sum(values, block_size):
+    rows = values.shape[0] // block_size
+    cols = values.shape[1] // block_size
+    cropped = values[:rows * block_size, :cols * block_size]
+    return cropped.reshape(rows, block_size, cols, block_size).sum(axis=(1, 3))
+
+
+def orientation_field(image, block_size=16, smooth_sigma=1.0):
+    """Orientasi ridge per blok (radian, modulo pi), coherence, dan energi gradien"""
+    image = image.astype(np.float32)
+    gx = cv2.Sobel(image, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(image, cv2.CV_32F, 0, 1, ksize=3)
+
+    gxx = _block_sum(gx * gx, block_size)
+    gyy = _block_sum(gy * gy, block_size)
+    gxy = _block_sum(gx * gy, block_size)
+
+    # Vektor sudut ganda agar orientasi 0 dan pi dapat dirata-rata dengan benar
+    cos2 = gxx - gyy
+    sin2 = 2 * gxy
+    energy = gxx + gyy
+    coherence = np.sqrt(cos2 ** 2 + sin2 ** 2) / (energy + 1e-6)
+
+    if smooth_sigma > 0:
+        cos2 = cv2.GaussianBlur(cos2, (0, 0), smooth_sigma)
+        sin2 = cv2.GaussianBlur(sin2, (0, 0), smooth_sigma)
+
+    # Arah ridge tegak lurus arah gradien dominan
+    theta = np.mod(0.5 * np.arctan2(sin2, cos2) + np.pi / 2, np.pi)
+    return theta, coherence, energy / block_size ** 2
+
+
+def foreground_mask(coherence, energy):
+    """Blok latar depan: energi gradien cukup dan orientasi lokal konsisten"""
+    if not energy.any():
+        return np.zeros(energy.shape, dtype=bool)
+
+    # Coherence dirata-rata 3x3 blok, karena tepat di core/delta coherence memang rendah
+    local_coherence = cv2.blur(coherence.astype(np.float32), (3, 3))
+    mask = (local_coherence > _MIN_COHERENCE) & (energy > 0.1 * np.percentile(energy, 95))
+    mask = mask.astype(np.uint8)
+
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+    # Erosi selebar lintasan Poincaré terbesar: lintasan di tepi area sidik jari menghasilkan titik palsu
+    mask = cv2.erode(mask, np.ones((5, 5), np.uint8), borderType=cv2.BORDER_CONSTANT, borderValue=0)
+    return mask.astype(bool)
+
+
+def _ring_offsets(radius):
+    """Offset (dy, dx) sepanjang tepi persegi berjari-jari radius, searah jarum jam"""
+    top = [(-radius, dx) for dx in range(-radius, radius)]
+    right = [(dy, radius) for dy in range(-radius, radius)]
+    bottom = [(radius, dx) for dx in range(radius, -radius, -1)]
+    left = [(dy, -radius) for dy in range(radius, -radius, -1)]
+    return top + right + bottom + left
+
+
+def poincare_index(theta, radius=1):
+    """Indeks Poincaré setiap blok (kelipatan 1/2 putaran): +1 core, -1 delta, +2 whorl"""
+    padded = np.pad(theta, radius, mode='edge')
+    rows, cols = theta.shape
+    ring = [padded[radius + dy:radius + dy + rows, radius + dx:radius + dx + cols]
+            for dy, dx in _ring_offsets(radius)]
+
+    total = np.zeros(theta.shape, dtype=np.float64)
+    for current, following in zip(ring, ring[1:] + ring[:1]):
+        delta = following - current
+        # Orientasi periodik pi: selisih dibungkus ke (-pi/2, pi/2]
+        delta = np.where(delta > np.pi / 2, delta - np.pi, delta)
+        delta = np.where(delta <= -np.pi / 2, delta + np.pi, delta)
+        total += delta
+    return np.rint(total / np.pi).astype(np.int8)
+
+
+def _cluster_centers(mask, block_size):
+    """Pusat (x, y) dalam piksel untuk setiap kelompok blok singular yang bersebelahan"""
+    count, _, _, centroids = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=8)
+    return [((cx + 0.5) * block_size, (cy + 0.5) * block_size) for cx, cy in centroids[1:count]]
+
+
+def singular_points(image, block_size=16):
+    """Core, delta, dan pusat whorl beserta coherence rata-rata area sidik jari"""
+    if image.shape[0] < block_size or image.shape[1] < block_size:
+        return None
+
+    theta, coherence, energy = orientation_field(image, block_size)
+    mask = foreground_mask(coherence, energy)
+    if not mask.any():
+        return None
+
+    # Pasangan core-delta palsu akibat noise saling meniadakan pada lintasan yang lebih besar,
+    # jadi hanya blok dengan indeks sama pada lintasan 3x3 dan 5x5 yang dipertahankan
+    index = poincare_index(theta, radius=1)
+    index = np.where(mask & (index == poincare_index(theta, radius=2)), index, 0)
+    return {
+        'cores': _cluster_centers(index == 1, block_size),
+        'deltas': _cluster_centers(index == -1, block_size),
+        'whorls': _cluster_centers(index >= 2, block_size),
+        'coherence': float(coherence[mask].mean()),
+        'mask': mask
+    }
+
+
+def _hand_from_density(binary_image):
+    """Prediksi tangan dari asimetri kepadatan piksel kiri/kanan"""
+    foreground = binary_image > 0
+    half = binary_image.shape[1] // 2
+    left_density = foreground[:, :half].mean() if half else 0.0
+    right_density = foreground[:, half:].mean()
+
+    hand_confidence = min(abs(left_density - right_density) * 2, 1.0)
+    predicted_hand = "Kanan" if right_density > left_density else "Kiri"
+    return predicted_hand, hand_confidence
+
+
+def classify_pattern(image, block_size=16):
+    """Klasifikasi Loop/Whorl/Arch/Tented Arch dan prediksi tangan
+
+    Mengembalikan (pola, confidence, tangan, confidence tangan, titik singular).
+    """
+    points = singular_points(image, block_size)
+    if points is None:
+        return UNKNOWN, 0.5, UNKNOWN, 0.5, None
+
+    cores, deltas = points['cores'], points['deltas']
+    hand, hand_confidence = _hand_from_density(image)
+
+    if points['whorls'] or len(cores) >= 2:
+        pattern, confidence = "Whorl", 0.85 if len(deltas) >= 1 else 0.75
+    elif len(cores) == 1 and deltas:
+        core = np.asarray(cores[0])
+        nearest = np.asarray(min(deltas, key=lambda d: np.hypot(d[0] - core[0], d[1] - core[1])))
+        dx, dy = nearest - core
+        if dy > 0 and np.arctan2(abs(dx), dy) < _TENTED_MAX_ANGLE:
+            pattern, confidence = "Tented Arch", 0.8
+        else:
+            pattern, confidence = "Loop", 0.85
+            # Loop ulnar terbuka ke arah kelingking: delta di kiri core pada tangan kanan
+            hand = "Kanan" if dx < 0 else "Kiri"
+            hand_confidence = 0.65
+    elif len(cores) == 1:
+        # Delta kemungkinan di luar area pemindaian
+        pattern, confidence = "Loop", 0.7
+    elif deltas:
+        pattern, confidence = "Tented Arch", 0.6
+    else:
+        pattern, confidence = "Arch", 0.8
+
+    # Medan orientasi yang kurang konsisten menurunkan keyakinan
+    confidence = float(np.clip(confidence * (0.75 + 0.25 * points['coherence'] / 0.6), 0.5, 0.95))
+    return pattern, confidence, hand, float(hand_confidence), points
@@ -0,0 +1,199 @@
+"""Instrumentasi waktu per tahap pipeline: wall time, CPU time, dan puncak alokasi memori
+
+Pemakaian:
+    with profile_request('analisis_tunggal') as profile:
+        analyzer.analyze_image(image)     # tahap-tahap dicatat lewat stage(...)
+    profile.stages                        # daftar record per tahap
+    REGISTRY.prometheus_text()            # ringkasan p50/p99 per tahap
+"""
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+logger = logging.getLogger('fingerprint.pipeline')
+
+# Profil request aktif pada thread/konteks saat ini (None = instrumentasi mati)
+_current_profile = ContextVar('fingerprint_profile', default=None)
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RequestProfile:
+    """Record tahap-tahap pipeline untuk satu request"""
+
+    def __init__(self, name, trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started_at = time.time()
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        # Tahap dapat dicatat dari thread worker (mis. analisis banyak gambar bertumpuk)
+        self._lock = threading.Lock()
+
+    def add(self, stage, wall_ms, cpu_ms, peak_bytes=None):
+        with self._lock:
+            self._add(stage, wall_ms, cpu_ms, peak_bytes)
+
+    def _add(self, stage, wall_ms, cpu_ms, peak_bytes):
+        # Tahap yang dipanggil berulang (mis. per tile) dijumlahkan menjadi satu record
+        for record in self.stages:
+            if record['stage'] == stage:
+                record['wall_ms'] += wall_ms
+                record['cpu_ms'] += cpu_ms
+                record['calls'] += 1
+                if peak_bytes is not None:
+                    record['peak_bytes'] = max(record['peak_bytes'] or 0, peak_bytes)
+                return
+        self.stages.append({
+            'stage': stage,
+            'wall_ms': wall_ms,
+            'cpu_ms': cpu_ms,
+            'peak_bytes': peak_bytes,
+            'calls': 1
+        })
+
+    def log_line(self):
+        return json.dumps({
+            'event': 'fingerprint_pipeline',
+            'request': self.name,
+            'started_at': self.started_at,
+            'wall_ms': round(self.wall_ms, 3),
+            'cpu_ms': round(self.cpu_ms, 3),
+            'stages': self.stages
+        })
+
+
+@contextmanager
+def stage(name):
+    """Mencatat satu tahap pipeline jika ada profil request aktif; tanpa biaya jika tidak ada"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    tracing = profile.trace_memory and tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+        cpu_ms = (time.thread_time() - cpu_start) * 1000
+        peak_bytes = None
+        if tracing:
+            peak_bytes = max(tracemalloc.get_traced_memory()[1] - base, 0)
+        profile.add(name, wall_ms, cpu_ms, peak_bytes)
+
+
+def add_stages(stages):
+    """Menambahkan record tahap dari proses lain ke profil request aktif (jika ada)"""
+    profile = _current_profile.get()
+    if profile is not None:
+        for record in stages:
+            profile.add(record['stage'], record['wall_ms'], record['cpu_ms'], record.get('peak_bytes'))
+
+
+@contextmanager
+def profile_request(name, registry=None, trace_memory=False):
+    """Mengaktifkan instrumentasi untuk satu request, lalu mencatat log dan metrik"""
+    registry = registry or REGISTRY
+    profile = RequestProfile(name, trace_memory)
+    started_tracing = False
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+
+    token = _current_profile.set(profile)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield profile
+    finally:
+        profile.wall_ms = (time.perf_counter() - wall_start) * 1000
+        profile.cpu_ms = (time.thread_time() - cpu_start) * 1000
+        _current_profile.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+        registry.observe(profile)
+        logger.info(profile.log_line())
+
+
+class MetricsRegistry:
+    """Kumpulan sampel latensi per tahap (reservoir terbatas) untuk p50/p99 dan teks Prometheus"""
+
+    def __init__(self, window=2048):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def observe(self, profile):
+        with self._lock:
+            self._record('request:' + profile.name, profile.wall_ms, profile.cpu_ms)
+            for record in profile.stages:
+                self._record(record['stage'], record['wall_ms'], record['cpu_ms'])
+
+    def _record(self, name, wall_ms, cpu_ms):
+        if name not in self._samples:
+            self._samples[name] = deque(maxlen=self.window)
+            self._totals[name] = [0, 0.0, 0.0]
+        self._samples[name].append(wall_ms)
+        totals = self._totals[name]
+        totals[0] += 1
+        totals[1] += wall_ms
+        totals[2] += cpu_ms
+
+    def summary(self):
+        """Ringkasan per tahap: jumlah, rata-rata, dan kuantil wall time (ms)"""
+        with self._lock:
+            rows = []
+            for name, samples in self._samples.items():
+                count, wall_sum, cpu_sum = self._totals[name]
+                values = np.fromiter(samples, dtype=np.float64)
+                row = {
+                    'stage': name,
+                    'count': count,
+                    'mean_ms': wall_sum / count,
+                    'cpu_mean_ms': cpu_sum / count
+                }
+                for q in QUANTILES:
+                    row[f'p{int(q * 100)}_ms'] = float(np.quantile(values, q))
+                rows.append(row)
+            return rows
+
+    def prometheus_text(self):
+        """Dump metrik dalam format teks eksposisi Prometheus (tipe summary)"""
+        lines = [
+            '# HELP fingerprint_stage_seconds Wall time per tahap pipeline analisis sidik jari',
+            '# TYPE fingerprint_stage_seconds summary'
+        ]
+        cpu_lines = [
+            '# HELP fingerprint_stage_cpu_seconds_total CPU time kumulatif per tahap pipeline',
+            '# TYPE fingerprint_stage_cpu_seconds_total counter'
+        ]
+        for row in self.summary():
+            label = row['stage'].replace('\\', '\\\\').replace('"', '\\"')
+            for q in QUANTILES:
+                value = row[f'p{int(q * 100)}_ms'] / 1000
+                lines.append(f'fingerprint_stage_seconds{{stage="{label}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'fingerprint_stage_seconds_sum{{stage="{label}"}} '
+                         f'{row["mean_ms"] * row["count"] / 1000:.6f}')
+            lines.append(f'fingerprint_stage_seconds_count{{stage="{label}"}} {row["count"]}')
+            cpu_lines.append(f'fingerprint_stage_cpu_seconds_total{{stage="{label}"}} '
+                             f'{row["cpu_mean_ms"] * row["count"] / 1000:.6f}')
+        return '\n'.join(lines + cpu_lines) + '\n'
+
+
+# Registry bersama untuk proses ini
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,67 @@
+"""Uji batch tanpa antarmuka: record penolakan dan melanjutkan batch setelah berhenti
+
+Jalankan dari folder ini: python -m pytest -q test_fingerprint_batch.py
+"""
+import json
+
+import cv2
+import numpy as np
+
+from fingerprint_analyzer import FingerprintAnalyzer
+from fingerprint_batch import load_completed, run_batch
+from fingerprint_cache import params_key
+from synthetic_fingerprint import generate_fingerprint
+
+KEY = params_key(FingerprintAnalyzer().params)
+
+
+def read_records(path):
+    with open(path, encoding='utf-8') as f:
+        return {record['filename']: record for record in map(json.loads, f)}
+
+
+def test_rejections_are_not_retried_on_resume(tmp_path):
+    source = tmp_path / 'scan'
+    source.mkdir()
+    cv2.imwrite(str(source / 'bagus.png'), generate_fingerprint('Loop', size=(320, 288)))
+    cv2.imwrite(str(source / 'kosong.png'), np.full((320, 288), 128, np.uint8))
+    (source / 'rusak.png').write_bytes(b'bukan gambar')
+    output = str(tmp_path / 'hasil.jsonl')
+
+    summary = run_batch(str(source), output, workers=1)
+    assert (summary['processed'], summary['failed'], summary['rejected']) == (3, 0, 2)
+    records = read_records(output)
+    assert records['bagus.png']['minutiae_count'] > 0
+    assert records['kosong.png']['rejected'] == 'low_quality'
+    assert records['kosong.png']['quality_score'] < records['kosong.png']['min_quality']
+    assert records['rusak.png']['rejected'] == 'unreadable'
+    assert {record['params_key'] for record in records.values()} == {KEY}
+
+    # Dijalankan ulang: gambar yang ditolak tidak dianalisis lagi
+    summary = run_batch(str(source), output, workers=1)
+    assert (summary['processed'], summary['skipped'], summary['replaced']) == (0, 3, 0)
+
+    # Parameter lain mengubah hasil gerbang kualitas, jadi penolakan lama ikut diganti
+    summary = run_batch(str(source), output, workers=1, params={'enhancement': 'gabor'})
+    assert (summary['processed'], summary['replaced']) == (3, 3)
+    assert len(read_records(output)) == 3
+
+
+def test_load_completed_keeps_rejections_and_drops_errors(tmp_path):
+    output = tmp_path / 'hasil.jsonl'
+    lines = [
+        {'filename': 'a.png', 'minutiae_count': 40, 'params_key': KEY},
+        {'filename': 'b.png', 'rejected': 'low_quality', 'params_key': KEY},
+        {'filename': 'c.png', 'rejected': 'unreadable', 'params_key': KEY},
+        {'filename': 'd.png', 'error': 'MemoryError: ', 'params_key': KEY},
+        {'filename': 'e.png', 'rejected': 'low_quality', 'params_key': 'parameter-lain'},
+    ]
+    # Baris terakhir terpotong seperti saat proses berhenti di tengah penulisan
+    output.write_text(''.join(json.dumps(line) + '\n' for line in lines) + '{"filename": "f.p',
+                      encoding='utf-8')
+
+    completed, dropped = load_completed(str(output), KEY)
+    assert completed == {'a.png', 'b.png', 'c.png'}
+    assert dropped == 2
+    assert list(read_records(output)) == ['a.png', 'b.png', 'c.png']
+    assert load_completed(str(tmp_path / 'belum_ada.jsonl'), KEY) == (set(), 0)
@@ -0,0 +1,180 @@
+"""Uji galeri persisten: enroll, save, buka ulang, dan pencarian 1:N
+
+Jalankan dari folder ini: python -m pytest -q test_fingerprint_gallery.py
+"""
+import os
+
+import numpy as np
+import pytest
+
+import fingerprint_gallery
+from fingerprint_gallery import (INDEX_IDS_FILE, INDEX_KEYS_FILE, INDEX_MANIFEST_FILE, FingerprintGallery,
+                                 pair_hash_keys)
+from synthetic_fingerprint import synthetic_template
+
+PATTERNS = ('Loop', 'Whorl', 'Arch', 'Tented Arch')
+
+
+def templates(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [synthetic_template(rng, int(rng.integers(20, 60)), size=500) for _ in range(count)]
+
+
+def enroll_all(gallery, minutiae_list, start=0):
+    return gallery.enroll_many([(f'subjek-{start + i}', minutiae, PATTERNS[(start + i) % 4], 'Kanan', None)
+                                for i, minutiae in enumerate(minutiae_list)])
+
+
+def shifted(minutiae, dx=37, dy=-11):
+    # Kunci hash pasangan invarian translasi, jadi salinan bergeser tetap cocok penuh
+    moved = minutiae.copy()
+    moved['x'] += dx
+    moved['y'] += dy
+    return moved
+
+
+def index_pairs(gallery):
+    keys, ids = np.asarray(gallery._index_keys), np.asarray(gallery._index_ids)
+    assert len(keys) == len(ids)
+    assert (np.diff(keys.astype(np.int64)) >= 0).all()
+    return sorted(zip(keys.tolist(), ids.tolist()))
+
+
+def expected_pairs(minutiae_list):
+    return sorted((int(key), template_id) for template_id, minutiae in enumerate(minutiae_list)
+                  for key in pair_hash_keys(minutiae))
+
+
+def test_enroll_save_reopen_search(tmp_path):
+    minutiae_list = templates(30)
+    gallery = FingerprintGallery(str(tmp_path))
+    assert enroll_all(gallery, minutiae_list) == list(range(30))
+    gallery.save()
+
+    reopened = FingerprintGallery(str(tmp_path))
+    assert len(reopened) == 30
+    assert [r['label'] for r in reopened.records] == [f'subjek-{i}' for i in range(30)]
+    for template_id in (0, 17, 29):
+        np.testing.assert_array_equal(reopened.get_template(template_id), minutiae_list[template_id])
+    assert index_pairs(reopened) == expected_pairs(minutiae_list)
+
+    for template_id in (3, 22):
+        results = reopened.search(shifted(minutiae_list[template_id]), top_k=3)
+        assert results[0]['id'] == template_id
+        assert results[0]['similarity_score'] == pytest.approx(100.0)
+
+
+def test_pattern_filter(tmp_path):
+    minutiae_list = templates(12)
+    gallery = FingerprintGallery(str(tmp_path))
+    enroll_all(gallery, minutiae_list)
+    gallery.save()
+    # Template 5 berpola Whorl; dengan filter Loop ia tidak boleh muncul
+    results = gallery.search(minutiae_list[5], pattern='Loop', top_k=12)
+    assert all(r['pattern'] == 'Loop' for r in results)
+    assert gallery.search(minutiae_list[5], pattern='Whorl')[0]['id'] == 5
+
+
+def test_incremental_saves_merge_index(tmp_path):
+    # Beberapa save berturut-turut melewati jalur sisip np.insert ke indeks yang sudah ada
+    minutiae_list = templates(40, seed=1)
+    gallery = FingerprintGallery(str(tmp_path))
+    for start, stop in ((0, 10), (10, 11), (11, 40)):
+        enroll_all(gallery, minutiae_list[start:stop], start)
+        gallery.save()
+        assert index_pairs(gallery) == expected_pairs(minutiae_list[:stop])
+
+    single = FingerprintGallery(str(tmp_path / 'sekaligus'))
+    enroll_all(single, minutiae_list)
+    single.save()
+    reopened = FingerprintGallery(str(tmp_path))
+    np.testing.assert_array_equal(reopened._index_keys, single._index_keys)
+    for template_id in (0, 10, 39):
+        query = shifted(minutiae_list[template_id])
+        assert reopened.search(query) == single.search(query)
+
+    # Hanya generasi indeks terakhir yang tersisa di folder
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith('index_')) == \
+        ['index_ids.3.npy', 'index_keys.3.npy']
+
+
+def test_search_before_save_matches_after(tmp_path):
+    minutiae_list = templates(20, seed=2)
+    gallery = FingerprintGallery(str(tmp_path))
+    enroll_all(gallery, minutiae_list[:8])
+    gallery.save()
+    enroll_all(gallery, minutiae_list[8:], 8)
+
+    # Pencarian tidak menulis ke disk; template pending tetap ditemukan
+    files = sorted(os.listdir(tmp_path))
+    queries = [shifted(minutiae_list[i]) for i in (2, 12, 19)]
+    before = [gallery.search(query) for query in queries]
+    assert sorted(os.listdir(tmp_path)) == files
+    assert [results[0]['id'] for results in before] == [2, 12, 19]
+    np.testing.assert_array_equal(gallery.get_template(12), minutiae_list[12])
+
+    gallery.save()
+    assert [gallery.search(query) for query in queries] == before
+
+
+def test_crash_before_manifest_keeps_last_commit(tmp_path, monkeypatch):
+    minutiae_list = templates(25, seed=3)
+    gallery = FingerprintGallery(str(tmp_path))
+    enroll_all(gallery, minutiae_list[:10])
+    gallery.save()
+
+    # Template, record, dan indeks generasi baru sudah ditulis, tetapi manifest tidak
+    def crash(path, manifest):
+        raise OSError("disk penuh")
+    monkeypatch.setattr(fingerprint_gallery, '_write_manifest', crash)
+    enroll_all(gallery, minutiae_list[10:20], 10)
+    with pytest.raises(OSError):
+        gallery.save()
+    monkeypatch.undo()
+
+    reopened = FingerprintGallery(str(tmp_path))
+    assert len(reopened) == 10
+    assert index_pairs(reopened) == expected_pairs(minutiae_list[:10])
+    assert all(result['id'] < 10 for result in reopened.search(minutiae_list[15]))
+
+    # Save berikutnya memotong sisa tulisan yang belum dikomit sebelum menambah
+    enroll_all(reopened, minutiae_list[20:25], 10)
+    reopened.save()
+    final = FingerprintGallery(str(tmp_path))
+    assert len(final) == 15
+    assert os.path.getsize(tmp_path / 'minutiae.bin') == \
+        sum(len(m) for m in minutiae_list[:10] + minutiae_list[20:25]) * final._templates.dtype.itemsize
+    np.testing.assert_array_equal(final.get_template(12), minutiae_list[22])
+    assert final.search(shifted(minutiae_list[22]))[0]['id'] == 12
+    assert index_pairs(final) == expected_pairs(minutiae_list[:10] + minutiae_list[20:25])
+
+
+def test_legacy_gallery_without_manifest(tmp_path):
+    minutiae_list = templates(12, seed=4)
+    gallery = FingerprintGallery(str(tmp_path))
+    enroll_all(gallery, minutiae_list[:6])
+    gallery.save()
+
+    # Tata letak lama: indeks bernama tetap dan tanpa manifest
+    os.replace(tmp_path / 'index_keys.1.npy', tmp_path / INDEX_KEYS_FILE)
+    os.replace(tmp_path / 'index_ids.1.npy', tmp_path / INDEX_IDS_FILE)
+    os.remove(tmp_path / INDEX_MANIFEST_FILE)
+
+    legacy = FingerprintGallery(str(tmp_path))
+    assert len(legacy) == 6
+    assert legacy.search(minutiae_list[4])[0]['id'] == 4
+
+    enroll_all(legacy, minutiae_list[6:], 6)
+    legacy.save()
+    assert not (tmp_path / INDEX_KEYS_FILE).exists()
+    reopened = FingerprintGallery(str(tmp_path))
+    assert index_pairs(reopened) == expected_pairs(minutiae_list)
+    assert reopened.search(minutiae_list[9])[0]['id'] == 9
+
+
+def test_empty_gallery(tmp_path):
+    gallery = FingerprintGallery(str(tmp_path))
+    gallery.save()
+    assert not (tmp_path / INDEX_MANIFEST_FILE).exists()
+    assert gallery.search(templates(1)[0]) == []
+    assert len(FingerprintGallery(str(tmp_path))) == 0
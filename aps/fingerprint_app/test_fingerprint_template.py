@@ -0,0 +1,174 @@
+"""Uji format template biner: round-trip, kuantisasi sudut, dan file koleksi
+
+Tata letak byte dipatok di sini; perubahan yang tidak disengaja pada header,
+record, atau footer koleksi akan membuat file lama tidak terbaca.
+
+Jalankan dari folder ini: python -m pytest -q test_fingerprint_template.py
+"""
+import struct
+
+import numpy as np
+import pytest
+
+from fingerprint_template import (COLLECTION_MAGIC, HEADER_DTYPE, PATTERN_CODES, RECORD_DTYPE,
+                                  TEMPLATE_MAGIC, TemplateCollection, TemplateWriter, decode_template,
+                                  encode_template, from_records, template_to_fp_data, to_records)
+from minutiae_engine import MINUTIAE_DTYPE
+from synthetic_fingerprint import synthetic_template
+
+ANGLE_STEP = 2 * np.pi / 65536
+
+
+def minutiae_of(points):
+    """Structured array MINUTIAE_DTYPE dari tuple (x, y, type, angle)"""
+    return np.array(points, dtype=MINUTIAE_DTYPE)
+
+
+def test_layout_is_pinned():
+    assert HEADER_DTYPE.itemsize == 32
+    assert RECORD_DTYPE.itemsize == 8
+    data = encode_template(minutiae_of([(3, 513, 2, np.pi / 2)]), 'Whorl', 'Kiri', 480, 560, 500)
+    assert data == (b'FPTM' + struct.pack('<HHHHHBBI', 1, 32, 480, 560, 500, 2, 2, 1) + bytes(12)
+                    + struct.pack('<HHHBB', 3, 513, 16384, 2, 0))
+
+
+def test_template_round_trip():
+    minutiae = synthetic_template(np.random.default_rng(0), 60, size=1000)
+    template = decode_template(encode_template(minutiae, 'Tented Arch', 'Kanan', 800, 750, 1000))
+    assert (template['pattern'], template['hand']) == ('Tented Arch', 'Kanan')
+    assert (template['width'], template['height'], template['dpi']) == (800, 750, 1000)
+
+    decoded = from_records(template['records'])
+    assert decoded.dtype == MINUTIAE_DTYPE
+    np.testing.assert_array_equal(decoded[['x', 'y', 'type']], minutiae[['x', 'y', 'type']])
+    np.testing.assert_allclose(decoded['angle'], minutiae['angle'], atol=ANGLE_STEP / 2 + 1e-7)
+
+    fp_data = template_to_fp_data(template)
+    assert fp_data['minutiae_count'] == 60
+    assert fp_data['image_dimensions'] == (750, 800)
+    assert len(fp_data['minutiae']) == 60
+
+
+def test_decode_is_zero_copy_at_offset():
+    data = b'\0' * 5 + encode_template(minutiae_of([(1, 2, 1, 0.0), (4, 5, 2, 1.0)]))
+    template = decode_template(data, offset=5)
+    assert not template['records'].flags.owndata
+    assert template['records']['x'].tolist() == [1, 4]
+
+
+def test_empty_template():
+    template = decode_template(encode_template([]))
+    assert len(template['records']) == 0
+    assert (template['pattern'], template['hand']) == ('Tidak Diketahui', 'Tidak Diketahui')
+    assert len(from_records(template['records'])) == 0
+
+
+@pytest.mark.parametrize('angle, code', [
+    (0.0, 0),
+    (np.pi / 2, 16384),
+    (np.pi, 32768),
+    (-np.pi, 32768),
+    (-np.pi / 2, 49152),
+    (2 * np.pi - ANGLE_STEP / 4, 0),     # dibulatkan ke 65536 lalu dibungkus ke 0
+    (-ANGLE_STEP / 4, 0),
+    (3 * np.pi, 32768),
+])
+def test_angle_quantization_wraps(angle, code):
+    records = to_records(minutiae_of([(0, 0, 1, angle)]))
+    assert int(records['angle'][0]) == code
+    # Hasil decode selalu di (-pi, pi] (angle float32) dan setara dengan sudut asal modulo 2*pi
+    decoded = float(from_records(records)['angle'][0])
+    assert -np.float32(np.pi) < decoded <= np.float32(np.pi)
+    assert abs(np.angle(np.exp(1j * (decoded - angle)))) <= ANGLE_STEP / 2 + 1e-6
+
+
+def test_out_of_range_values_are_rejected():
+    for points in ([(70000, 0, 1, 0.0)], [(-3, 0, 1, 0.0)], [(0, 65536, 1, 0.0)]):
+        with pytest.raises(ValueError):
+            to_records(minutiae_of(points))
+    for field in ('width', 'height', 'dpi'):
+        with pytest.raises(ValueError):
+            encode_template([], **{field: 70000})
+    # Batas atas rentang tetap valid
+    assert to_records(minutiae_of([(65535, 65535, 1, 0.0)]))['x'][0] == 65535
+
+
+def test_bad_magic_and_version():
+    data = bytearray(encode_template([]))
+    with pytest.raises(ValueError):
+        decode_template(b'XXXX' + bytes(data[4:]))
+    data[4:6] = struct.pack('<H', 99)
+    with pytest.raises(ValueError):
+        decode_template(bytes(data))
+
+
+def write_collection(path, count, seed=0):
+    rng = np.random.default_rng(seed)
+    patterns = list(PATTERN_CODES)
+    expected = []
+    with TemplateWriter(str(path)) as writer:
+        for index in range(count):
+            minutiae = synthetic_template(rng, index % 7, size=500)
+            pattern, hand = patterns[index % len(patterns)], ('Kanan', 'Kiri')[index % 2]
+            assert writer.write(encode_template(minutiae, pattern, hand, 400 + index, 300, 500)) == index
+            expected.append((minutiae, pattern, hand))
+    return expected
+
+
+def test_collection_round_trip(tmp_path):
+    path = tmp_path / 'koleksi.fptc'
+    expected = write_collection(path, 11)
+    data = path.read_bytes()
+
+    # Header: magic, versi, jumlah template; footer: offset tabel lalu magic
+    assert struct.unpack_from('<4sHxxQ', data, 0) == (COLLECTION_MAGIC, 1, 11)
+    table_offset, magic = struct.unpack_from('<Q4s', data, len(data) - 12)
+    assert magic == COLLECTION_MAGIC
+    assert table_offset + 12 * 8 + 12 == len(data)
+
+    collection = TemplateCollection(str(path))
+    assert len(collection) == 11
+    assert collection.offsets[0] == 16 and collection.offsets[-1] == table_offset
+    for index, (minutiae, pattern, hand) in enumerate(expected):
+        template = collection[index]
+        assert (template['pattern'], template['hand'], template['width']) == (pattern, hand, 400 + index)
+        np.testing.assert_array_equal(template['records']['x'], minutiae['x'])
+
+
+def test_collection_headers_and_select(tmp_path):
+    path = tmp_path / 'koleksi.fptc'
+    expected = write_collection(path, 11)
+    collection = TemplateCollection(str(path))
+
+    headers = collection.headers()
+    assert headers.dtype == HEADER_DTYPE and len(headers) == 11
+    assert (headers['magic'] == TEMPLATE_MAGIC).all()
+    assert headers['count'].tolist() == [index % 7 for index in range(11)]
+    assert headers['width'].tolist() == [400 + index for index in range(11)]
+    assert headers['pattern'].tolist() == [PATTERN_CODES[pattern] for _, pattern, _ in expected]
+
+    loops = collection.select(pattern='Loop', hand='Kiri', min_count=1)
+    assert loops.tolist() == [index for index, (minutiae, pattern, hand) in enumerate(expected)
+                              if pattern == 'Loop' and hand == 'Kiri' and len(minutiae) >= 1]
+
+
+def test_empty_collection(tmp_path):
+    path = tmp_path / 'kosong.fptc'
+    with TemplateWriter(str(path)):
+        pass
+    collection = TemplateCollection(str(path))
+    assert len(collection) == 0
+    assert len(collection.headers()) == 0
+
+
+def test_failed_write_keeps_previous_collection(tmp_path):
+    path = tmp_path / 'koleksi.fptc'
+    write_collection(path, 3)
+    before = path.read_bytes()
+
+    with pytest.raises(RuntimeError):
+        with TemplateWriter(str(path)) as writer:
+            writer.write(encode_template([]))
+            raise RuntimeError("gagal di tengah penulisan")
+    assert path.read_bytes() == before
+    assert not (tmp_path / 'koleksi.fptc.tmp').exists()
@@ -0,0 +1,100 @@
+"""Uji deskriptor minutiae bergaya MCC: invarian rigid, skor galeri, dan template kecil
+
+Jalankan dari folder ini: python -m pytest -q test_minutiae_descriptors.py
+"""
+import numpy as np
+import pytest
+
+import minutiae_descriptors
+from minutiae_descriptors import (DESCRIPTOR_WORDS, _transformed, compute_descriptors, gallery_scores,
+                                  match_descriptors, similarity_matrix)
+from minutiae_matcher import apply_alignment
+from synthetic_fingerprint import synthetic_template
+
+
+def centered_template(rng, count):
+    # Jauh dari tepi agar rotasi dan pergeseran _transformed tidak terpotong di koordinat 0
+    minutiae = synthetic_template(rng, count, size=400)
+    minutiae['x'] += 300
+    minutiae['y'] += 300
+    return minutiae
+
+
+@pytest.mark.parametrize('theta, dx, dy', [
+    (0.0, 17, -23),
+    (np.pi / 2, 250, -40),
+    (np.pi, 900, 800),
+    (-np.pi / 2, -120, 610),
+])
+def test_exact_rigid_motion_keeps_descriptors(theta, dx, dy):
+    # Pergeseran bulat dan putaran kelipatan 90 derajat tidak membulatkan koordinat
+    minutiae = centered_template(np.random.default_rng(0), 50)
+    moved = apply_alignment(minutiae, {'theta': theta, 'dx': dx, 'dy': dy})
+    np.testing.assert_array_equal(compute_descriptors(moved), compute_descriptors(minutiae))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_rotation_and_translation_keep_descriptors(seed):
+    rng = np.random.default_rng(seed)
+    minutiae = centered_template(rng, 50)
+    moved = _transformed(rng, minutiae, keep=1.0, jitter=0)
+    descriptors, moved_descriptors = compute_descriptors(minutiae), compute_descriptors(moved)
+
+    # Hanya pembulatan koordinat ke piksel yang membedakan keduanya
+    similarity = similarity_matrix(descriptors, moved_descriptors)
+    assert np.diag(similarity).mean() > 0.9
+    assert (similarity.argmax(axis=1) == np.arange(len(minutiae))).mean() > 0.9
+    score, matched = match_descriptors(descriptors, moved_descriptors)
+    assert score == 1.0
+    assert matched >= 0.9 * len(minutiae)
+
+
+def test_unrelated_templates_score_low():
+    rng = np.random.default_rng(5)
+    first, second = centered_template(rng, 50), centered_template(rng, 50)
+    genuine = match_descriptors(compute_descriptors(first),
+                                compute_descriptors(_transformed(rng, first, keep=0.8, jitter=2)))[0]
+    impostor = match_descriptors(compute_descriptors(first), compute_descriptors(second))[0]
+    assert genuine > impostor
+
+
+def test_empty_and_single_minutia_templates():
+    rng = np.random.default_rng(6)
+    empty = compute_descriptors(synthetic_template(rng, 0))
+    single = compute_descriptors(synthetic_template(rng, 1))
+    full = compute_descriptors(centered_template(rng, 30))
+    assert empty.shape == (0, DESCRIPTOR_WORDS)
+    assert single.shape == (1, DESCRIPTOR_WORDS) and not single.any()
+
+    assert match_descriptors(empty, full) == (0.0, 0)
+    assert match_descriptors(full, empty) == (0.0, 0)
+    assert match_descriptors(single, single) == (0.0, 0)
+    assert match_descriptors(single, full)[0] == 0.0
+    np.testing.assert_array_equal(gallery_scores(full, [empty, single]), [0.0, 0.0])
+    np.testing.assert_array_equal(gallery_scores(empty, [full, single]), [0.0, 0.0])
+    assert len(gallery_scores(full, [])) == 0
+
+
+def gallery(rng, count):
+    # Ukuran bervariasi termasuk template kosong dan satu minutiae di tengah galeri
+    sizes = rng.integers(2, 70, count)
+    sizes[[3, 10]] = 0
+    sizes[[4, 11]] = 1
+    return [compute_descriptors(centered_template(rng, int(size))) for size in sizes]
+
+
+@pytest.mark.parametrize('chunk', [None, 100, 37])
+def test_gallery_scores_match_pairwise_loop(chunk, monkeypatch):
+    rng = np.random.default_rng(7)
+    if chunk is None:
+        # Potongan bawaan: galeri cukup besar untuk melewati satu batas _GALLERY_CHUNK
+        candidates = gallery(rng, 320)
+        assert sum(map(len, candidates)) > minutiae_descriptors._GALLERY_CHUNK
+    else:
+        # Potongan kecil: banyak batas, termasuk kandidat yang lebih besar dari satu potongan
+        monkeypatch.setattr(minutiae_descriptors, '_GALLERY_CHUNK', chunk)
+        candidates = gallery(rng, 40)
+    query = compute_descriptors(centered_template(rng, 45))
+
+    expected = [match_descriptors(query, descriptors)[0] for descriptors in candidates]
+    np.testing.assert_allclose(gallery_scores(query, candidates), expected, rtol=0, atol=1e-12)
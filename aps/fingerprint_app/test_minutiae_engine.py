@@ -0,0 +1,145 @@
+"""Uji kesetaraan mesin minutiae tervektorisasi dengan loop crossing-number lama
+
+Referensi adalah loop per piksel dari versi awal aplikasi (extract_minutiae dan
+calculate_orientation), disalin apa adanya. Setiap skeleton diekstraksi dengan
+referensi, dengan extract_minutiae_array, dan dengan extract_minutiae_packed
+(jalur bit-packed); ketiganya harus menghasilkan titik, tipe, urutan dan
+orientasi yang sama.
+
+Jalankan dari folder ini: python -m pytest -q test_minutiae_engine.py
+"""
+import cv2
+import numpy as np
+import pytest
+from skimage import morphology
+
+from minutiae_engine import MINUTIAE_DTYPE, extract_minutiae_array, extract_minutiae_packed
+from minutiae_matcher import DEFAULT_MINUTIAE_TYPES
+from packed_skeleton import pack_mask, thin, unpack_mask
+from synthetic_fingerprint import PATTERNS, generate_fingerprint
+
+TYPE_NAMES = {code: name for name, code in DEFAULT_MINUTIAE_TYPES.items()}
+
+
+def legacy_orientation(skeleton, i, j):
+    if i > 1 and i < skeleton.shape[0]-2 and j > 1 and j < skeleton.shape[1]-2:
+        region = skeleton[i-2:i+3, j-2:j+3]
+        y, x = np.where(region)
+        if len(x) > 1:
+            return np.arctan2(np.mean(y)-2, np.mean(x)-2)
+    return 0
+
+
+def legacy_minutiae(skeleton):
+    """Loop crossing-number per piksel dari versi awal aplikasi"""
+    minutiae_points = []
+    rows, cols = skeleton.shape
+    for i in range(1, rows-1):
+        for j in range(1, cols-1):
+            if skeleton[i, j]:
+                neighborhood = skeleton[i-1:i+2, j-1:j+2]
+                ridge_count = np.sum(neighborhood) - 1
+                if ridge_count == 1:
+                    minutiae_points.append({'x': j, 'y': i, 'type': 'ridge_ending',
+                                            'orientation': legacy_orientation(skeleton, i, j)})
+                elif ridge_count == 3:
+                    minutiae_points.append({'x': j, 'y': i, 'type': 'bifurcation',
+                                            'orientation': legacy_orientation(skeleton, i, j)})
+    return minutiae_points
+
+
+def assert_same_minutiae(minutiae, expected, offset=(0, 0)):
+    """Titik, tipe dan urutan identik; orientasi sama hingga presisi float32"""
+    dx, dy = offset
+    assert minutiae.dtype == MINUTIAE_DTYPE
+    assert [(int(x), int(y), TYPE_NAMES[int(code)]) for x, y, code in
+            zip(minutiae['x'], minutiae['y'], minutiae['type'])] == \
+        [(m['x'] + dx, m['y'] + dy, m['type']) for m in expected]
+    np.testing.assert_allclose(minutiae['angle'], [m['orientation'] for m in expected], atol=1e-6)
+
+
+def assert_engine_parity(skeleton):
+    skeleton = np.asarray(skeleton, dtype=bool)
+    expected = legacy_minutiae(skeleton)
+    assert_same_minutiae(extract_minutiae_array(skeleton, DEFAULT_MINUTIAE_TYPES), expected)
+    assert_same_minutiae(extract_minutiae_packed(pack_mask(skeleton), skeleton.shape[1],
+                                                 DEFAULT_MINUTIAE_TYPES), expected)
+    return expected
+
+
+def random_skeleton(shape, seed):
+    """Skeleton dari blob acak: noise dihaluskan, di-threshold, lalu ditipiskan"""
+    rng = np.random.default_rng(seed)
+    field = cv2.GaussianBlur(rng.standard_normal(shape).astype(np.float32), (0, 0), 2.0)
+    return morphology.skeletonize(field > 0)
+
+
+def fingerprint_skeleton(pattern, seed):
+    image = generate_fingerprint(pattern, size=(240, 200), seed=seed)
+    binary = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+    return morphology.skeletonize(binary > 0)
+
+
+@pytest.mark.parametrize('shape', [(0, 0), (0, 7), (1, 1), (2, 70), (70, 2), (3, 3), (20, 20), (64, 130)])
+def test_empty_and_degenerate_images(shape):
+    skeleton = np.zeros(shape, dtype=bool)
+    assert legacy_minutiae(skeleton) == []
+    assert len(extract_minutiae_array(skeleton, DEFAULT_MINUTIAE_TYPES)) == 0
+    assert len(extract_minutiae_packed(pack_mask(skeleton), shape[1], DEFAULT_MINUTIAE_TYPES)) == 0
+
+
+@pytest.mark.parametrize('shape', [(3, 3), (2, 9), (9, 2), (5, 5)])
+def test_tiny_full_images(shape):
+    assert_engine_parity(np.ones(shape, dtype=bool))
+
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('shape', [(17, 23), (48, 64), (65, 129), (100, 37)])
+def test_random_pixels(shape, seed):
+    # Piksel acak tanpa struktur ridge: banyak titik di tepi dan di jendela orientasi yang terpotong
+    rng = np.random.default_rng(seed)
+    assert_engine_parity(rng.random(shape) < (0.1 + 0.1 * (seed % 3)))
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('shape', [(60, 60), (96, 200), (129, 71)])
+def test_random_skeletons(shape, seed):
+    assert_engine_parity(random_skeleton(shape, seed))
+
+
+def test_border_pixels():
+    skeleton = np.zeros((12, 12), dtype=bool)
+    # Garis yang berakhir tepat di tepi dan di baris/kolom kedua dari tepi
+    skeleton[0, 2:9] = True
+    skeleton[1:11, 11] = True
+    skeleton[5, 1:6] = True
+    skeleton[10, 3:8] = True
+    skeleton[2:5, 5] = True
+    expected = assert_engine_parity(skeleton)
+    assert {m['type'] for m in expected} == {'ridge_ending', 'bifurcation'}
+    # Piksel di baris/kolom terluar tidak pernah menjadi minutiae
+    assert all(0 < m['x'] < 11 and 0 < m['y'] < 11 for m in expected)
+
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+def test_synthetic_fingerprints(pattern):
+    expected = assert_engine_parity(fingerprint_skeleton(pattern, seed=PATTERNS.index(pattern)))
+    assert {m['type'] for m in expected} == {'ridge_ending', 'bifurcation'}
+
+
+@pytest.mark.parametrize('bounds', [(0, 0, 200, 240), (13, 7, 150, 199), (64, 64, 128, 128), (1, 1, 4, 4)])
+def test_packed_bounds_match_cropped_skeleton(bounds):
+    skeleton = fingerprint_skeleton('Whorl', seed=7)
+    x0, y0, x1, y1 = bounds
+    expected = legacy_minutiae(skeleton[y0:y1, x0:x1])
+    minutiae = extract_minutiae_packed(pack_mask(skeleton), skeleton.shape[1], DEFAULT_MINUTIAE_TYPES, bounds)
+    assert_same_minutiae(minutiae, expected, offset=(x0, y0))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_packed_thinning_matches_skimage(seed):
+    rng = np.random.default_rng(seed)
+    field = cv2.GaussianBlur(rng.standard_normal((90, 150)).astype(np.float32), (0, 0), 3.0)
+    binary = field > 0
+    skeleton = unpack_mask(thin(pack_mask(binary)), binary.shape[1])
+    np.testing.assert_array_equal(skeleton, morphology.skeletonize(binary))
@@ -0,0 +1,112 @@
+"""Uji estimasi penyelarasan rigid minutiae (estimate_alignment)
+
+Sidik jari kedua dibuat dari template sintetis yang diputar dan digeser
+dengan transformasi yang diketahui, ditambah jitter posisi, minutiae hilang,
+dan minutiae palsu; estimasi harus memulihkan theta/dx/dy dalam toleransi.
+
+Jalankan dari folder ini: python -m pytest -q test_minutiae_matcher.py
+"""
+import numpy as np
+import pytest
+
+from minutiae_matcher import ALIGN_MIN_INLIERS, apply_alignment, estimate_alignment, wrap_angle
+from synthetic_fingerprint import synthetic_template
+
+IDENTITY = {'theta': 0.0, 'dx': 0.0, 'dy': 0.0, 'votes': 0}
+
+
+def transformed(minutiae, theta, dx, dy, rng=None, jitter=0, drop=0, extra=0):
+    """Salinan minutiae setelah rotasi theta lalu geser (dx, dy), dengan gangguan opsional"""
+    moved = apply_alignment(minutiae, {'theta': theta, 'dx': dx, 'dy': dy})
+    if rng is None:
+        return moved
+    moved['x'] += rng.integers(-jitter, jitter + 1, len(moved))
+    moved['y'] += rng.integers(-jitter, jitter + 1, len(moved))
+    moved = moved[np.sort(rng.permutation(len(moved))[drop:])]
+    spurious = synthetic_template(rng, extra, size=400)
+    return np.concatenate([moved, spurious])
+
+
+@pytest.mark.parametrize('degrees, dx, dy', [
+    (0, 40, -25),
+    (15, 30, 10),
+    (-40, -60, 80),
+    (90, 200, 0),
+    (170, 500, 300),
+    (-120, 0, 0),
+])
+def test_recovers_rotation_and_translation(degrees, dx, dy):
+    base = synthetic_template(np.random.default_rng(degrees % 7), 60, size=400)
+    theta = np.deg2rad(degrees)
+    alignment = estimate_alignment(transformed(base, theta, dx, dy), base)
+
+    assert abs(wrap_angle(alignment['theta'] - theta)) < np.deg2rad(1.0)
+    assert alignment['dx'] == pytest.approx(dx, abs=2.0)
+    assert alignment['dy'] == pytest.approx(dy, abs=2.0)
+    assert alignment['inliers'] == len(base)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_recovers_alignment_with_noise(seed):
+    # Jitter 2 px, 10 minutiae hilang dan 15 minutiae palsu di sidik jari pertama
+    rng = np.random.default_rng(100 + seed)
+    base = synthetic_template(rng, 60, size=400)
+    theta, dx, dy = rng.uniform(-np.pi, np.pi), rng.uniform(-150, 150), rng.uniform(-150, 150)
+    target = transformed(base, theta, dx, dy, rng, jitter=2, drop=10, extra=15)
+    alignment = estimate_alignment(target, base)
+
+    assert abs(wrap_angle(alignment['theta'] - theta)) < np.deg2rad(2.0)
+    assert alignment['dx'] == pytest.approx(dx, abs=4.0)
+    assert alignment['dy'] == pytest.approx(dy, abs=4.0)
+    assert alignment['inliers'] >= 40
+
+    # Hasilnya menempatkan minutiae kedua di atas pasangannya
+    moved = apply_alignment(base, alignment)
+    expected = transformed(base, theta, dx, dy)
+    distance = np.hypot(moved['x'] - expected['x'], moved['y'] - expected['y'])
+    assert np.median(distance) <= 2.0
+
+
+def test_too_few_inliers_returns_identity():
+    base = synthetic_template(np.random.default_rng(1), ALIGN_MIN_INLIERS - 1, size=400)
+    target = transformed(base, 0.3, 20, 5)
+    alignment = estimate_alignment(target, base)
+    assert {key: alignment[key] for key in IDENTITY} == IDENTITY
+
+    # Transformasi yang sama diterima begitu ambang inlier diturunkan
+    relaxed = estimate_alignment(target, base, min_inliers=ALIGN_MIN_INLIERS - 2)
+    assert relaxed['inliers'] == ALIGN_MIN_INLIERS - 1
+    assert abs(relaxed['theta'] - 0.3) < np.deg2rad(3.0)
+
+
+def test_small_shared_fraction_returns_identity():
+    # 8 minutiae bersama (>= ALIGN_MIN_INLIERS) di antara 40 minutiae acak per sisi: di bawah rasio 0.25
+    rng = np.random.default_rng(2)
+    shared = synthetic_template(rng, 8, size=400)
+    first = np.concatenate([transformed(shared, 0.5, 30, -20), synthetic_template(rng, 40, size=400)])
+    second = np.concatenate([shared, synthetic_template(rng, 40, size=400)])
+
+    alignment = estimate_alignment(first, second)
+    assert {key: alignment[key] for key in IDENTITY} == IDENTITY
+
+    relaxed = estimate_alignment(first, second, min_inlier_ratio=0.1)
+    assert relaxed['inliers'] >= 8
+    assert abs(wrap_angle(relaxed['theta'] - 0.5)) < np.deg2rad(3.0)
+
+
+def test_unrelated_templates_return_identity():
+    rng = np.random.default_rng(3)
+    for _ in range(5):
+        alignment = estimate_alignment(synthetic_template(rng, 50, size=400), synthetic_template(rng, 50, size=400))
+        assert {key: alignment[key] for key in IDENTITY} == IDENTITY
+
+
+def test_already_aligned_and_tiny_inputs():
+    base = synthetic_template(np.random.default_rng(4), 30, size=400)
+    alignment = estimate_alignment(base, base)
+    assert (alignment['theta'], alignment['dx'], alignment['dy']) == (0.0, 0.0, 0.0)
+    assert alignment['inliers'] == 30
+    assert apply_alignment(base, alignment) is base
+
+    assert estimate_alignment(base[:1], base)['inliers'] == 0
+    assert estimate_alignment(base, base[:0])['inliers'] == 0
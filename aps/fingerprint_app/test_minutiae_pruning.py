@@ -0,0 +1,193 @@
+"""Uji aturan pembersihan minutiae pada skeleton buatan tangan
+
+Setiap struktur (spur, hole, self-loop, bridge, island, ridge putus) digambar
+di kanvas 40x80 dengan ridge panjang di sekitarnya, minutiae diambil dengan
+extract_minutiae_array seperti pada analyzer, lalu jumlah yang dibuang per
+aturan dibandingkan dengan hitungan manual.
+
+Jalankan dari folder ini: python -m pytest -q test_minutiae_pruning.py
+"""
+import numpy as np
+import pytest
+
+from minutiae_engine import MINUTIAE_DTYPE, extract_minutiae_array
+from minutiae_matcher import DEFAULT_MINUTIAE_TYPES
+from minutiae_pruning import PRUNING_RULES, crowded, prune_minutiae
+
+MAX_LENGTH = 10
+MIN_DISTANCE = 6
+
+
+def canvas():
+    return np.zeros((40, 80), dtype=bool)
+
+
+def spur():
+    # Ridge panjang dengan duri 3 piksel: ridge ending di ujung duri + 3 piksel bifurkasi di pangkalnya
+    skeleton = canvas()
+    skeleton[20, 5:75] = True
+    skeleton[17:20, 40] = True
+    return skeleton
+
+
+def bridge():
+    # Dua ridge sejajar dihubungkan satu cabang pendek: 3 bifurkasi di setiap ujung jembatan
+    skeleton = canvas()
+    skeleton[15, 5:75] = True
+    skeleton[25, 5:75] = True
+    skeleton[16:25, 40] = True
+    return skeleton
+
+
+def hole():
+    # Ridge terbelah menjadi dua cabang pendek lalu menyatu lagi (pori): bifurkasi di kedua simpul
+    skeleton = canvas()
+    skeleton[20, 5:30] = True
+    skeleton[20, 36:75] = True
+    skeleton[18, 31:35] = True
+    skeleton[22, 31:35] = True
+    skeleton[[19, 21, 19, 21], [30, 30, 35, 35]] = True
+    return skeleton
+
+
+def self_loop():
+    # Cincin kecil yang kembali ke simpul yang sama di atas ridge
+    skeleton = canvas()
+    skeleton[20, 5:75] = True
+    skeleton[19, 40] = True
+    skeleton[[18, 18, 17, 17, 16, 16, 15, 15, 14], [39, 41, 38, 42, 38, 42, 39, 41, 40]] = True
+    return skeleton
+
+
+def island():
+    skeleton = canvas()
+    skeleton[20, 30:35] = True
+    return skeleton
+
+
+def broken_ridge():
+    # Celah 4 piksel: dua ridge ending berdekatan di cabang panjang
+    skeleton = canvas()
+    skeleton[20, 5:30] = True
+    skeleton[20, 34:75] = True
+    return skeleton
+
+
+# (struktur, jumlah minutiae, jumlah dibuang per aturan)
+STRUCTURES = {
+    'spur': (spur, 6, {'spur': 4}),
+    'bridge': (bridge, 10, {'bridge': 6}),
+    'hole': (hole, 4, {'hole': 2}),
+    'self_loop': (self_loop, 5, {'hole': 3}),
+    'island': (island, 2, {'island': 2}),
+    'broken_ridge': (broken_ridge, 4, {'distance': 2}),
+}
+
+
+def prune(skeleton, **kwargs):
+    minutiae = extract_minutiae_array(skeleton, DEFAULT_MINUTIAE_TYPES)
+    kept, report = prune_minutiae(minutiae, skeleton, DEFAULT_MINUTIAE_TYPES, MAX_LENGTH, MIN_DISTANCE,
+                                  **kwargs)
+    assert report['after'] == len(kept)
+    assert sum(report['removed'].values()) == report['before'] - report['after']
+    return minutiae, kept, report
+
+
+@pytest.mark.parametrize('name', STRUCTURES)
+def test_single_structure(name):
+    build, count, expected = STRUCTURES[name]
+    _, _, report = prune(build())
+    assert report['before'] == count
+    assert report['removed'] == {rule: expected.get(rule, 0) for rule in PRUNING_RULES}
+
+
+def test_combined_structures_count_per_rule():
+    # Beberapa jembatan dan pori dalam satu citra: pasangan simpul harus tetap terpisah per cabang
+    names = ['bridge', 'hole', 'spur', 'bridge', 'self_loop', 'hole', 'island', 'broken_ridge']
+    skeleton = np.vstack([STRUCTURES[name][0]() for name in names])
+    _, _, report = prune(skeleton)
+
+    expected = dict.fromkeys(PRUNING_RULES, 0)
+    for name in names:
+        for rule, removed in STRUCTURES[name][2].items():
+            expected[rule] += removed
+    assert report['before'] == sum(STRUCTURES[name][1] for name in names)
+    assert report['removed'] == expected
+
+
+def test_long_branches_are_kept():
+    skeleton = np.vstack([spur(), bridge()])
+    minutiae = extract_minutiae_array(skeleton, DEFAULT_MINUTIAE_TYPES)
+    _, report = prune_minutiae(minutiae, skeleton, DEFAULT_MINUTIAE_TYPES, 1, 0)
+    # Cabang duri (2 piksel di luar simpul) dan jembatan (7 piksel) lebih panjang dari max_length = 1
+    assert report['removed'] == dict.fromkeys(PRUNING_RULES, 0)
+
+
+def test_disabled_rules():
+    minutiae = extract_minutiae_array(spur(), DEFAULT_MINUTIAE_TYPES)
+    kept, report = prune_minutiae(minutiae, spur(), DEFAULT_MINUTIAE_TYPES, 0, 0)
+    assert len(kept) == len(minutiae) and report['after'] == report['before']
+
+
+def test_border_rule_counts_first():
+    skeleton = spur()
+    minutiae = extract_minutiae_array(skeleton, DEFAULT_MINUTIAE_TYPES)
+    # Ujung duri sudah dibuang aturan border, sehingga spur hanya menghitung 3 bifurkasi
+    border = (minutiae['x'] == 40) & (minutiae['y'] == 17)
+    _, report = prune_minutiae(minutiae, skeleton, DEFAULT_MINUTIAE_TYPES, MAX_LENGTH, MIN_DISTANCE,
+                               border=border)
+    assert report['removed']['border'] == 1
+    assert report['removed']['spur'] == 3
+    assert sum(report['removed'].values()) == report['before'] - report['after']
+
+
+def test_empty_skeleton_and_minutiae():
+    minutiae, kept, report = prune(canvas())
+    assert len(minutiae) == 0 and len(kept) == 0
+    assert report == {'before': 0, 'after': 0, 'removed': dict.fromkeys(PRUNING_RULES, 0)}
+
+    # Skeleton berisi ridge tetapi tanpa minutiae yang diberikan
+    empty = extract_minutiae_array(canvas(), DEFAULT_MINUTIAE_TYPES)
+    kept, report = prune_minutiae(empty, spur(), DEFAULT_MINUTIAE_TYPES, MAX_LENGTH, MIN_DISTANCE)
+    assert len(kept) == 0 and report['before'] == report['after'] == 0
+
+
+def test_cropped_skeleton_with_origin():
+    skeleton = np.vstack([bridge(), spur(), hole(), self_loop()])
+    minutiae = extract_minutiae_array(skeleton, DEFAULT_MINUTIAE_TYPES)
+    expected, expected_report = prune_minutiae(minutiae, skeleton, DEFAULT_MINUTIAE_TYPES,
+                                               MAX_LENGTH, MIN_DISTANCE)
+
+    # Potongan (seperti ROI segmentasi) yang memuat semua minutiae, dengan origin (x0, y0)
+    x0, y0, x1, y1 = 3, 10, 77, 150
+    kept, report = prune_minutiae(minutiae, skeleton[y0:y1, x0:x1], DEFAULT_MINUTIAE_TYPES,
+                                  MAX_LENGTH, MIN_DISTANCE, origin=(x0, y0))
+    assert report == expected_report
+    np.testing.assert_array_equal(kept, expected)
+
+
+def brute_force_crowded(minutiae, min_distance):
+    xs = minutiae['x'].astype(np.int64)
+    ys = minutiae['y'].astype(np.int64)
+    distance2 = (xs[:, None] - xs[None, :]) ** 2 + (ys[:, None] - ys[None, :]) ** 2
+    np.fill_diagonal(distance2, np.iinfo(np.int64).max)
+    return (distance2 < min_distance ** 2).any(axis=1)
+
+
+@pytest.mark.parametrize('min_distance', [1, 2.5, 6, 13.7])
+@pytest.mark.parametrize('seed', range(3))
+def test_crowded_matches_brute_force(seed, min_distance):
+    rng = np.random.default_rng(seed)
+    minutiae = np.zeros(300, dtype=MINUTIAE_DTYPE)
+    minutiae['x'] = rng.integers(0, 400, len(minutiae))
+    minutiae['y'] = rng.integers(1000, 1300, len(minutiae))
+    minutiae['x'][:5] = minutiae['x'][5:10]     # titik kembar
+    minutiae['y'][:5] = minutiae['y'][5:10]
+    np.testing.assert_array_equal(crowded(minutiae, min_distance), brute_force_crowded(minutiae, min_distance))
+
+
+def test_crowded_small_inputs():
+    minutiae = extract_minutiae_array(broken_ridge(), DEFAULT_MINUTIAE_TYPES)
+    assert not crowded(minutiae[:1], MIN_DISTANCE).any()
+    assert not crowded(minutiae, 0).any()
+    assert crowded(minutiae, MIN_DISTANCE).tolist() == [False, True, True, False]